@@ -0,0 +1,38 @@
+"""Cost of publishing one alert to N /alerts/stream listeners that never read (slow clients).
+
+Run from the repo root:
+    python -m benchmarks.bench_alert_fanout --subscribers 1 10 100 1000 --events 5000
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import time
+
+from v2_api.alerts import AlertBroker
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--buffer", type=int, default=100, help="events buffered per subscriber")
+    args = parser.parse_args()
+
+    event = {"patient_id": "1", "timestamp": "2025-01-01T00:00:00", "total_news2_score": 7, "levels": {}}
+    print(f"{args.events} alerts, buffer {args.buffer} per subscriber, no subscriber drains")
+    print(f"{'subscribers':>11} {'us/publish':>11} {'us/delivery':>12} {'max buffered':>13}")
+    for count in args.subscribers:
+        broker = AlertBroker(5, ["Severe Alert"], args.buffer)
+        subscriptions = [broker.subscribe() for _ in range(count)]
+        start = time.perf_counter()
+        for _ in range(args.events):
+            broker.publish(event)
+        elapsed = time.perf_counter() - start
+        buffered = max(len(s.drain()[0]) for s in subscriptions)
+        print(f"{count:>11} {elapsed / args.events * 1e6:>11.2f} {elapsed / (args.events * count) * 1e6:>12.3f} {buffered:>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Ingest throughput: POST /add_vitals/ one reading at a time vs POST /add_vitals/batch.
+
+Run from the repo root:
+    python -m benchmarks.bench_batch_ingest --readings 2000 --batch-size 100
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api.app import app
+
+# -------------------------
+# HELPERS
+# -------------------------
+def make_payloads(n: int, n_patients: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "patient_name": f"patient {rng.randint(1, n_patients)}",
+            "dob": "01/01/00",
+            "vitals": {
+                "Blood pressure": {"systolic": rng.randint(85, 180), "diastolic": rng.randint(50, 100)},
+                "Heart rate": rng.randint(45, 140),
+                "Respiratory rate": rng.randint(10, 28),
+                "Temperature": round(rng.uniform(35.0, 39.5), 1),
+                "Oxygen saturations": rng.randint(88, 100),
+                "Level of consciousness (fully awake and responsive?)": "Yes",
+            },
+        }
+        for _ in range(n)
+    ]
+
+def use_fresh_files(tmp: Path, name: str):
+    v2.VITALS_FILE = tmp / f"{name}_vitals.csv"
+    v2.MAPPING_FILE = tmp / f"{name}_patient_mapping.csv"
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--patients", type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.readings, args.patients)
+    client = TestClient(app)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        use_fresh_files(tmp, "single")
+        start = time.perf_counter()
+        for p in payloads:
+            client.post("/add_vitals/", params={"patient_name": p["patient_name"], "dob": p["dob"]}, json=p["vitals"])
+        single_s = time.perf_counter() - start
+
+        use_fresh_files(tmp, "batch")
+        start = time.perf_counter()
+        for i in range(0, len(payloads), args.batch_size):
+            client.post("/add_vitals/batch", json=payloads[i:i + args.batch_size])
+        batch_s = time.perf_counter() - start
+
+    print(f"{args.readings} readings, {args.patients} patients, batch size {args.batch_size}")
+    print(f"{'endpoint':<20} {'readings/s':>12}")
+    print(f"{'/add_vitals/':<20} {args.readings / single_s:>12.0f}")
+    print(f"{'/add_vitals/batch':<20} {args.readings / batch_s:>12.0f}")
+    print(f"speedup: {single_s / batch_s:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Scan throughput (GB/s) of the packed binary format read through mmap vs parsing vitals.csv.
+
+Run from the repo root:
+    python -m benchmarks.bench_binary_scan --rows 1000000
+
+The same synthetic readings (benchmarks/synthetic.py) are written to a
+vitals CSV and to the binary format. Each case is one full pass over the
+data, reported as bytes of its own file per second (and rows per second,
+since the binary file is about 2x smaller):
+  csv parse       csv.reader over every line (what a full-history read costs today)
+  binary columns  max/mean of every vital and a NEWS2 >= 5 count, on the mapped view
+  binary rescore  score_news2_batch over every record's vitals, straight from the map
+and then one patient's history as a VitalsSeries, from each format.
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import csv
+import itertools
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+import v2_api.vitals_tracker_v2 as v2
+from benchmarks.bench_suite import best_of
+from benchmarks.synthetic import iter_readings
+from v2_api.binary_store import INT_VITALS, MISSING, BinaryStorage, vital_column
+from v2_api.series import VITAL_COLUMNS, VitalsSeries
+from v2_api.storage import CSVStorage
+
+# -------------------------
+# GLOBALS
+# -------------------------
+CHUNK = 50_000
+READINGS_PER_PATIENT = 100
+
+# -------------------------
+# CASES
+# -------------------------
+def csv_parse(path: Path) -> int:
+    with open(path, 'r', newline='') as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+def binary_columns(records) -> int:
+    for name in INT_VITALS:
+        column = records[name]
+        valid = column[column != MISSING]
+        valid.max(), valid.mean()
+    np.nanmax(records["temperature"]), np.nanmean(records["temperature"])
+    return int(np.count_nonzero(records["news2_score"] >= 5))
+
+def binary_rescore(records) -> int:
+    columns = {name: vital_column(records, name) for name in v2.COLUMN_THRESHOLDS}
+    _, totals = v2.score_news2_batch(columns)
+    return len(totals)
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    n_patients = max(1, args.rows // READINGS_PER_PATIENT)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        csv_store = CSVStorage(tmp / "vitals.csv", tmp / "patient_mapping.csv", v2.CSVNAMES)
+        binary = BinaryStorage(tmp / "vitals.bin", tmp / "patient_mapping.csv", v2.CSVNAMES)
+        csv_store.init()
+        binary.init()
+        readings = iter_readings(args.rows, n_patients)
+        while True:
+            chunk = list(itertools.islice(readings, CHUNK))
+            if not chunk:
+                break
+            csv_store.append_many(chunk)
+            binary.append_many(chunk)
+        csv_bytes, binary_bytes = os.path.getsize(csv_store.vitals_path), os.path.getsize(binary.path)
+        records = binary.records()
+        print(f"{args.rows} readings: vitals.csv {csv_bytes / 1e6:.1f} MB, vitals.bin {binary_bytes / 1e6:.1f} MB")
+
+        print(f"\n{'full pass':<16} {'seconds':>9} {'GB/s':>7} {'M rows/s':>9}")
+        for name, size, run in (
+            ("csv parse", csv_bytes, lambda: csv_parse(csv_store.vitals_path)),
+            ("binary columns", binary_bytes, lambda: binary_columns(records)),
+            ("binary rescore", binary_bytes, lambda: binary_rescore(records)),
+        ):
+            seconds = best_of(args.repeats, run)
+            print(f"{name:<16} {seconds:>9.4f} {size / seconds / 1e9:>7.2f} {args.rows / seconds / 1e6:>9.2f}")
+
+        patient_id = str(n_patients // 2)
+        csv_store.load(patient_id)  # builds the offset index
+        csv_series = best_of(args.repeats, lambda: VitalsSeries.from_rows(patient_id, csv_store.load(patient_id)))
+        binary_series = best_of(args.repeats, lambda: binary.load_series(patient_id))
+        assert binary.load_series(patient_id).to_rows()[0].keys() == {"patient_id", "timestamp", "news2_score", "loc", *VITAL_COLUMNS}
+        print(f"\none patient's series ({READINGS_PER_PATIENT} readings): csv {csv_series * 1e6:.0f} us, "
+              f"binary {binary_series * 1e6:.0f} us")
+
+if __name__ == "__main__":
+    main()
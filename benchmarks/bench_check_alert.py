@@ -0,0 +1,38 @@
+"""Scalar check_alert: compiled lookup tables vs the original dict walk.
+
+Run from the repo root:
+    python -m benchmarks.bench_check_alert
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import random
+import timeit
+
+from v2_api.scoring import match_level
+from v2_api.vitals_tracker_v2 import check_alert, thresholds
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--values", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    cases = {
+        "Heart rate (int)": ("Heart rate", [rng.randint(30, 180) for _ in range(args.values)]),
+        "Temperature (float)": ("Temperature", [round(rng.uniform(34.0, 41.0), 1) for _ in range(args.values)]),
+        "bp_systolic (int)": ("bp_systolic", [rng.randint(60, 240) for _ in range(args.values)]),
+    }
+    print(f"{'vital':<22} {'dict walk ns':>13} {'compiled ns':>12} {'speedup':>8}")
+    for label, (vital, values) in cases.items():
+        vital_thresholds = thresholds[vital]
+        walk = min(timeit.repeat(lambda: [match_level(vital_thresholds, v) for v in values], number=1, repeat=5))
+        compiled = min(timeit.repeat(lambda: [check_alert(vital, v) for v in values], number=1, repeat=5))
+        print(f"{label:<22} {walk / len(values) * 1e9:>13.0f} {compiled / len(values) * 1e9:>12.0f} {walk / compiled:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
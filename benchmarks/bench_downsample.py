@@ -0,0 +1,48 @@
+"""LTTB downsampling: its own cost (should grow linearly) and what it saves on PNG rendering and JSON size.
+
+Run from the repo root:
+    python -m benchmarks.bench_downsample --sizes 1000 10000 100000 --max-points 1000
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import json
+import time
+
+from benchmarks.bench_storage import make_rows
+from v2_api.downsample import downsample
+from v2_api.rendering import render_trends_png
+from v2_api.series import VitalsSeries
+
+# -------------------------
+# HELPERS
+# -------------------------
+def timed_ms(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="readings in the history")
+    parser.add_argument("--max-points", type=int, default=1000)
+    args = parser.parse_args()
+
+    render_trends_png(VitalsSeries.from_rows("0", [{k: str(v) for k, v in row.items()} for row in make_rows(10, 1)]))  # warm-up
+    print(f"max_points={args.max_points}")
+    print(f"{'readings':>9} {'lttb ms':>8} {'png full ms':>12} {'png lttb ms':>12} {'json full KB':>13} {'json lttb KB':>13}")
+    for size in args.sizes:
+        series = VitalsSeries.from_rows("1", [{k: str(v) for k, v in row.items()} for row in make_rows(size, 1)])
+        lttb_ms, small = timed_ms(downsample, series, args.max_points)
+        full_png_ms, _ = timed_ms(render_trends_png, series)
+        small_png_ms, _ = timed_ms(render_trends_png, small)
+        full_kb = len(json.dumps(series.to_rows())) / 1024
+        small_kb = len(json.dumps(small.to_rows())) / 1024
+        print(f"{size:>9} {lttb_ms:>8.1f} {full_png_ms:>12.1f} {lttb_ms + small_png_ms:>12.1f} {full_kb:>13.0f} {small_kb:>13.0f}")
+
+if __name__ == "__main__":
+    main()
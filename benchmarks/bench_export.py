@@ -0,0 +1,99 @@
+"""Whole-dataset columnar export: seconds per million readings, file size and peak memory, per format.
+
+Run from the repo root:
+    python -m benchmarks.bench_export --rows 1000000
+
+The same synthetic readings (benchmarks/synthetic.py) are stored with the
+CSV backend (and the binary one, whose export skips text parsing), with a
+named patient for every ID. Each export writes the whole dataset to a file
+in chunks of --chunk-rows. "pandas csv" is today's nightly job for
+comparison: read vitals.csv and patient_mapping.csv with pandas and merge
+them. Peak memory is the tracemalloc peak of a second, traced run (it
+covers Python and NumPy allocations; pyarrow's own buffers are not traced).
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import itertools
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import v2_api.vitals_tracker_v2 as v2
+from benchmarks.synthetic import iter_readings
+from v2_api.binary_store import BinaryStorage
+from v2_api.export import EXPORT_FORMATS, export_to_file, have_pyarrow
+from v2_api.storage import CSVStorage
+
+# -------------------------
+# GLOBALS
+# -------------------------
+CHUNK = 50_000
+READINGS_PER_PATIENT = 100
+
+# -------------------------
+# HELPERS
+# -------------------------
+def pandas_csv(store: CSVStorage):
+    import pandas as pd
+
+    vitals = pd.read_csv(store.vitals_path, parse_dates=["timestamp"])
+    patients = pd.read_csv(store.mapping_path)
+    vitals.merge(patients, on="patient_id", how="left")
+
+def measure(run) -> tuple:
+    """(seconds, peak MB) of run(): timed untraced, then run again under tracemalloc."""
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1e6
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=v2.EXPORT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    n_patients = max(1, args.rows // READINGS_PER_PATIENT)
+    formats = [fmt for fmt in EXPORT_FORMATS if fmt == "npz" or have_pyarrow()]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        csv_store = CSVStorage(tmp / "vitals.csv", tmp / "patient_mapping.csv", v2.CSVNAMES)
+        binary = BinaryStorage(tmp / "vitals.bin", tmp / "patient_mapping.csv", v2.CSVNAMES)
+        csv_store.init()
+        binary.init()
+        csv_store.get_or_create_patients((f"patient {i}", "01/01/80") for i in range(1, n_patients + 1))
+        readings = iter_readings(args.rows, n_patients)
+        while True:
+            chunk = list(itertools.islice(readings, CHUNK))
+            if not chunk:
+                break
+            csv_store.append_many(chunk)
+            binary.append_many(chunk)
+        print(f"{args.rows} readings, {n_patients} patients, vitals.csv {os.path.getsize(csv_store.vitals_path) / 1e6:.1f} MB, "
+              f"chunks of {args.chunk_rows}")
+
+        cases = [("pandas csv", "-", lambda out: pandas_csv(csv_store), None)]
+        for store in (csv_store, binary):
+            for fmt in formats:
+                out = tmp / f"export.{EXPORT_FORMATS[fmt][1]}"
+                cases.append((store.name, fmt, lambda out, store=store, fmt=fmt: export_to_file(store, out, fmt, args.chunk_rows), out))
+
+        print(f"\n{'source':<11} {'format':<8} {'s / 1M rows':>12} {'file MB':>8} {'peak MB':>8}")
+        for source, fmt, run, out in cases:
+            seconds, peak = measure(lambda: run(out))
+            size = f"{os.path.getsize(out) / 1e6:>8.1f}" if out is not None else f"{'-':>8}"
+            print(f"{source:<11} {fmt:<8} {seconds * 1e6 / args.rows:>12.2f} {size} {peak:>8.1f}")
+
+if __name__ == "__main__":
+    main()
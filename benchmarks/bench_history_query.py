@@ -0,0 +1,64 @@
+"""Latency of a 24-hour window / one page of history as a patient's history grows: full scan vs history cache.
+
+Run from the repo root:
+    python -m benchmarks.bench_history_query --sizes 1000 10000 50000 --limit 50 --repeats 50
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import v2_api.vitals_tracker_v2 as v2
+from benchmarks.bench_storage import make_rows, percentile
+from v2_api.series import VitalsSeries, to_micros
+
+# -------------------------
+# HELPERS
+# -------------------------
+def scan_window(patient_id: str, since: datetime, until: datetime, limit: int) -> list:
+    """The old way: load and parse every reading, then filter."""
+    series = VitalsSeries.from_rows(patient_id, v2.get_storage().load(patient_id))
+    lo, hi = to_micros(since.isoformat()), to_micros(until.isoformat())
+    return [series.row(i) for i in range(len(series)) if lo <= series.timestamps[i] <= hi][:limit]
+
+def timed(fn, repeats: int) -> list:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="readings in the history")
+    parser.add_argument("--limit", type=int, default=50, help="page size")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"last 24h of history, pages of {args.limit}, {args.repeats} queries each")
+    print(f"{'readings':>9} {'scan p50 ms':>12} {'cache p50 ms':>13} {'cache p99 ms':>13}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            v2.VITALS_FILE = Path(tmp) / "vitals.csv"
+            v2.MAPPING_FILE = Path(tmp) / "patient_mapping.csv"
+            patient_id, _ = v2.get_storage().get_or_create_patient("bench patient", "01/01/00")
+            rows = make_rows(size, 1)
+            v2.get_storage().append_many(rows)
+            until = datetime.fromisoformat(rows[-1]["timestamp"])
+            since = until - timedelta(hours=24)
+
+            scan = timed(lambda: scan_window(patient_id, since, until, args.limit), max(1, args.repeats // 10))
+            v2.query_history(patient_id, since, until, args.limit)  # warm-up: first load fills the cache
+            cached = timed(lambda: v2.query_history(patient_id, since, until, args.limit), args.repeats)
+        print(f"{size:>9} {percentile(scan, 50):>12.2f} {percentile(cached, 50):>13.3f} {percentile(cached, 99):>13.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""End-to-end HTTP load test: many concurrent async clients against the app under uvicorn, latency percentiles per endpoint.
+
+Run from the repo root:
+    python -m benchmarks.bench_http_load --clients 200 --duration 30
+    python -m benchmarks.bench_http_load --mix add_vitals=1 trends_png=1 --output load.json
+    python -m benchmarks.bench_http_load --url http://127.0.0.1:8000 --compare load-v1.json
+
+Unless --url is given, the app is started under a local uvicorn (in its own
+process, on scratch data files) and --patients patients are seeded with a
+few readings each. Every client then loops for --duration seconds: it picks
+an endpoint by the --mix weights, sends it, and records the latency and
+whether it failed (a transport error, timeout or status >= 400). The report
+gives requests, throughput, error rate and p50/p95/p99 per endpoint; the
+same numbers are written as JSON (--output) so runs can be diffed between
+releases, and --compare prints the change against an earlier report.
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import asyncio
+import json
+import platform
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+from benchmarks.bench_storage import percentile
+from benchmarks.bench_write_behind import free_port, start_server
+from benchmarks.synthetic import profile_for, random_vitals
+
+# -------------------------
+# GLOBALS
+# -------------------------
+# --mix name -> how a request for it is sent; `patient` is (name, dob, patient_id)
+ENDPOINTS = {
+    "add_vitals": ("POST /add_vitals/", lambda client, patient, rng: client.post(
+        "/add_vitals/", params={"patient_name": patient[0], "dob": patient[1]},
+        json=random_vitals(rng, profile_for(int(patient[2]))))),
+    "patient": ("GET /patient/{id}", lambda client, patient, rng: client.get(f"/patient/{patient[2]}")),
+    "trends_json": ("GET /trends/{id}/json", lambda client, patient, rng: client.get(f"/trends/{patient[2]}/json")),
+    "trends_png": ("GET /trends/{id}/png", lambda client, patient, rng: client.get(f"/trends/{patient[2]}/png")),
+}
+DEFAULT_MIX = ["add_vitals=4", "patient=3", "trends_json=2", "trends_png=1"]
+SEED_READINGS = 5  # per patient, so every patient can be plotted from the start
+
+# -------------------------
+# HELPERS
+# -------------------------
+def parse_mix(items: list) -> dict:
+    """["add_vitals=4", "patient=3"] -> {"add_vitals": 4.0, "patient": 3.0}"""
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition("=")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint {name!r} in --mix (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+def seed_patients(base_url: str, n_patients: int) -> list:
+    """Give n_patients a few readings each; returns [(name, dob, patient_id)]."""
+    start = datetime.now() - timedelta(hours=SEED_READINGS)
+    rng = random.Random(0)
+    patients = []
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        for first in range(1, n_patients + 1, 100):
+            identities = [(f"load patient {i}", "01/01/00") for i in range(first, min(n_patients, first + 99) + 1)]
+            items = [
+                {"patient_name": name, "dob": dob, "timestamp": (start + timedelta(hours=h)).isoformat(),
+                 "vitals": random_vitals(rng, profile_for(i))}
+                for h in range(SEED_READINGS) for i, (name, dob) in enumerate(identities)
+            ]
+            response = client.post("/add_vitals/batch", json=items)
+            response.raise_for_status()
+            ids = [result["patient_id"] for result in response.json()[:len(identities)]]
+            patients += [identity + (patient_id,) for identity, patient_id in zip(identities, ids)]
+    return patients
+
+async def client_loop(client, mix: dict, patients: list, deadline: float, seed: int, samples: dict):
+    """One monitor: send weighted-random requests until `deadline`, appending (ms, ok) per endpoint."""
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        send = ENDPOINTS[name][1]
+        start = time.perf_counter()
+        try:
+            response = await send(client, rng.choice(patients), rng)
+            ok = response.status_code < 400
+        except httpx.HTTPError:  # connection refused/reset, timeout, ...
+            ok = False
+        samples[name].append(((time.perf_counter() - start) * 1000, ok))
+
+async def run_load(base_url: str, mix: dict, patients: list, clients: int, duration: float, timeout: float) -> tuple:
+    """(samples per endpoint, wall seconds) for `clients` concurrent monitors over `duration` seconds."""
+    samples = {name: [] for name in mix}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(client_loop(client, mix, patients, deadline, i, samples) for i in range(clients)))
+        return samples, time.perf_counter() - start
+
+def summarise(samples: list, wall: float) -> dict:
+    latencies = sorted(ms for ms, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    if not latencies:
+        return {"requests": 0, "errors": 0, "error_rate": 0.0, "throughput_rps": 0.0,
+                "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4),
+        "throughput_rps": round(len(samples) / wall, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+def print_report(report: dict, previous: dict = None):
+    header = f"{'endpoint':<24} {'requests':>9} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    print(header + ("   p99 vs previous" if previous else ""))
+    rows = dict(report["endpoints"], all=report["total"])
+    for label, stats in rows.items():
+        if not stats["requests"]:
+            print(f"{label:<24} {0:>9}")
+            continue
+        line = (f"{label:<24} {stats['requests']:>9} {stats['throughput_rps']:>8.1f} {stats['error_rate']:>7.2%} "
+                f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+        before = (previous or {}).get("endpoints", {}).get(label) if label != "all" else (previous or {}).get("total")
+        if before and before.get("p99_ms"):
+            line += f"   {stats['p99_ms'] / before['p99_ms']:>6.2f}x"
+        print(line)
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200, help="concurrent monitors")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load after seeding")
+    parser.add_argument("--mix", nargs="+", default=DEFAULT_MIX, help=f"endpoint=weight pairs; endpoints: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--patients", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds (counts as an error)")
+    parser.add_argument("--storage", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--url", help="load an already running server instead of starting one (it is seeded too)")
+    parser.add_argument("--output", type=Path, help="write the report as JSON")
+    parser.add_argument("--compare", type=Path, help="an earlier --output report to compare p99 against")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        base_url = args.url
+        if base_url is None:
+            port = free_port()
+            server = start_server(Path(tmp), port, {"VITALS_STORAGE": args.storage})
+            base_url = f"http://127.0.0.1:{port}"
+        try:
+            patients = seed_patients(base_url, args.patients)
+            samples, wall = asyncio.run(run_load(base_url, mix, patients, args.clients, args.duration, args.timeout))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {"clients": args.clients, "duration_s": args.duration, "mix": mix, "patients": args.patients,
+                   "storage": None if args.url else args.storage, "url": args.url},
+        "endpoints": {ENDPOINTS[name][0]: summarise(samples[name], wall) for name in mix},
+        "total": summarise([sample for name in mix for sample in samples[name]], wall),
+    }
+    previous = json.loads(args.compare.read_text()) if args.compare else None
+    print(f"{args.clients} clients for {wall:.1f}s, {args.patients} patients, mix "
+          + ", ".join(f"{name}={weight:g}" for name, weight in mix.items()))
+    print_report(report, previous)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nreport written to {args.output}")
+
+if __name__ == "__main__":
+    main()
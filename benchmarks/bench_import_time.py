@@ -0,0 +1,96 @@
+"""Import time of the CLI, the v2 core module and the API app, checked against a budget.
+
+Run from the repo root:
+    python -m benchmarks.bench_import_time            # report
+    python -m benchmarks.bench_import_time --check    # exit 1 if any module is over budget
+
+Each module is imported in a fresh interpreter under `python -X importtime`;
+the cumulative time of the module itself is reported (best of --repeats runs),
+along with the slowest packages it pulled in. Budgets live in
+benchmarks/import_budget.json, in milliseconds on a machine where a fixed set
+of stdlib imports (the "reference") takes `reference.ms`. On a slower machine
+(a busy CI runner) every budget is scaled up by the measured reference time
+over that figure, so the check tracks our imports, not the runner's speed.
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# -------------------------
+# GLOBALS
+# -------------------------
+ROOT_DIR = Path(__file__).parent.parent
+BUDGET_FILE = Path(__file__).parent / "import_budget.json"
+
+# -------------------------
+# HELPERS
+# -------------------------
+def import_times(module: str) -> dict:
+    """{imported package: cumulative microseconds} for one cold `import module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}" if module else "pass"],
+        cwd=ROOT_DIR, env={**os.environ, "PYTHONPATH": str(ROOT_DIR)},
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+def reference_ms(modules: list, repeats: int) -> float:
+    """Best cumulative ms of importing the reference stdlib modules in a fresh interpreter."""
+    return min(sum(import_times(", ".join(modules))[name] for name in modules) for _ in range(repeats)) / 1000
+
+def measure(module: str, repeats: int, startup: set) -> tuple:
+    """(best cumulative ms of `module`, that run's {top-level package: ms} beyond interpreter startup)."""
+    best = None
+    for _ in range(repeats):
+        times = import_times(module)
+        if best is None or times[module] < best[module]:
+            best = times
+    packages = {
+        name: us / 1000 for name, us in best.items()
+        if "." not in name and name != module and name not in startup
+    }
+    return best[module] / 1000, packages
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=3, help="heaviest packages to list per module")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any module exceeds its budget")
+    args = parser.parse_args()
+
+    config = json.loads(BUDGET_FILE.read_text())
+    reference = config["reference"]
+    scale = max(1.0, reference_ms(reference["modules"], args.repeats) / reference["ms"])
+    startup = set(import_times(""))  # site, encodings, ...: loaded before any of our code runs
+    over = []
+    print(f"budgets x{scale:.2f} (reference imports vs {reference['ms']} ms)")
+    print(f"{'module':<28} {'ms':>8} {'budget':>8}  heaviest imports")
+    for module, budget_ms in config["budgets"].items():
+        budget_ms = round(budget_ms * scale)
+        ms, packages = measure(module, args.repeats, startup)
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:args.top]
+        status = "" if ms <= budget_ms else "  OVER BUDGET"
+        print(f"{module:<28} {ms:>8.1f} {budget_ms:>8}  "
+              + ", ".join(f"{name} {t:.0f}ms" for name, t in heaviest) + status)
+        if ms > budget_ms:
+            over.append(module)
+    if args.check and over:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Concurrent CSV writers: throughput and integrity with and without cross-process file locking.
+
+Run from the repo root:
+    python -m benchmarks.bench_locking --processes 8 --writes 2000
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import csv
+import multiprocessing
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import v2_api.file_lock as file_lock
+from v2_api.storage import CSVStorage
+from v2_api.vitals_tracker_v2 import CSVNAMES
+
+# -------------------------
+# HELPERS
+# -------------------------
+def writer(vitals_path, mapping_path, seed, writes, n_patients, locking, barrier):
+    file_lock.LOCKING = locking
+    store = CSVStorage(vitals_path, mapping_path, CSVNAMES)
+    rng = random.Random(seed)
+    barrier.wait()
+    for i in range(writes):
+        name = f"patient {rng.randint(1, n_patients)}"
+        patient_id, _ = store.get_or_create_patient(name, "01/01/00")
+        store.append({"patient_id": patient_id, "timestamp": f"2025-01-01T00:00:00.{i:06d}", "news2_score": 0,
+                      "bp_systolic": 120, "bp_diastolic": 80, "heart_rate": 70, "respiratory_rate": 16,
+                      "temperature": 37.0, "oxygen_sats": 98, "loc": name})
+
+def check(vitals_path: Path, mapping_path: Path, expected_rows: int) -> dict:
+    """Count the ways concurrent writers corrupted the files."""
+    with open(mapping_path, newline='') as f:
+        mapping = list(csv.DictReader(f))
+    ids = [row["patient_id"] for row in mapping]
+    names = [row["patient_name"] for row in mapping]
+    with open(vitals_path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    torn = sum(1 for row in rows if None in row.values() or None in row or row["loc"] not in names)
+    return {
+        "duplicate_ids": len(ids) - len(set(ids)),
+        "duplicate_patients": len(names) - len(set(names)),
+        "lost_rows": expected_rows - (len(rows) - torn),
+        "torn_rows": torn,
+    }
+
+def run(processes: int, writes: int, n_patients: int, locking: bool) -> tuple:
+    ctx = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory() as tmp:
+        vitals_path, mapping_path = Path(tmp) / "vitals.csv", Path(tmp) / "patient_mapping.csv"
+        barrier = ctx.Barrier(processes + 1)
+        procs = [
+            ctx.Process(target=writer, args=(vitals_path, mapping_path, seed, writes, n_patients, locking, barrier))
+            for seed in range(processes)
+        ]
+        for p in procs:
+            p.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+        return processes * writes / elapsed, check(vitals_path, mapping_path, processes * writes)
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=2000, help="readings written per process")
+    parser.add_argument("--patients", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{args.processes} processes x {args.writes} readings, {args.patients} patients")
+    print(f"{'locking':<8} {'rows/s':>10} {'dup IDs':>8} {'dup pts':>8} {'lost':>6} {'torn':>6}")
+    results = {}
+    for locking in (False, True):
+        rate, problems = results[locking] = run(args.processes, args.writes, args.patients, locking)
+        print(f"{'on' if locking else 'off':<8} {rate:>10.0f} {problems['duplicate_ids']:>8} "
+              f"{problems['duplicate_patients']:>8} {problems['lost_rows']:>6} {problems['torn_rows']:>6}")
+    print(f"locking cost: {1 - results[True][0] / results[False][0]:.0%} of unlocked throughput")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Cost of the /metrics instrumentation on add_vitals: recording on vs off (VITALS_METRICS=0).
+
+Run from the repo root:
+    python -m benchmarks.bench_metrics_overhead --readings 5000
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import tempfile
+import timeit
+from pathlib import Path
+
+import v2_api.vitals_tracker_v2 as v2
+from benchmarks.synthetic import iter_vitals
+from v2_api.metrics import metrics
+
+# -------------------------
+# HELPERS
+# -------------------------
+def one_stage():
+    with metrics.stage("bench"):
+        pass
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=5000)
+    args = parser.parse_args()
+
+    vitals = list(iter_vitals(args.readings))
+    print(f"{'metrics':<9} {'stage() ns':>11} {'add_vitals us':>14}")
+    for enabled in (False, True):
+        metrics.configure(enabled=enabled)
+        metrics.reset()
+        per_stage = min(timeit.repeat(one_stage, number=100_000, repeat=5)) / 100_000
+        with tempfile.TemporaryDirectory() as tmp:
+            v2.VITALS_FILE = Path(tmp) / "vitals.csv"
+            v2.MAPPING_FILE = Path(tmp) / "patient_mapping.csv"
+            v2.init_storage()
+            add = lambda: [v2.add_vitals(f"patient {i % 100}", "01/01/00", v) for i, v in enumerate(vitals)]
+            per_reading = min(timeit.repeat(add, number=1, repeat=3)) / len(vitals)
+        print(f"{'on' if enabled else 'off':<9} {per_stage * 1e9:>11.0f} {per_reading * 1e6:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Whole-history export: JSON list vs NDJSON stream, time to first byte and peak memory.
+
+Run from the repo root:
+    python -m benchmarks.bench_ndjson_stream --sizes 10000 50000 200000
+
+The JSON path is what GET /patient/{patient_id} does without parameters
+(cold history cache: parse every row, build the list, serialise it);
+the NDJSON path is stream_history(): rows read from storage one at a
+time in timestamp order, encoded and sent in chunks.
+Memory is the tracemalloc peak of producing the whole body (tracing
+slows both paths alike, so compare the columns rather than read them as
+absolute latencies).
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import v2_api.vitals_tracker_v2 as v2
+from benchmarks.bench_storage import make_rows
+
+# -------------------------
+# HELPERS
+# -------------------------
+def json_list(patient_id: str):
+    yield json.dumps(v2.get_patient_vitals(patient_id)).encode()
+
+def ndjson_stream(patient_id: str):
+    return v2.ndjson_chunks(v2.iter_history(patient_id)[0])
+
+def measure(body, patient_id: str) -> tuple:
+    """(ms to first chunk, ms to last chunk, peak MB) for one export."""
+    v2.history_cache.invalidate()
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    for _ in body(patient_id):
+        if first is None:
+            first = time.perf_counter()
+    end = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (first - start) * 1000, (end - start) * 1000, peak / 1e6
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000], help="readings exported")
+    args = parser.parse_args()
+
+    print(f"{'readings':>9} {'format':<7} {'first byte ms':>14} {'total ms':>9} {'peak MB':>8}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            v2.VITALS_FILE = Path(tmp) / "vitals.csv"
+            v2.MAPPING_FILE = Path(tmp) / "patient_mapping.csv"
+            patient_id, _ = v2.get_storage().get_or_create_patient("bench patient", "01/01/00")
+            v2.get_storage().append_many(make_rows(size, 1))
+            for label, body in (("json", json_list), ("ndjson", ndjson_stream)):
+                first, total, peak = measure(body, patient_id)
+                print(f"{size:>9} {label:<7} {first:>14.1f} {total:>9.1f} {peak:>8.1f}")
+
+if __name__ == "__main__":
+    main()
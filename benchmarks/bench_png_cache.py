@@ -0,0 +1,50 @@
+"""GET /trends/{patient_id}/png latency: rendering every time vs served from the PNG cache.
+
+Run from the repo root:
+    python -m benchmarks.bench_png_cache --readings 500 --repeats 50
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import v2_api.vitals_tracker_v2 as v2
+from benchmarks.bench_storage import make_rows, percentile
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=500, help="readings for the plotted patient")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        v2.VITALS_FILE = Path(tmp) / "vitals.csv"
+        v2.MAPPING_FILE = Path(tmp) / "patient_mapping.csv"
+        patient_id, _ = v2.get_storage().get_or_create_patient("bench patient", "01/01/00")
+        v2.get_storage().append_many(make_rows(args.readings, 1))
+
+        timings = {}
+        for label, clear in (("render (miss)", True), ("cached (hit)", False)):
+            samples = []
+            v2.get_trends(patient_id)  # warm-up, fills the cache
+            for _ in range(args.repeats):
+                if clear:
+                    v2.png_cache.clear()
+                start = time.perf_counter()
+                v2.get_trends(patient_id)
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[label] = samples
+
+    print(f"{args.readings} readings, {args.repeats} requests each; cache stats: {v2.png_cache.stats()}")
+    print(f"{'path':<16} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, samples in timings.items():
+        print(f"{label:<16} {percentile(samples, 50):>8.2f} {percentile(samples, 99):>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Trend chart rendering throughput with concurrent requests: pyplot (serialised) vs Figure/Agg templates.
+
+Run from the repo root:
+    python -m benchmarks.bench_render --threads 8 --renders 80 --readings 200
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+
+from benchmarks.bench_storage import make_rows, percentile
+from v2_api.rendering import render_trends_png
+from v2_api.series import VitalsSeries
+
+# -------------------------
+# BASELINE: THE OLD PYPLOT RENDERER
+# -------------------------
+_pyplot_lock = threading.Lock()  # pyplot's global figure state can't be shared between threads
+
+def render_pyplot(series) -> bytes:
+    with _pyplot_lock:
+        timestamps = series.datetimes()
+        plt.figure(figsize=(12, 6))
+        ax1 = plt.gca()
+        for vital in ["bp_systolic", "heart_rate", "respiratory_rate", "temperature", "oxygen_sats"]:
+            ax1.plot(timestamps, series.column(vital), marker='o', label=vital.replace("_", " ").title())
+        ax1.set_xlabel("Timestamp")
+        ax1.set_ylabel("Vital Values")
+        ax1.tick_params(axis='x', rotation=45)
+        ax2 = ax1.twinx()
+        ax2.plot(timestamps, series.news2_score, color='red', marker='x', linestyle='--', label="NEWS2 Score")
+        ax2.set_ylabel("NEWS2 Score", color='red')
+        lines_1, labels_1 = ax1.get_legend_handles_labels()
+        lines_2, labels_2 = ax2.get_legend_handles_labels()
+        ax1.legend(lines_1 + lines_2, labels_1 + labels_2, loc='upper left')
+        plt.title(f"Vital Trends for Patient {series.patient_id}")
+        plt.tight_layout()
+        ax1.xaxis.set_major_formatter(mdates.DateFormatter("%d-%b-%y %H:%M"))
+        buf = io.BytesIO()
+        plt.savefig(buf, format='png')
+        plt.close()
+        return buf.getvalue()
+
+# -------------------------
+# HELPERS
+# -------------------------
+def run(render, series_list: list, threads: int) -> tuple:
+    """Render every series with `threads` workers; return (renders/s, sorted latencies in ms)."""
+    def timed(series):
+        start = time.perf_counter()
+        render(series)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(timed, series_list[:threads]))  # warm-up (builds each thread's template)
+        start = time.perf_counter()
+        latencies = sorted(pool.map(timed, series_list))
+    return len(series_list) / (time.perf_counter() - start), latencies
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--renders", type=int, default=80)
+    parser.add_argument("--readings", type=int, default=200, help="readings per chart")
+    args = parser.parse_args()
+
+    rows = [{name: str(value) for name, value in row.items()} for row in make_rows(args.readings * 8, 8)]
+    series_list = [
+        VitalsSeries.from_rows(str(i % 8 + 1), [row for row in rows if row["patient_id"] == str(i % 8 + 1)])
+        for i in range(args.renders)
+    ]
+
+    print(f"{args.renders} charts of {args.readings} readings, {args.threads} threads")
+    print(f"{'renderer':<22} {'charts/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, render in (("pyplot (serialised)", render_pyplot), ("Figure/Agg template", render_trends_png)):
+        rate, latencies = run(render, series_list, args.threads)
+        print(f"{label:<22} {rate:>9.1f} {percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f}")
+
+if __name__ == "__main__":
+    main()
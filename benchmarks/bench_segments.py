@@ -0,0 +1,129 @@
+"""Segmented storage vs one vitals.csv: ingest, per-patient reads, compaction and ingest latency while it runs.
+
+Run from the repo root:
+    python -m benchmarks.bench_segments --rows 200000 --segment-kb 1024
+
+Patients are admitted in waves (each stays for --stay readings), as on a
+ward, so a patient's rows sit in a few segments of the whole log. The same
+rows are appended in groups of --batch to both backends; then lookups of
+random patients are timed, the segmented store is compacted (size on disk
+before/after), and appends are timed again with the compactor merging in
+the background to show how long ingest waits for it.
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.bench_storage import percentile
+from v2_api.segments import SegmentedStorage
+from v2_api.storage import CSVStorage
+from v2_api.vitals_tracker_v2 import CSVNAMES
+
+# -------------------------
+# HELPERS
+# -------------------------
+def ward_rows(n_rows: int, beds: int, stay: int, seed: int = 0) -> list:
+    """Readings from `beds` occupied beds; each patient is discharged after `stay` readings."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "patient_id": str((i // beds) // stay * beds + i % beds + 1),
+            "timestamp": (start + timedelta(minutes=15 * (i // beds))).isoformat(),
+            "news2_score": rng.randint(0, 12),
+            "bp_systolic": rng.randint(85, 180), "bp_diastolic": rng.randint(50, 100),
+            "heart_rate": rng.randint(45, 140), "respiratory_rate": rng.randint(10, 28),
+            "temperature": round(rng.uniform(35.0, 39.5), 1), "oxygen_sats": rng.randint(88, 100),
+            "loc": "Yes" if rng.random() < 0.95 else "No/Unsure",
+        }
+        for i in range(n_rows)
+    ]
+
+def disk_bytes(store: SegmentedStorage) -> int:
+    """Size of the segments in the manifest (files merged away but not yet deleted are left out)."""
+    manifest = store._current()
+    files = [segment["file"] for segment in manifest["segments"]] + [manifest["active"]["file"]]
+    return sum((store.directory / name).stat().st_size for name in files)
+
+def time_appends(store, rows: list, batch: int) -> list:
+    """Milliseconds per append_many of `batch` rows."""
+    latencies = []
+    for first in range(0, len(rows), batch):
+        start = time.perf_counter()
+        store.append_many(rows[first:first + batch])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def time_loads(store, patient_ids: list) -> list:
+    latencies = []
+    for patient_id in patient_ids:
+        start = time.perf_counter()
+        store.load(patient_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--beds", type=int, default=100)
+    parser.add_argument("--stay", type=int, default=48, help="readings per patient before discharge")
+    parser.add_argument("--segment-kb", type=int, default=1024)
+    parser.add_argument("--batch", type=int, default=100, help="rows per append_many")
+    parser.add_argument("--lookups", type=int, default=300)
+    args = parser.parse_args()
+
+    rows = ward_rows(args.rows, args.beds, args.stay)
+    n_patients = max(int(row["patient_id"]) for row in rows)
+    rng = random.Random(1)
+    lookups = [str(rng.randint(1, n_patients)) for _ in range(args.lookups)]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        stores = {
+            "csv": CSVStorage(tmp / "vitals.csv", tmp / "patient_mapping.csv", CSVNAMES),
+            "segmented": SegmentedStorage(tmp / "segments", tmp / "patient_mapping.csv", CSVNAMES,
+                                          segment_bytes=args.segment_kb * 1024),
+        }
+        print(f"{args.rows} rows, {n_patients} patients, {args.segment_kb} KB segments")
+        print(f"{'backend':<11} {'ingest rows/s':>14} {'load p50 ms':>12} {'load p99 ms':>12}")
+        for name, store in stores.items():
+            store.init()
+            start = time.perf_counter()
+            time_appends(store, rows, args.batch)
+            ingest = len(rows) / (time.perf_counter() - start)
+            store.load(lookups[0])  # builds the csv offset index
+            loads = sorted(time_loads(store, lookups))
+            print(f"{name:<11} {ingest:>14.0f} {percentile(loads, 50):>12.3f} {percentile(loads, 99):>12.3f}")
+
+        segmented = stores["segmented"]
+        before = disk_bytes(segmented)
+        start = time.perf_counter()
+        segmented.compact()
+        compact_s = time.perf_counter() - start
+        after = disk_bytes(segmented)
+        loads = sorted(time_loads(segmented, lookups))
+        print(f"\ncompaction: {compact_s:.2f}s, {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB, "
+              f"{len(segmented._current()['segments'])} sealed segments")
+        print(f"segmented after compaction: load p50 {percentile(loads, 50):.3f} ms, p99 {percentile(loads, 99):.3f} ms")
+
+        more = ward_rows(args.rows, args.beds, args.stay, seed=2)
+        print(f"\n{'compactor':<11} {'append p50 ms':>14} {'append p99 ms':>14} {'append max ms':>14}")
+        for running in (False, True):
+            chunk = more[:len(more) // 2] if not running else more[len(more) // 2:]
+            if running:
+                segmented.start_compactor(interval=0.05)
+            latencies = sorted(time_appends(segmented, chunk, args.batch))
+            segmented.stop_compactor()
+            print(f"{'on' if running else 'off':<11} {percentile(latencies, 50):>14.3f} "
+                  f"{percentile(latencies, 99):>14.3f} {latencies[-1]:>14.3f}")
+
+if __name__ == "__main__":
+    main()
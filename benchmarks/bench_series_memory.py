@@ -0,0 +1,69 @@
+"""Memory and parse cost of list-of-dict readings vs a column-oriented VitalsSeries.
+
+Run from the repo root:
+    python -m benchmarks.bench_series_memory --rows 1000000
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import csv
+import gc
+import io
+import time
+import tracemalloc
+
+from benchmarks.bench_storage import make_rows
+from v2_api.series import VITAL_COLUMNS, VitalsSeries
+from v2_api.vitals_tracker_v2 import CSVNAMES
+
+# -------------------------
+# HELPERS
+# -------------------------
+def measure(build):
+    """Return (result, peak bytes retained by the result, seconds to build)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+def csv_text(n_rows: int) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CSVNAMES)
+    writer.writeheader()
+    writer.writerows(dict(row, patient_id="1") for row in make_rows(n_rows, 1))
+    return buf.getvalue()
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    text = csv_text(args.rows)
+    rows, dict_bytes, dict_s = measure(lambda: list(csv.DictReader(io.StringIO(text))))
+    series, series_bytes, series_s = measure(lambda: VitalsSeries.from_rows("1", csv.DictReader(io.StringIO(text))))
+
+    # What plotting does afterwards: pull every numeric vital out as numbers
+    start = time.perf_counter()
+    for name in VITAL_COLUMNS:
+        [float(r[name]) for r in rows]
+    dict_extract_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for name in VITAL_COLUMNS:
+        series.column(name)
+    series_extract_s = time.perf_counter() - start
+
+    print(f"{args.rows} readings")
+    print(f"{'layout':<14} {'retained MB':>12} {'bytes/reading':>14} {'load s':>8} {'extract s':>10}")
+    print(f"{'list of dicts':<14} {dict_bytes / 1e6:>12.1f} {dict_bytes / args.rows:>14.0f} {dict_s:>8.2f} {dict_extract_s:>10.3f}")
+    print(f"{'VitalsSeries':<14} {series_bytes / 1e6:>12.1f} {series_bytes / args.rows:>14.0f} {series_s:>8.2f} {series_extract_s:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare the CSV and SQLite storage backends on ingest rate and lookup latency.
+
+Run from the repo root:
+    python -m benchmarks.bench_storage --rows 20000 --patients 500
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from v2_api.storage import CSVStorage, SQLiteStorage
+from v2_api.vitals_tracker_v2 import CSVNAMES
+
+# -------------------------
+# HELPERS
+# -------------------------
+def make_rows(n_rows: int, n_patients: int, seed: int = 0) -> list:
+    """Synthetic readings spread evenly over n_patients, 15 minutes apart."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "patient_id": str(i % n_patients + 1),
+            "timestamp": (start + timedelta(minutes=15 * (i // n_patients))).isoformat(),
+            "news2_score": rng.randint(0, 12),
+            "bp_systolic": rng.randint(85, 180), "bp_diastolic": rng.randint(50, 100),
+            "heart_rate": rng.randint(45, 140), "respiratory_rate": rng.randint(10, 28),
+            "temperature": round(rng.uniform(35.0, 39.5), 1), "oxygen_sats": rng.randint(88, 100),
+            "loc": "Yes" if rng.random() < 0.95 else "No/Unsure",
+        }
+        for i in range(n_rows)
+    ]
+
+def percentile(samples: list, pct: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+def bench_backend(store, rows: list, n_patients: int, lookups: int) -> dict:
+    for i in range(1, n_patients + 1):
+        store.get_or_create_patient(f"patient {i}", "01/01/00")
+
+    start = time.perf_counter()
+    for row in rows:
+        store.append(row)  # one reading per call, as POST /add_vitals/ does
+    ingest_s = time.perf_counter() - start
+
+    rng = random.Random(1)
+    latencies = []
+    for _ in range(lookups):
+        patient_id = str(rng.randint(1, n_patients))
+        t0 = time.perf_counter()
+        store.load(patient_id)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return {
+        "ingest_rows_per_s": len(rows) / ingest_s,
+        "lookup_p50_ms": statistics.median(latencies),
+        "lookup_p99_ms": percentile(latencies, 99),
+    }
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--patients", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=500)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.patients)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        backends = {
+            "csv": CSVStorage(tmp / "vitals.csv", tmp / "patient_mapping.csv", CSVNAMES),
+            "sqlite": SQLiteStorage(tmp / "vitals.db", CSVNAMES),
+        }
+        print(f"{args.rows} readings, {args.patients} patients, {args.lookups} lookups")
+        print(f"{'backend':<8} {'ingest rows/s':>14} {'lookup p50 ms':>14} {'lookup p99 ms':>14}")
+        for name, store in backends.items():
+            result = bench_backend(store, rows, args.patients, args.lookups)
+            print(f"{name:<8} {result['ingest_rows_per_s']:>14.0f} "
+                  f"{result['lookup_p50_ms']:>14.3f} {result['lookup_p99_ms']:>14.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Microbenchmarks of the scoring, parsing and storage hot paths, compared against a stored baseline.
+
+Run from the repo root:
+    python -m benchmarks.bench_suite                              # default sizes, compare to the baseline
+    python -m benchmarks.bench_suite --sizes 1000 100000 10000000 --cases load_from_csv save_to_csv
+    python -m benchmarks.bench_suite --save-baseline              # record this machine's numbers
+    python -m benchmarks.bench_suite --check                      # exit 1 on any regression
+
+Every case reports nanoseconds per operation at each size. For the pure
+functions the size is the number of calls; for storage it is the number of
+readings already stored (10 per patient), so the numbers show how each path
+scales as vitals.csv grows. Input comes from benchmarks/synthetic.py.
+Results are written as JSON (--output) and any case slower than the
+baseline by more than --tolerance is flagged. Timings only compare on the
+same machine, so record a baseline (--save-baseline) where you compare.
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import gc
+import itertools
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import v2_api.vitals_tracker_v2 as v2
+from benchmarks.synthetic import iter_readings, iter_vitals
+
+# -------------------------
+# GLOBALS
+# -------------------------
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+RESULTS_FILE = Path(__file__).parent / "results.json"
+POOL_SIZE = 100_000       # distinct inputs for the pure-function cases (cycled for larger sizes)
+READINGS_PER_PATIENT = 10
+FILL_CHUNK = 50_000       # rows per append_many while filling storage
+STORAGE_OPS = 200         # timed loads / appends / patient lookups per storage case
+RENDERS = 5
+MIN_SECONDS = 0.5         # keep re-running a case until this much time has been measured...
+MAX_RUNS = 50             # ...or it has run this many times
+
+# -------------------------
+# HELPERS
+# -------------------------
+def best_of(repeats: int, run) -> float:
+    """Fastest call to run(), in seconds, with the GC off (as timeit does).
+
+    run() is called at least `repeats` times, and more (up to MAX_RUNS) until
+    MIN_SECONDS have been spent, so that short cases aren't all noise.
+    """
+    best, spent, runs = None, 0.0, 0
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while runs < repeats or (spent < MIN_SECONDS and runs < MAX_RUNS):
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            spent += elapsed
+            runs += 1
+    finally:
+        if enabled:
+            gc.enable()
+    return best
+
+def use_storage(directory: Path, size: int):
+    """Point the core module at fresh files in `directory`, holding `size` readings over size/10 patients."""
+    v2.VITALS_FILE = directory / "vitals.csv"
+    v2.MAPPING_FILE = directory / "patient_mapping.csv"
+    store = v2.init_storage()
+    n_patients = max(1, size // READINGS_PER_PATIENT)
+    for first in range(0, n_patients, FILL_CHUNK):
+        store.get_or_create_patients(
+            (f"patient {i}", "01/01/00") for i in range(first + 1, min(n_patients, first + FILL_CHUNK) + 1)
+        )
+    readings = iter_readings(size, n_patients)
+    while True:
+        chunk = list(itertools.islice(readings, FILL_CHUNK))
+        if not chunk:
+            break
+        store.append_many(chunk)
+    return store, n_patients
+
+# -------------------------
+# CASES: (size, scratch directory, repeats) -> ns per operation
+# -------------------------
+def bench_check_alert(size, directory, repeats):
+    values = []
+    for vitals in itertools.islice(iter_vitals(min(size, POOL_SIZE)), max(1, min(size, POOL_SIZE) // 6)):
+        values += [("bp_systolic", vitals["Blood pressure"]["systolic"])]
+        values += [(vital, vitals[vital]) for vital in v2.REQUIRED_KEYS[1:]]
+    calls = list(itertools.islice(itertools.cycle(values), size))
+    check_alert = v2.check_alert
+    return best_of(repeats, lambda: [check_alert(vital, value) for vital, value in calls]) / size * 1e9
+
+def bench_compute_news2_score(size, directory, repeats):
+    calls = list(itertools.islice(itertools.cycle(list(iter_vitals(min(size, POOL_SIZE)))), size))
+    compute = v2.compute_news2_score
+    return best_of(repeats, lambda: [compute(vitals) for vitals in calls]) / size * 1e9
+
+def bench_flatten_vitals(size, directory, repeats):
+    calls = list(itertools.islice(itertools.cycle(list(iter_vitals(min(size, POOL_SIZE)))), size))
+    flatten = v2.flatten_vitals
+    return best_of(repeats, lambda: [flatten(vitals) for vitals in calls]) / size * 1e9
+
+def bench_save_to_csv(size, directory, repeats):
+    _, n_patients = use_storage(directory, size)
+    rows = iter(list(iter_readings(STORAGE_OPS * MAX_RUNS, n_patients, seed=1, start=datetime(2030, 1, 1))))
+    # every run appends new readings; the few thousand extra rows barely change the stored size
+    return best_of(repeats, lambda: [v2.save_to_csv(next(rows)) for _ in range(STORAGE_OPS)]) / STORAGE_OPS * 1e9
+
+def bench_load_from_csv(size, directory, repeats):
+    _, n_patients = use_storage(directory, size)
+    rng = random.Random(2)
+    patient_ids = [str(rng.randint(1, n_patients)) for _ in range(STORAGE_OPS)]
+    v2.load_from_csv(patient_ids[0])  # the first call builds the offset index
+    return best_of(repeats, lambda: [v2.load_from_csv(pid) for pid in patient_ids]) / len(patient_ids) * 1e9
+
+def bench_get_or_create_patient_id(size, directory, repeats):
+    _, n_patients = use_storage(directory, size)
+    rng = random.Random(3)
+    existing = [f"patient {rng.randint(1, n_patients)}" for _ in range(STORAGE_OPS)]
+    v2.get_or_create_patient_id(existing[0], "01/01/00")  # the first call loads the mapping
+    return best_of(repeats, lambda: [v2.get_or_create_patient_id(name, "01/01/00") for name in existing]) \
+        / len(existing) * 1e9
+
+def bench_render_png(size, directory, repeats):
+    """One patient with `size` readings, downsampled and rendered as GET /trends/{id}/png does."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from v2_api.downsample import downsample
+    from v2_api.rendering import render_trends_png
+    from v2_api.series import VitalsSeries
+
+    rows = ({name: str(value) for name, value in row.items()} for row in iter_readings(size, 1))
+    series = VitalsSeries.from_rows("1", rows)
+    render_trends_png(downsample(series, v2.PLOT_MAX_POINTS))  # warm-up: builds the figure template
+    run = lambda: [render_trends_png(downsample(series, v2.PLOT_MAX_POINTS)) for _ in range(RENDERS)]
+    return best_of(repeats, run) / RENDERS * 1e9
+
+CASES = {
+    "check_alert": bench_check_alert,
+    "compute_news2_score": bench_compute_news2_score,
+    "flatten_vitals": bench_flatten_vitals,
+    "save_to_csv": bench_save_to_csv,
+    "load_from_csv": bench_load_from_csv,
+    "get_or_create_patient_id": bench_get_or_create_patient_id,
+    "render_png": bench_render_png,
+}
+
+# -------------------------
+# BASELINE COMPARISON
+# -------------------------
+def compare(results: dict, baseline: dict) -> list:
+    """[(case, size, ns, baseline ns, ratio)] for every result that has a baseline."""
+    rows = []
+    for case, by_size in results.items():
+        for size, ns in by_size.items():
+            base = baseline.get(case, {}).get(size)
+            if base:
+                rows.append((case, size, ns, base, ns / base))
+    return rows
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE, help="where to write this run's JSON")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="flag cases more than this fraction slower than the baseline (0.5 = 1.5x)")
+    parser.add_argument("--save-baseline", action="store_true", help="also write this run as the baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any case regressed")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'case':<26} {'size':>10} {'ns/op':>14}")
+    for case in args.cases:
+        results[case] = {}
+        for size in args.sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                ns = CASES[case](size, Path(tmp), args.repeats)
+            results[case][str(size)] = round(ns, 1)
+            print(f"{case:<26} {size:>10} {ns:>14.1f}")
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "unit": "ns/op",
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nresults written to {args.output}")
+
+    regressions = []
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        print(f"\nvs {args.baseline} ({baseline.get('machine')}, Python {baseline.get('python')}, {baseline.get('created')})")
+        print(f"{'case':<26} {'size':>10} {'ns/op':>14} {'baseline':>14} {'ratio':>7}")
+        for case, size, ns, base, ratio in compare(results, baseline["results"]):
+            status = "  REGRESSION" if ratio > 1 + args.tolerance else ""
+            print(f"{case:<26} {size:>10} {ns:>14.1f} {base:>14.1f} {ratio:>6.2f}x{status}")
+            if status:
+                regressions.append((case, size))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nbaseline saved to {args.baseline}")
+    if args.check and regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
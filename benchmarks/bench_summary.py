@@ -0,0 +1,66 @@
+"""GET /trends/{patient_id}/summary latency as history grows: recompute from the full history vs running aggregates.
+
+Run from the repo root:
+    python -m benchmarks.bench_summary --sizes 1000 10000 50000 --repeats 50
+
+Each running-aggregate read follows one newly appended reading, so it
+includes folding that row in.
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import v2_api.vitals_tracker_v2 as v2
+from benchmarks.bench_storage import make_rows, percentile
+from v2_api.series import to_micros
+from v2_api.summary import PatientSummary
+
+# -------------------------
+# HELPERS
+# -------------------------
+def recompute(patient_id: str) -> dict:
+    """The old way: load every reading and aggregate from scratch."""
+    summary = PatientSummary(patient_id, v2.SUMMARY_WINDOW_HOURS)
+    for row in sorted(v2.load_from_csv(patient_id), key=lambda row: to_micros(row["timestamp"])):
+        summary.add_row(row)
+    return summary.to_dict()
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="readings in the history")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'readings':>9} {'recompute p50 ms':>17} {'running p50 ms':>15} {'running p99 ms':>15}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            v2.VITALS_FILE = Path(tmp) / "vitals.csv"
+            v2.MAPPING_FILE = Path(tmp) / "patient_mapping.csv"
+            store = v2.init_storage()
+            patient_id, _ = store.get_or_create_patient("bench patient", "01/01/00")
+            rows = make_rows(size + args.repeats, 1)
+            store.append_many(rows[:size])
+            v2.summaries.rebuild(store)  # app startup
+
+            slow = []
+            for _ in range(max(1, args.repeats // 10)):
+                start = time.perf_counter()
+                recompute(patient_id)
+                slow.append((time.perf_counter() - start) * 1000)
+            fast = []
+            for row in rows[size:]:
+                store.append(row)
+                start = time.perf_counter()
+                v2.get_trends_summary(patient_id)
+                fast.append((time.perf_counter() - start) * 1000)
+        print(f"{size:>9} {percentile(slow, 50):>17.2f} {percentile(fast, 50):>15.3f} {percentile(fast, 99):>15.3f}")
+
+if __name__ == "__main__":
+    main()
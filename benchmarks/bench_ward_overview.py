@@ -0,0 +1,74 @@
+"""GET /ward/overview latency as the ward grows: full scan of every reading vs the incrementally ranked board.
+
+Run from the repo root:
+    python -m benchmarks.bench_ward_overview --patients 1000 10000 100000 --readings-per-patient 3 --repeats 20
+
+Each board read follows one newly appended reading, so it includes
+picking that row up from the storage tail.
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import heapq
+import tempfile
+import time
+from pathlib import Path
+
+import v2_api.vitals_tracker_v2 as v2
+from benchmarks.bench_storage import make_rows, percentile
+from v2_api.series import to_micros
+
+# -------------------------
+# HELPERS
+# -------------------------
+def full_scan(store, n: int) -> list:
+    """The old way: read every row, keep each patient's latest, then rank."""
+    latest = {}
+    for row in store.iter_all_rows():
+        micros = to_micros(row["timestamp"])
+        if row["patient_id"] not in latest or latest[row["patient_id"]][1] <= micros:
+            latest[row["patient_id"]] = (int(row["news2_score"]), micros, row)
+    return [row for _, _, row in heapq.nlargest(n, latest.values(), key=lambda item: item[:2])]
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--patients", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--readings-per-patient", type=int, default=3)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"top {args.top}, {args.readings_per_patient} readings per patient")
+    print(f"{'patients':>9} {'full scan p50 ms':>17} {'board p50 ms':>13} {'board p99 ms':>13} {'startup ms':>11}")
+    for n_patients in args.patients:
+        with tempfile.TemporaryDirectory() as tmp:
+            v2.VITALS_FILE = Path(tmp) / "vitals.csv"
+            v2.MAPPING_FILE = Path(tmp) / "patient_mapping.csv"
+            store = v2.init_storage()
+            size = n_patients * args.readings_per_patient
+            rows = make_rows(size + args.repeats, n_patients)
+            store.append_many(rows[:size])
+            start = time.perf_counter()
+            v2.ward_board.refresh(store)  # app startup
+            startup = (time.perf_counter() - start) * 1000
+
+            slow = []
+            for _ in range(max(1, args.repeats // 10)):
+                start = time.perf_counter()
+                full_scan(store, args.top)
+                slow.append((time.perf_counter() - start) * 1000)
+            fast = []
+            for row in rows[size:]:
+                store.append(row)
+                start = time.perf_counter()
+                v2.get_ward_overview(args.top)
+                fast.append((time.perf_counter() - start) * 1000)
+        print(f"{n_patients:>9} {percentile(slow, 50):>17.2f} {percentile(fast, 50):>13.3f} "
+              f"{percentile(fast, 99):>13.3f} {startup:>11.1f}")
+
+if __name__ == "__main__":
+    main()
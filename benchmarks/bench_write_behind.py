@@ -0,0 +1,109 @@
+"""POST /add_vitals/ latency (p50/p99) under concurrent load: direct appends vs the write-behind queue.
+
+Run from the repo root:
+    python -m benchmarks.bench_write_behind --requests 2000 --concurrency 16
+    python -m benchmarks.bench_write_behind --fsync-ms 0     # fsync every group
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+from benchmarks.bench_batch_ingest import make_payloads
+from benchmarks.bench_storage import percentile
+
+# -------------------------
+# HELPERS
+# -------------------------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+# The server runs in its own process (so client threads don't share its GIL),
+# with the data files pointed at a scratch directory
+SERVER = """
+import sys, uvicorn
+from pathlib import Path
+import v2_api.vitals_tracker_v2 as v2
+tmp = Path(sys.argv[1])
+v2.VITALS_FILE, v2.MAPPING_FILE, v2.DB_FILE = tmp / "vitals.csv", tmp / "patient_mapping.csv", tmp / "vitals.db"
+uvicorn.run("v2_api.app:app", host="127.0.0.1", port=int(sys.argv[2]), log_level="warning")
+"""
+
+def start_server(tmp: Path, port: int, env: dict) -> subprocess.Popen:
+    proc = subprocess.Popen([sys.executable, "-c", SERVER, str(tmp), str(port)], env={**os.environ, **env})
+    while True:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.05)
+
+def run_load(base_url: str, payloads: list, concurrency: int) -> tuple:
+    """Fire every payload with `concurrency` clients; return (sorted latencies in ms, wall seconds)."""
+    local = threading.local()
+
+    def post(p):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = httpx.Client(base_url=base_url)
+        start = time.perf_counter()
+        response = client.post("/add_vitals/", params={"patient_name": p["patient_name"], "dob": p["dob"]},
+                               json=p["vitals"])
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = sorted(pool.map(post, payloads))
+    return latencies, time.perf_counter() - start
+
+# -------------------------
+# MAIN
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--patients", type=int, default=200)
+    parser.add_argument("--storage", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--fsync-ms", type=int, default=None, help="write-behind fsync interval (default: never)")
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.requests, args.patients)
+    results = {}
+    for mode in ("direct", "write-behind"):
+        env = {"VITALS_STORAGE": args.storage, "VITALS_WRITE_BEHIND": "1" if mode == "write-behind" else "0"}
+        if args.fsync_ms is not None:
+            env["VITALS_FSYNC_MS"] = str(args.fsync_ms)
+        with tempfile.TemporaryDirectory() as tmp:
+            port = free_port()
+            server = start_server(Path(tmp), port, env)
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                run_load(base_url, payloads[:50], args.concurrency)  # warm-up
+                results[mode] = run_load(base_url, payloads, args.concurrency)
+            finally:
+                server.terminate()  # SIGTERM: uvicorn shuts down and the queue is drained
+                server.wait()
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, storage {args.storage}, fsync_ms {args.fsync_ms}")
+    print(f"{'mode':<14} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for mode, (latencies, wall) in results.items():
+        print(f"{mode:<14} {percentile(latencies, 50):>8.2f} {percentile(latencies, 99):>8.2f} "
+              f"{len(latencies) / wall:>8.0f}")
+
+if __name__ == "__main__":
+    main()
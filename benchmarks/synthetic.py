@@ -0,0 +1,80 @@
+"""Synthetic vitals with ward-like distributions, for benchmarks at 1e3 to 1e7 rows.
+
+Each patient gets a fixed clinical profile (most are stable, some unwell,
+a few critical); readings are drawn around that profile's means and
+clamped to physiological limits, so the alert levels and NEWS2 totals look
+like a real ward's rather than uniform noise. Everything is a generator,
+so ten million rows never sit in memory at once.
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import random
+from datetime import datetime, timedelta
+
+from v2_api.vitals_tracker_v2 import compute_news2_score, flatten_vitals
+
+# -------------------------
+# GLOBALS
+# -------------------------
+# profile -> {vital: (mean, standard deviation)}, plus the chance that the patient is not fully alert
+PROFILES = {
+    "stable": {"hr": (78, 10), "sbp": (125, 14), "dbp": (76, 9), "rr": (15, 2), "temp": (36.8, 0.35),
+               "spo2": (97.5, 1.2), "loc_no": 0.005},
+    "unwell": {"hr": (100, 14), "sbp": (112, 16), "dbp": (68, 10), "rr": (21, 3), "temp": (38.2, 0.6),
+               "spo2": (94.5, 1.8), "loc_no": 0.03},
+    "critical": {"hr": (122, 18), "sbp": (95, 18), "dbp": (58, 10), "rr": (26, 4), "temp": (38.9, 0.9),
+                 "spo2": (90.5, 3.0), "loc_no": 0.2},
+}
+PROFILE_PERCENT = [("stable", 80), ("unwell", 15), ("critical", 5)]
+
+# physiological limits readings are clamped to
+LIMITS = {"hr": (30, 200), "sbp": (60, 240), "dbp": (30, 130), "rr": (5, 45), "temp": (33.0, 42.0), "spo2": (70, 100)}
+
+# -------------------------
+# GENERATORS
+# -------------------------
+def profile_for(patient_number: int) -> dict:
+    """The fixed profile of patient `patient_number` (spread evenly, no per-patient state)."""
+    bucket = patient_number * 37 % 100
+    for name, percent in PROFILE_PERCENT:
+        if bucket < percent:
+            return PROFILES[name]
+        bucket -= percent
+    return PROFILES["stable"]
+
+def _draw(rng: random.Random, profile: dict, vital: str, digits: int = 0):
+    low, high = LIMITS[vital]
+    value = min(high, max(low, rng.gauss(*profile[vital])))
+    return round(value, digits) if digits else int(round(value))
+
+def random_vitals(rng: random.Random, profile: dict) -> dict:
+    """One reading in the nested shape POST /add_vitals/ takes."""
+    return {
+        "Blood pressure": {"systolic": _draw(rng, profile, "sbp"), "diastolic": _draw(rng, profile, "dbp")},
+        "Heart rate": _draw(rng, profile, "hr"),
+        "Respiratory rate": _draw(rng, profile, "rr"),
+        "Temperature": _draw(rng, profile, "temp", 1),
+        "Oxygen saturations": _draw(rng, profile, "spo2"),
+        "Level of consciousness (fully awake and responsive?)": "No/Unsure" if rng.random() < profile["loc_no"] else "Yes",
+    }
+
+def iter_vitals(n: int, seed: int = 0):
+    """n nested vitals dicts, cycling through 100 patients' profiles."""
+    rng = random.Random(seed)
+    for i in range(n):
+        yield random_vitals(rng, profile_for(i % 100))
+
+def iter_readings(n_rows: int, n_patients: int, seed: int = 0, start: datetime = datetime(2025, 1, 1)):
+    """n_rows stored rows (flat columns with NEWS2), round-robin over n_patients, 15 minutes apart."""
+    rng = random.Random(seed)
+    for i in range(n_rows):
+        patient_number = i % n_patients
+        vitals = random_vitals(rng, profile_for(patient_number))
+        row = {
+            "patient_id": str(patient_number + 1),
+            "timestamp": (start + timedelta(minutes=15 * (i // n_patients))).isoformat(),
+            "news2_score": compute_news2_score(vitals),
+        }
+        row.update(flatten_vitals(vitals))
+        yield row
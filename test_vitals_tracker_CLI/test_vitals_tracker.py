@@ -7,6 +7,7 @@ from vitals_tracker import (
     get_alert_message,
     flatten_vitals,
     get_or_create_patient_id,
+    find_patient_id,
     save_to_csv,
     load_from_csv,
     print_patient_vitals,
@@ -132,4 +133,61 @@ def test_ascii_and_matplotlib(monkeypatch):
     from vitals_tracker import plot_ascii, plot_matplotlib
     # just run functions to ensure no crash
     plot_ascii("1")
-    plot_matplotlib("1")
\ No newline at end of file
+    plot_matplotlib("1")
+def test_patient_index_sees_external_appends(monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda prompt: "Test Patient" if "name" in prompt else "01/01/00")
+    assert get_or_create_patient_id() == "1"
+    assert get_or_create_patient_id() == "1"  # served from the index, no new row
+    # Another process appends a patient behind the index's back
+    with open(TEST_MAPPING, "a", newline="") as f:
+        f.write("7,other patient,02/02/02\n")
+    monkeypatch.setattr("builtins.input", lambda prompt: "Other Patient" if "name" in prompt else "02/02/02")
+    assert find_patient_id() == "7"
+    monkeypatch.setattr("builtins.input", lambda prompt: "New Patient" if "name" in prompt else "03/03/03")
+    assert get_or_create_patient_id() == "8"
+
+def test_vitals_index_tracks_appends_and_rebuilds(monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda prompt: "Test Patient" if "name" in prompt else "01/01/00")
+    vitals = {
+        "Blood pressure": {"systolic": 120, "diastolic": 80},
+        "Heart rate": 75,
+        "Respiratory rate": 16,
+        "Temperature": 37.0,
+        "Oxygen saturations": 98,
+        "Level of consciousness (fully awake and responsive?)": "Yes"
+    }
+    save_to_csv(vitals, total_score=0, filename=TEST_CSV)
+    # Rows appended by another writer are picked up from the file tail
+    with open(TEST_CSV, "a", newline="") as f:
+        f.write("2,2025-01-01T00:00:00,3,95,70,100,22,38.5,94,Yes\r\n")
+    save_to_csv(vitals, total_score=1, filename=TEST_CSV)
+    assert [r["news2_score"] for r in load_from_csv("1", filename=TEST_CSV)] == ["0", "1"]
+    assert load_from_csv("2", filename=TEST_CSV)[0]["temperature"] == "38.5"
+    # A missing sidecar is rebuilt from the data file
+    os.remove(TEST_CSV + ".idx")
+    from v2_api.vitals_index import VitalsIndex
+    from vitals_tracker import CSVNAMES
+    fresh = VitalsIndex(TEST_CSV, CSVNAMES)
+    assert [r["news2_score"] for r in fresh.load("1")] == ["0", "1"]
+    assert os.path.exists(TEST_CSV + ".idx")
+
+def test_ascii_plot_fits_the_terminal_height(monkeypatch, capsys):
+    monkeypatch.setattr("builtins.input", lambda prompt: "Test Patient" if "name" in prompt else "01/01/00")
+    vitals = {
+        "Blood pressure": {"systolic": 120, "diastolic": 80},
+        "Heart rate": 75,
+        "Respiratory rate": 16,
+        "Temperature": 37.0,
+        "Oxygen saturations": 98,
+        "Level of consciousness (fully awake and responsive?)": "Yes"
+    }
+    for _ in range(40):
+        save_to_csv(vitals, total_score=0, filename=TEST_CSV)
+    import vitals_tracker
+    load_series = vitals_tracker.load_series
+    monkeypatch.setattr("vitals_tracker.load_series", lambda patient_id: load_series(patient_id, TEST_CSV))
+    monkeypatch.setattr("shutil.get_terminal_size", lambda fallback=(80, 24): os.terminal_size((200, 32)))
+    plot_ascii("1")
+    out = capsys.readouterr().out
+    bars = [line for line in out.splitlines() if line.startswith("20")]
+    assert 0 < len(bars) // 7 <= (32 - 2) // 3  # readings per vital, however wide the terminal is
@@ -0,0 +1,141 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+# asyncio is imported in the coroutines: publishing happens in the core module, which starts without it
+import itertools
+import json
+import threading
+from collections import deque
+
+# -------------------------
+# PUB/SUB FAN-OUT
+# -------------------------
+class Subscription:
+    """One listener's filter and bounded event buffer.
+
+    The buffer keeps the newest `maxsize` events: when a slow client falls
+    behind, the oldest are dropped (and counted) instead of making the
+    publisher wait. Events are offered from request threads and read by
+    the subscriber's event loop, which is woken with call_soon_threadsafe.
+    """
+
+    def __init__(self, maxsize: int, min_score: int, levels):
+        self.min_score = min_score
+        self.levels = frozenset(levels)
+        self.dropped = 0
+        self._events = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+        self._loop = None   # set by wait(): the loop serving this subscriber
+        self._ready = None  # asyncio.Event on that loop
+
+    def matches(self, event: dict) -> bool:
+        return event["total_news2_score"] >= self.min_score or not self.levels.isdisjoint(event["levels"].values())
+
+    def offer(self, event: dict):
+        """Buffer `event` (publisher side; never blocks)."""
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            loop, ready = self._loop, self._ready
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:  # loop already closed: the client is gone
+                pass
+
+    def drain(self) -> tuple:
+        """(buffered events, events dropped since the last drain)."""
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            dropped, self.dropped = self.dropped, 0
+        return events, dropped
+
+    async def wait(self, timeout: float) -> tuple:
+        """drain(), waiting up to `timeout` seconds for something to arrive."""
+        import asyncio
+
+        if self._ready is None:
+            with self._lock:
+                self._loop, self._ready = asyncio.get_running_loop(), asyncio.Event()
+        self._ready.clear()
+        events, dropped = self.drain()
+        if events or dropped:
+            return events, dropped
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.drain()
+
+
+class AlertBroker:
+    """In-process fan-out of alert events to every matching subscriber."""
+
+    def __init__(self, min_score: int, levels, buffer_size: int = 100):
+        self.min_score = min_score        # defaults for subscribers that don't choose
+        self.levels = tuple(levels)
+        self.buffer_size = buffer_size
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    def subscribe(self, min_score: int = None, levels=None, buffer_size: int = None) -> Subscription:
+        subscription = Subscription(
+            buffer_size or self.buffer_size,
+            self.min_score if min_score is None else min_score,
+            self.levels if levels is None else levels,
+        )
+        with self._lock:
+            self._subscribers = self._subscribers + [subscription]  # copy-on-write: publish reads without the lock
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscription]
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def publish(self, event: dict) -> int:
+        """Give `event` an id and offer it to every matching subscriber; returns how many."""
+        subscribers = self._subscribers
+        if not subscribers:
+            return 0
+        event = dict(event, id=next(self._ids))
+        delivered = 0
+        for subscription in subscribers:
+            if subscription.matches(event):
+                subscription.offer(event)
+                delivered += 1
+        self.published += 1
+        return delivered
+
+# -------------------------
+# SERVER-SENT EVENTS
+# -------------------------
+def format_sse(event: str, data: dict, event_id=None) -> str:
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines += [f"event: {event}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+async def sse_stream(broker: AlertBroker, subscription: Subscription, is_disconnected, keepalive: float = 15.0):
+    """SSE text for one subscriber until `is_disconnected()` says the client has gone.
+
+    "alert" events carry the reading; "dropped" reports how many alerts this
+    client missed by falling behind; a comment line is sent as a keep-alive.
+    """
+    try:
+        yield ": connected\n\n"
+        while not await is_disconnected():
+            events, dropped = await subscription.wait(keepalive)
+            if dropped:
+                yield format_sse("dropped", {"count": dropped})
+            for event in events:
+                yield format_sse("alert", event, event["id"])
+            if not events and not dropped:
+                yield ": keep-alive\n\n"
+    finally:
+        broker.unsubscribe(subscription)
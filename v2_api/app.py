@@ -1,37 +1,78 @@
 # -------------------------
 # IMPORTS
 # -------------------------
-from fastapi import FastAPI
-from fastapi.responses import Response
-from pydantic import BaseModel, Field
-from typing import Optional
+import inspect
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+from datetime import datetime
 
+from v2_api.alerts import sse_stream
+from v2_api.metrics import MetricsMiddleware, metrics
 from v2_api.vitals_tracker_v2 import (
     add_vitals,
+    alert_broker,
+    add_vitals_batch,
+    export_dataset,
+    get_metrics_text,
     get_patient_vitals,
     get_trends,
-    get_trends_json
+    get_trends_json,
+    get_trends_summary,
+    get_ward_overview,
+    INT_VITAL_MAX,
+    init_storage,
+    query_history,
+    start_compactor,
+    stop_compactors,
+    stop_writers,
+    stream_history
 )
 import json  # <-- needed for json.dumps
 
 # -------------------------
 # FASTAPI APP INSTANCE
 # -------------------------
-app = FastAPI(title="Clinically-Informed Vitals Tracker API v2")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_storage()  # create the data files/tables here rather than as an import side effect
+    start_compactor()  # segmented storage only: merge and gzip sealed segments in the background
+    yield
+    stop_writers()  # graceful shutdown: write everything still queued
+    stop_compactors()
+
+class ProfiledRoute(APIRoute):
+    """Routes whose (sync) endpoint can be sampled by cProfile (VITALS_PROFILE_RATE).
+
+    Sync endpoints run in a worker thread, so the profiler has to be started
+    there, around the endpoint itself, rather than in a middleware.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = metrics.profiled(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+app = FastAPI(title="Clinically-Informed Vitals Tracker API v2", lifespan=lifespan)
+app.router.route_class = ProfiledRoute
+app.add_middleware(MetricsMiddleware, metrics=metrics)  # request counts and latency per route, for GET /metrics
 
 # -------------------------
 # Pydantic Models
 # -------------------------
 class BloodPressure(BaseModel):
-    systolic: int = Field(..., example=120)
-    diastolic: int = Field(..., example=80)
+    systolic: int = Field(..., ge=0, le=INT_VITAL_MAX, example=120)
+    diastolic: int = Field(..., ge=0, le=INT_VITAL_MAX, example=80)
 
 class VitalsInput(BaseModel):
     Blood_pressure: BloodPressure = Field(..., alias="Blood pressure")
-    Heart_rate: int = Field(..., alias="Heart rate", example=75)
-    Respiratory_rate: int = Field(..., alias="Respiratory rate", example=18)
+    Heart_rate: int = Field(..., alias="Heart rate", ge=0, le=INT_VITAL_MAX, example=75)
+    Respiratory_rate: int = Field(..., alias="Respiratory rate", ge=0, le=INT_VITAL_MAX, example=18)
     Temperature: float = Field(..., example=37.0)
-    Oxygen_saturations: int = Field(..., alias="Oxygen saturations", example=98)
+    Oxygen_saturations: int = Field(..., alias="Oxygen saturations", ge=0, le=INT_VITAL_MAX, example=98)
     Level_of_consciousness: str = Field(
         ...,
         alias="Level of consciousness (fully awake and responsive?)",
@@ -41,6 +82,18 @@ class VitalsInput(BaseModel):
     class Config:
         populate_by_name = True  # allows JSON keys with spaces to map correctly
 
+    @model_validator(mode="wrap")
+    @classmethod
+    def _timed(cls, data, handler):
+        with metrics.stage("pydantic_validation"):
+            return handler(data)
+
+class BatchItem(BaseModel):
+    patient_name: str = Field(..., example="John Doe")
+    dob: str = Field(..., example="01/01/00")
+    vitals: VitalsInput
+    timestamp: Optional[datetime] = Field(None, description="When the reading was taken; defaults to now")
+
 # -------------------------
 # ROOT ENDPOINT
 # -------------------------
@@ -75,41 +128,160 @@ def format_alerts_horizontal(alerts: dict) -> dict:
 def add_vitals_api(patient_name: str, dob: str, vitals: VitalsInput):
     result = add_vitals(patient_name, dob, vitals.dict(by_alias=True))
 
-    # Format alerts for compact display
-    formatted_alerts = format_alerts_horizontal(result["alerts"])
+    with metrics.stage("format_response"):
+        # Format alerts for compact display
+        formatted_alerts = format_alerts_horizontal(result["alerts"])
 
-    response_dict = {
-        "patient_id": result["patient_id"],
-        "total_news2_score": result["total_news2_score"],
-        "alerts": formatted_alerts
-    }
+        response_dict = {
+            "patient_id": result["patient_id"],
+            "total_news2_score": result["total_news2_score"],
+            "alerts": formatted_alerts
+        }
 
-    # Pretty-print outer JSON, compact inner dicts
+        # Pretty-print outer JSON, compact inner dicts
+        content = json.dumps(response_dict, indent=2, separators=(",", ": "))
+    return Response(content=content, media_type="application/json")
+
+# -------------------------
+# 1b. ADD A BATCH OF VITALS
+# -------------------------
+@app.post("/add_vitals/batch")
+def add_vitals_batch_api(items: List[BatchItem]):
+    """Add many readings in one request (e.g. a bedside monitor flushing its buffer).
+
+    Returns one result per item, in order: the same body as POST /add_vitals/,
+    or {"status_code": 400, "detail": ...} for an item that was rejected.
+    """
+    results = add_vitals_batch([
+        {
+            "patient_name": item.patient_name,
+            "dob": item.dob,
+            "vitals": item.vitals.dict(by_alias=True),
+            "timestamp": item.timestamp,
+        }
+        for item in items
+    ])
+    formatted = [
+        {**result, "alerts": format_alerts_horizontal(result["alerts"])} if "alerts" in result else result
+        for result in results
+    ]
     return Response(
-        content=json.dumps(response_dict, indent=2, separators=(",", ": ")),
+        content=json.dumps(formatted, indent=2, separators=(",", ": ")),
         media_type="application/json"
     )
 
 # -------------------------
 # 2. VIEW PATIENT VITALS HISTORY
 # -------------------------
+NDJSON = "application/x-ndjson"
+
+def history_page(patient_id, full_history, request: Request, response: Response,
+                 since, until, limit, cursor, stream, max_points=None):
+    """History for GET /patient and /trends/json: whole list, one window/page, or NDJSON stream.
+
+    The cursor for the next page goes in the X-Next-Cursor header.
+    """
+    if stream or NDJSON in request.headers.get("accept", ""):
+        return stream_history(patient_id, since, until, limit, cursor, max_points)
+    if since is None and until is None and limit is None and cursor is None and max_points is None:
+        return full_history(patient_id)
+    rows, next_cursor = query_history(patient_id, since, until, limit, cursor, max_points)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
 @app.get("/patient/{patient_id}")
-def get_patient_vitals_api(patient_id: str):
-    """Retrieve all saved vitals for a patient as JSON list."""
-    return get_patient_vitals(patient_id)
+def get_patient_vitals_api(
+    patient_id: str,
+    request: Request,
+    response: Response,
+    since: Optional[datetime] = Query(None, description="Only readings at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only readings at or before this time"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size; see the X-Next-Cursor header"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    stream: bool = Query(False, description="Stream rows as NDJSON (same as Accept: application/x-ndjson)"),
+):
+    """Retrieve saved vitals for a patient as JSON list, oldest first."""
+    return history_page(patient_id, get_patient_vitals, request, response, since, until, limit, cursor, stream)
 
 # -------------------------
 # 3. PLOT PATIENT VITALS TRENDS
 # -------------------------
 @app.get("/trends/{patient_id}/png")
-def get_trends_png(patient_id: str):
+def get_trends_png(
+    patient_id: str,
+    max_points: Optional[int] = Query(None, ge=3, description="Most readings plotted (LTTB downsampling, NEWS2 peaks kept)"),
+):
     """Return a PNG plot of vitals and NEWS2 trends."""
-    return get_trends(patient_id)
+    return get_trends(patient_id, max_points)
 
 # -------------------------
 # 4. GET TRENDS AS JSON
 # -------------------------
 @app.get("/trends/{patient_id}/json")
-def get_trends_json_api(patient_id: str):
-    """Return patient vitals and NEWS2 history as JSON."""
-    return get_trends_json(patient_id)
\ No newline at end of file
+def get_trends_json_api(
+    patient_id: str,
+    request: Request,
+    response: Response,
+    since: Optional[datetime] = Query(None, description="Only readings at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only readings at or before this time"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size; see the X-Next-Cursor header"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    stream: bool = Query(False, description="Stream rows as NDJSON (same as Accept: application/x-ndjson)"),
+    max_points: Optional[int] = Query(None, ge=3, description="Downsample to at most this many readings (LTTB, NEWS2 peaks kept)"),
+):
+    """Return patient vitals and NEWS2 history as JSON, oldest first."""
+    return history_page(patient_id, get_trends_json, request, response, since, until, limit, cursor, stream, max_points)
+
+# -------------------------
+# 5. SUMMARY STATISTICS
+# -------------------------
+@app.get("/trends/{patient_id}/summary")
+def get_trends_summary_api(patient_id: str):
+    """Latest NEWS2, and count/sum/min/max/last plus windowed mean/min/max/slope per vital."""
+    return get_trends_summary(patient_id)
+
+# -------------------------
+# 6. ESCALATION STREAM
+# -------------------------
+@app.get("/alerts/stream")
+async def alerts_stream(
+    request: Request,
+    min_score: Optional[int] = Query(None, ge=0, description="Push readings with NEWS2 at or above this (default VITALS_ALERT_MIN_SCORE)"),
+    level: Optional[List[str]] = Query(None, description="Also push readings where any vital reaches one of these levels (default VITALS_ALERT_LEVELS)"),
+):
+    """Server-Sent Events: one "alert" event per new reading that crosses the thresholds.
+
+    Each listener has a bounded buffer; a listener that falls behind loses its
+    oldest alerts (reported in a "dropped" event) rather than slowing ingest.
+    """
+    subscription = alert_broker.subscribe(min_score, level)
+    return StreamingResponse(
+        sse_stream(alert_broker, subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# -------------------------
+# 7. WARD OVERVIEW
+# -------------------------
+@app.get("/ward/overview")
+def get_ward_overview_api(n: int = Query(20, ge=1, le=1000, description="How many patients to list")):
+    """Patients ranked by their latest NEWS2 score (highest first), with latest vitals and alert levels."""
+    return get_ward_overview(n)
+
+# -------------------------
+# 8. METRICS
+# -------------------------
+@app.get("/metrics")
+def get_metrics_api():
+    """Prometheus text: per-stage timings, requests per route, vitals file bytes and cache hit rates."""
+    return Response(content=get_metrics_text(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# -------------------------
+# 9. BULK EXPORT
+# -------------------------
+@app.get("/export")
+def export_api(format: Optional[str] = Query(None, description="parquet, arrow (IPC stream) or npz; default parquet if pyarrow is installed, else npz")):
+    """Every reading, joined to patient names, as a columnar file streamed in chunks."""
+    return export_dataset(format)
@@ -0,0 +1,370 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import csv
+import mmap
+import os
+import struct
+import threading
+from array import array
+from pathlib import Path
+# NumPy is imported inside the read methods, so writers (the CLI, add_vitals) never load it
+
+from v2_api.file_lock import FileLock
+from v2_api.metrics import metrics
+from v2_api.patient_index import get_patient_index
+from v2_api.series import VITAL_COLUMNS, VitalsSeries, from_micros, to_micros
+
+# -------------------------
+# GLOBALS
+# -------------------------
+MAGIC = b"VITALSB1"
+HEADER = struct.Struct("<8sII16x")  # magic, format version, record size; padded to 32 so records stay 8-byte aligned
+VERSION = 1
+
+# One reading = 32 bytes, widest fields first so every field is naturally aligned:
+# timestamp (int64 micros since 1970-01-01, naive local time like the CSV), temperature (float64, NaN = missing),
+# patient_id (uint32), bp_systolic, bp_diastolic, heart_rate, respiratory_rate, oxygen_sats (int16, MISSING = empty),
+# news2_score (uint8), loc (uint8 flag: 1 = "Yes", 0 = not fully awake, LOC_MISSING = empty)
+RECORD = struct.Struct("<qdI5hBB")
+RECORD_FIELDS = ("timestamp", "temperature", "patient_id", "bp_systolic", "bp_diastolic", "heart_rate",
+                 "respiratory_rate", "oxygen_sats", "news2_score", "loc")
+INT_VITALS = ("bp_systolic", "bp_diastolic", "heart_rate", "respiratory_rate", "oxygen_sats")
+MISSING = -32768
+LOC_MISSING = 255
+LOC_LABELS = ("No/Unsure", "Yes", "")  # series LOC codes: flag 0, flag 1, missing
+NAN = float("nan")
+CHUNK_RECORDS = 10_000  # records turned into row dicts per step when streaming
+
+_dtype = None
+
+# -------------------------
+# RECORD LAYOUT
+# -------------------------
+def record_dtype():
+    """The NumPy structured dtype matching RECORD (32 bytes, little-endian)."""
+    global _dtype
+    if _dtype is None:
+        import numpy as np
+
+        _dtype = np.dtype([
+            ("timestamp", "<i8"), ("temperature", "<f8"), ("patient_id", "<u4"),
+            ("bp_systolic", "<i2"), ("bp_diastolic", "<i2"), ("heart_rate", "<i2"),
+            ("respiratory_rate", "<i2"), ("oxygen_sats", "<i2"), ("news2_score", "u1"), ("loc", "u1"),
+        ])
+        assert _dtype.itemsize == RECORD.size
+    return _dtype
+
+def _int(name: str, value) -> int:
+    if value is None or value == "":
+        return MISSING
+    number = float(value)
+    if not number.is_integer() or not MISSING < number <= 32767:  # MISSING itself would read back as empty
+        raise ValueError(f"{name} {value!r} does not fit a binary record (whole numbers from {MISSING + 1} to 32767)")
+    return int(number)
+
+def pack_row(row: dict) -> bytes:
+    """One CSV-style row (strings or numbers) as a 32-byte record.
+
+    Raises ValueError for an int vital that is fractional or outside int16, rather than truncating it.
+    """
+    temperature = row["temperature"]
+    loc = row["loc"]
+    return RECORD.pack(
+        to_micros(row["timestamp"]),
+        NAN if temperature is None or temperature == "" else float(temperature),
+        int(row["patient_id"]),
+        *(_int(name, row[name]) for name in INT_VITALS),
+        int(row["news2_score"]),
+        1 if loc == "Yes" else LOC_MISSING if loc is None or loc == "" else 0,
+    )
+
+def _text(value: int) -> str:
+    return "" if value == MISSING else str(value)
+
+def unpack_row(values: tuple) -> dict:
+    """A record's values (in RECORD_FIELDS order) as the dict of strings csv.DictReader would return."""
+    timestamp, temperature, patient_id, bp_systolic, bp_diastolic, heart_rate, respiratory_rate, oxygen_sats, news2, loc = values
+    return {
+        "patient_id": str(patient_id),
+        "timestamp": from_micros(timestamp).isoformat(),
+        "news2_score": str(news2),
+        "bp_systolic": _text(bp_systolic),
+        "bp_diastolic": _text(bp_diastolic),
+        "heart_rate": _text(heart_rate),
+        "respiratory_rate": _text(respiratory_rate),
+        "temperature": "" if temperature != temperature else repr(temperature),
+        "oxygen_sats": _text(oxygen_sats),
+        "loc": LOC_LABELS[2 if loc == LOC_MISSING else loc],
+    }
+
+def vital_column(records, name: str):
+    """One vital of a record array as float64 with NaN for missing values (what the analytics expect).
+
+    loc comes back as its 0/1 flag, which scoring's batch path accepts in place of "Yes" strings.
+    """
+    import numpy as np
+
+    column = records[name]
+    if name == "loc":
+        return column
+    if name in INT_VITALS:
+        values = column.astype(np.float64)
+        values[column == MISSING] = np.nan
+        return values
+    return column.astype(np.float64)
+
+# -------------------------
+# BINARY STORAGE BACKEND
+# -------------------------
+class BinaryStorage:
+    """Readings as fixed-width 32-byte records in one file, read back through mmap.
+
+    The file is a 32-byte header followed by records in insertion order.
+    Appends pack rows with struct (no NumPy) under the same cross-process
+    lock the CSV backend uses. Reads map the file and view it as a NumPy
+    structured array without copying (records()); when the file has
+    grown, it is re-mapped and only the new records are indexed, grouping
+    them by patient with one stable argsort. A patient's rows are then a
+    single gather from the mapped array.
+
+    load_series() builds a VitalsSeries straight from the record columns,
+    so the history cache (and everything served from it: trends PNG and
+    JSON, windowed history) never formats or parses text. load() and the
+    other row calls return the same dicts of strings as the CSV backend.
+    """
+
+    name = "binary"
+
+    def __init__(self, path, mapping_path, fieldnames):
+        self.path = Path(path)
+        self.mapping_path = None if mapping_path is None else Path(mapping_path)  # None: readings only (converters)
+        self.fieldnames = list(fieldnames)
+        self._lock = FileLock(self.path)
+        self._state_lock = threading.Lock()
+        self._records = None   # structured view over the current map
+        self._count = 0        # records indexed
+        self._positions = {}   # patient_id -> array('q') of record numbers, in insertion order
+
+    # ---- file ----
+    def _write_header(self, f):
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+    def _check_header(self, data: bytes):
+        magic, version, size = HEADER.unpack(data[:HEADER.size])
+        if magic != MAGIC or version != VERSION or size != RECORD.size:
+            raise ValueError(f"{self.path} is not a version {VERSION} binary vitals file")
+
+    def init(self):
+        get_patient_index(self.mapping_path).refresh()
+        with self._lock:
+            if not self.path.exists() or os.path.getsize(self.path) == 0:
+                with open(self.path, 'wb') as f:
+                    self._write_header(f)
+            else:
+                with open(self.path, 'rb') as f:
+                    self._check_header(f.read(HEADER.size))
+
+    # ---- patients ----
+    def get_or_create_patient(self, patient_name: str, dob: str) -> tuple:
+        return get_patient_index(self.mapping_path).get_or_create(patient_name, dob)
+
+    def get_or_create_patients(self, identities) -> list:
+        return get_patient_index(self.mapping_path).get_or_create_many(identities)
+
+    def patients(self) -> list:
+        return get_patient_index(self.mapping_path).patients()
+
+    # ---- writes ----
+    def append(self, row: dict):
+        self.append_many([row])
+
+    def append_many(self, rows):
+        data = b"".join(pack_row(row) for row in rows)
+        if not data:
+            return
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                size = f.tell()
+                if size < HEADER.size:  # new file, or a header cut short
+                    f.truncate(0)
+                    self._write_header(f)
+                elif (size - HEADER.size) % RECORD.size:  # a torn record from a crashed writer
+                    f.truncate(size - (size - HEADER.size) % RECORD.size)
+                f.write(data)
+        metrics.inc("vitals_file_written_bytes_total", len(data))
+
+    def sync(self):
+        if self.path.exists():
+            with open(self.path, 'ab') as f:
+                os.fsync(f.fileno())
+
+    # ---- mapping and indexing ----
+    def _refresh(self):
+        """The record view, re-mapped and indexed if the file grew; None if there is no file yet."""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return None
+        if size < HEADER.size:
+            return None  # created but the header isn't written yet
+        count = (size - HEADER.size) // RECORD.size
+        with self._state_lock:
+            if self._records is not None and count == self._count:
+                return self._records
+            import numpy as np
+
+            if count < self._count:  # the file was replaced: index it again
+                self._positions, self._count = {}, 0
+            with open(self.path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._check_header(mapped[:HEADER.size])
+            # The view keeps the map alive; an older map is released with the last view of it
+            records = np.frombuffer(mapped, dtype=record_dtype(), count=count, offset=HEADER.size)
+            start = self._count
+            if count > start:
+                patient_ids = records["patient_id"][start:]
+                order = np.argsort(patient_ids, kind="stable")
+                grouped = patient_ids[order]
+                cuts = np.flatnonzero(grouped[1:] != grouped[:-1]) + 1
+                for first, numbers in zip(np.concatenate(([0], cuts)), np.split(order.astype(np.int64) + start, cuts)):
+                    positions = self._positions.setdefault(str(grouped[first]), array('q'))
+                    positions.frombytes(numbers.tobytes())
+            self._records, self._count = records, count
+            return records
+
+    def records(self):
+        """Every stored reading as a structured array viewing the mapped file (no copy)."""
+        records = self._refresh()
+        return records if records is not None else self._empty()
+
+    def _empty(self):
+        import numpy as np
+
+        return np.empty(0, dtype=record_dtype())
+
+    def patient_records(self, patient_id: str, skip: int = 0):
+        """One patient's readings after the first `skip`, in insertion order (gathered from the map)."""
+        import numpy as np
+
+        records = self._refresh()
+        if records is None:
+            return self._empty()
+        with self._state_lock:
+            positions = self._positions.get(patient_id)
+            numbers = np.frombuffer(positions[skip:], dtype=np.int64) if positions is not None else None
+        if numbers is None or not len(numbers):
+            return self._empty()
+        metrics.inc("vitals_file_read_bytes_total", len(numbers) * RECORD.size)
+        return records[numbers]
+
+    # ---- reads ----
+    def load(self, patient_id: str) -> list:
+        return [unpack_row(values) for values in self.patient_records(patient_id).tolist()]
+
+    def load_tail(self, patient_id: str, skip: int) -> list:
+        return [unpack_row(values) for values in self.patient_records(patient_id, skip).tolist()]
+
+    def iter_rows(self, patient_id: str):
+        import numpy as np
+
+        records = self.patient_records(patient_id)
+        records = records[np.argsort(records["timestamp"], kind="stable")]
+        for first in range(0, len(records), CHUNK_RECORDS):
+            for values in records[first:first + CHUNK_RECORDS].tolist():
+                yield unpack_row(values)
+
+    def load_series(self, patient_id: str) -> VitalsSeries:
+        """A patient's readings as a VitalsSeries sorted by timestamp (ties keep insertion order),
+        filled column by column from the records without going through text."""
+        import numpy as np
+
+        records = self.patient_records(patient_id)
+        records = records[np.argsort(records["timestamp"], kind="stable")]
+        series = VitalsSeries(patient_id)
+        series.timestamps.frombytes(records["timestamp"].tobytes())
+        series.news2_score.frombytes(records["news2_score"].astype(np.int64).tobytes())
+        for name in VITAL_COLUMNS:
+            getattr(series, name).frombytes(vital_column(records, name).tobytes())
+        series.loc_labels.extend(LOC_LABELS)
+        series.loc_codes.frombytes(np.where(records["loc"] == LOC_MISSING, 2, records["loc"]).astype(np.uint8).tobytes())
+        return series
+
+    def read_since(self, position):
+        # position = number of records already read
+        records = self._refresh()
+        if records is None:
+            return iter(()), None
+        end = len(records)
+        start = position if position is not None and position <= end else 0
+        return self._iter_range(records, start, end), end
+
+    def _iter_range(self, records, start: int, end: int):
+        for first in range(start, end, CHUNK_RECORDS):
+            chunk = records[first:min(end, first + CHUNK_RECORDS)]
+            metrics.inc("vitals_file_read_bytes_total", len(chunk) * RECORD.size)
+            for values in chunk.tolist():
+                yield unpack_row(values)
+
+    def iter_all_rows(self):
+        return self.read_since(None)[0]
+
+    def data_version(self, patient_id: str) -> tuple:
+        if self._refresh() is None:
+            return (0, -1)
+        with self._state_lock:
+            positions = self._positions.get(patient_id)
+            return (len(positions), positions[-1]) if positions else (0, -1)
+
+# -------------------------
+# CONVERTERS
+# -------------------------
+def csv_to_binary(vitals_csv, binary_path, fieldnames) -> int:
+    """Pack every row of a vitals CSV into a new binary file; returns the number of readings."""
+    if Path(binary_path).exists() and os.path.getsize(binary_path) > HEADER.size:
+        raise ValueError(f"{binary_path} already contains readings; convert into a new file.")
+    store = BinaryStorage(binary_path, None, fieldnames)
+    count = 0
+    with open(vitals_csv, 'r', newline='') as f:
+        batch = []
+        for row in csv.DictReader(f):
+            if not row.get('patient_id'):
+                continue
+            batch.append(row)
+            if len(batch) >= CHUNK_RECORDS:
+                store.append_many(batch)
+                count += len(batch)
+                batch = []
+        store.append_many(batch)
+        count += len(batch)
+    return count
+
+def binary_to_csv(binary_path, vitals_csv, fieldnames) -> int:
+    """Write every reading of a binary file as a vitals CSV (with header); returns the number of readings."""
+    store = BinaryStorage(binary_path, None, fieldnames)
+    count = 0
+    with open(vitals_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in store.iter_all_rows():
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    import argparse
+    from v2_api.vitals_tracker_v2 import BINARY_FILE, CSVNAMES, VITALS_FILE
+
+    parser = argparse.ArgumentParser(description="Convert vitals between CSV and the packed binary format.")
+    parser.add_argument("direction", choices=["to-binary", "to-csv"])
+    parser.add_argument("--csv", default=VITALS_FILE, help="vitals CSV (source for to-binary, target for to-csv)")
+    parser.add_argument("--binary", default=BINARY_FILE, help="binary vitals file (target for to-binary, source for to-csv)")
+    args = parser.parse_args()
+
+    if args.direction == "to-binary":
+        count = csv_to_binary(args.csv, args.binary, CSVNAMES)
+        print(f"Packed {count} readings from {args.csv} into {args.binary}")
+    else:
+        count = binary_to_csv(args.binary, args.csv, CSVNAMES)
+        print(f"Wrote {count} readings from {args.binary} to {args.csv}")
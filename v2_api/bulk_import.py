@@ -0,0 +1,252 @@
+"""Bulk import / backfill of historical vitals.
+
+    python -m v2_api.bulk_import observations.csv
+    python -m v2_api.bulk_import observations.ndjson --chunk-size 50000 --workers 8
+
+Input rows carry patient_name, dob (dd/mm/yy), timestamp (ISO 8601) and the
+flat vitals columns (bp_systolic, bp_diastolic, heart_rate, respiratory_rate,
+temperature, oxygen_sats, loc). The file is streamed in chunks; worker
+processes validate and score each chunk, then the parent resolves patient IDs
+once per chunk and appends the chunk to the configured storage in one write.
+
+Progress is checkpointed after every committed chunk (INPUT.import-state.json)
+so an interrupted import resumes where it stopped. Rejected rows are written
+to INPUT.rejects.ndjson with the reason.
+"""
+# -------------------------
+# IMPORTS
+# -------------------------
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# -------------------------
+# GLOBALS
+# -------------------------
+INPUT_FIELDS = ["patient_name", "dob", "timestamp", "bp_systolic", "bp_diastolic", "heart_rate",
+                "respiratory_rate", "temperature", "oxygen_sats", "loc"]
+NUMERIC_FIELDS = ["bp_systolic", "bp_diastolic", "heart_rate", "respiratory_rate", "temperature", "oxygen_sats"]
+FLOAT_FIELDS = ("temperature",)
+
+# -------------------------
+# READING THE INPUT
+# -------------------------
+def read_chunks(path: Path, fmt: str, chunk_size: int, start_offset: int = 0, start_line: int = 0):
+    """Yield (rows, line_numbers, end_offset, end_line) chunks, resuming at a byte offset."""
+    with open(path, 'rb') as f:
+        header = None
+        if fmt == "csv":
+            header = next(csv.reader([f.readline().decode()]))
+            start_line = max(start_line, 1)
+        if start_offset:
+            f.seek(start_offset)
+        line_no = start_line
+        rows, positions = [], []
+        for line in iter(f.readline, b""):
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                text = line.decode()
+            except UnicodeDecodeError:
+                rows.append({"_invalid": line.decode(errors="replace").strip(), "_error": "line is not valid UTF-8"})
+            else:
+                if fmt == "csv":
+                    rows.append(dict(zip(header, next(csv.reader([text])))))
+                else:
+                    try:
+                        rows.append(json.loads(text))
+                    except ValueError:
+                        rows.append({"_invalid": text.strip(), "_error": "line is not valid JSON"})
+            positions.append(line_no)
+            if len(rows) >= chunk_size:
+                yield rows, positions, f.tell(), line_no
+                rows, positions = [], []
+        if rows:
+            yield rows, positions, f.tell(), line_no
+
+# -------------------------
+# WORKER: VALIDATE AND SCORE
+# -------------------------
+def _number(value, field, largest):
+    number = float(value)
+    if number != number:
+        raise ValueError(f"{field} is not a number")
+    if field in FLOAT_FIELDS:
+        return number
+    if not number.is_integer() or not 0 <= number <= largest:
+        raise ValueError(f"{field} must be a whole number from 0 to {largest}")
+    return int(number)
+
+def score_chunk(rows: list, positions: list) -> tuple:
+    """Validate and NEWS2-score one chunk (runs in a worker process).
+
+    Returns (accepted, rejected): accepted rows are flat CSV rows plus
+    patient_name/dob (patient_id is filled in by the parent), rejected rows
+    are {"line", "error", "row"}.
+    """
+    from v2_api.vitals_tracker_v2 import INT_VITAL_MAX, compiled_thresholds, validate_dob
+
+    accepted, rejected = [], []
+    for row, position in zip(rows, positions):
+        try:
+            if not isinstance(row, dict):  # valid JSON, but a string/number/array
+                raise ValueError("line is not a JSON object")
+            if "_invalid" in row:
+                raise ValueError(row["_error"])
+            missing = [field for field in INPUT_FIELDS if row.get(field) in (None, "")]
+            if missing:
+                raise ValueError(f"missing {', '.join(missing)}")
+            timestamp = datetime.fromisoformat(str(row["timestamp"]))
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone().replace(tzinfo=None)
+            clean = {
+                "patient_name": str(row["patient_name"]).strip().lower(),
+                "dob": validate_dob(str(row["dob"]).strip()),
+                "timestamp": timestamp.isoformat(),
+                "loc": str(row["loc"]),
+            }
+            for field in NUMERIC_FIELDS:
+                clean[field] = _number(row[field], field, INT_VITAL_MAX)
+        except (TypeError, ValueError) as e:
+            rejected.append({"line": position, "error": str(e), "row": row})
+            continue
+        accepted.append(clean)
+
+    if accepted:
+        columns = {field: [row[field] for row in accepted] for field in NUMERIC_FIELDS + ["loc"]}
+        _, totals = compiled_thresholds.score_batch(columns)
+        for row, total in zip(accepted, totals.tolist()):
+            row["news2_score"] = total
+    return accepted, rejected
+
+# -------------------------
+# CHECKPOINTS
+# -------------------------
+def checkpoint_path(input_path: Path) -> Path:
+    return input_path.with_name(input_path.name + ".import-state.json")
+
+def load_checkpoint(input_path: Path) -> dict:
+    path = checkpoint_path(input_path)
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        state = json.load(f)
+    st = os.stat(input_path)
+    if state.get("input_size") != st.st_size or state.get("input_mtime_ns") != st.st_mtime_ns:
+        return {}  # a different file: start over
+    return state
+
+def save_checkpoint(input_path: Path, state: dict):
+    path = checkpoint_path(input_path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+# -------------------------
+# PARENT: RESOLVE IDS AND APPEND
+# -------------------------
+def commit_chunk(store, accepted: list, skip_existing: bool) -> int:
+    """Give each row its patient ID and append the chunk in one write."""
+    from v2_api.vitals_tracker_v2 import CSVNAMES
+
+    if not accepted:
+        return 0
+    identities = [(row["patient_name"], row["dob"]) for row in accepted]
+    patient_ids = [patient_id for patient_id, _ in store.get_or_create_patients(identities)]
+    rows = []
+    for row, patient_id in zip(accepted, patient_ids):
+        row["patient_id"] = patient_id
+        rows.append({name: row[name] for name in CSVNAMES})
+
+    if skip_existing:
+        # First chunk after a resume may already be stored if we stopped
+        # between its append and its checkpoint: drop rows we already have.
+        seen = {}
+        for patient_id in set(patient_ids):
+            seen[patient_id] = {r["timestamp"] for r in store.load(patient_id)}
+        rows = [row for row in rows if row["timestamp"] not in seen[row["patient_id"]]]
+
+    store.append_many(rows)
+    return len(rows)
+
+
+def run_import(input_path, fmt=None, chunk_size=50_000, workers=None, max_chunks=None, progress=True) -> dict:
+    """Import a CSV/NDJSON file into the configured storage; returns the final checkpoint state."""
+    from v2_api.vitals_tracker_v2 import get_storage
+
+    input_path = Path(input_path)
+    fmt = fmt or ("ndjson" if input_path.suffix in (".ndjson", ".jsonl") else "csv")
+    st = os.stat(input_path)
+    state = load_checkpoint(input_path) or {
+        "input_size": st.st_size, "input_mtime_ns": st.st_mtime_ns,
+        "offset": 0, "line": 0, "chunks": 0, "imported": 0, "rejected": 0, "done": False,
+    }
+    if state["done"]:
+        return state
+    resumed = state["offset"] > 0
+    store = get_storage()
+    rejects_path = input_path.with_name(input_path.name + ".rejects.ndjson")
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    imported_at_start = state["imported"]
+
+    chunks = read_chunks(input_path, fmt, chunk_size, state["offset"], state["line"])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()  # at most workers + 1 chunks held in memory
+        exhausted = False
+        committed = 0
+        while True:
+            while not exhausted and len(in_flight) <= workers and (max_chunks is None or committed + len(in_flight) < max_chunks):
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                rows, positions, end_offset, end_line = chunk
+                in_flight.append((pool.submit(score_chunk, rows, positions), end_offset, end_line))
+            if not in_flight:
+                break
+            future, end_offset, end_line = in_flight.popleft()
+            accepted, rejected = future.result()
+            state["imported"] += commit_chunk(store, accepted, skip_existing=resumed and committed == 0)
+            if rejected:
+                with open(rejects_path, 'a') as rejects:
+                    rejects.writelines(json.dumps(reject) + "\n" for reject in rejected)
+            state["rejected"] += len(rejected)
+            state["offset"] = end_offset
+            state["line"] = end_line
+            state["chunks"] += 1
+            committed += 1
+            save_checkpoint(input_path, state)
+            if progress:
+                rate = (state["imported"] - imported_at_start) / max(time.perf_counter() - started, 1e-9)
+                print(f"chunk {state['chunks']}: {state['offset'] / max(st.st_size, 1):6.1%} of input, "
+                      f"{state['imported']} imported, {state['rejected']} rejected, {rate:,.0f} rows/s",
+                      file=sys.stderr)
+
+    if exhausted:
+        state["done"] = True
+        save_checkpoint(input_path, state)
+    return state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import historical vitals from CSV or NDJSON.")
+    parser.add_argument("input", help="CSV (with header) or NDJSON file")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per chunk (default 50000)")
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (default: CPU count)")
+    parser.add_argument("--max-chunks", type=int, default=None, help="stop after this many chunks (resume later)")
+    args = parser.parse_args()
+
+    final = run_import(args.input, args.format, args.chunk_size, args.workers, args.max_chunks)
+    status = "complete" if final["done"] else "paused (run again to resume)"
+    print(f"Import {status}: {final['imported']} readings imported, {final['rejected']} rejected")
@@ -0,0 +1,23 @@
+import pytest
+
+import v2_api.vitals_tracker_v2 as v2
+
+BACKENDS = ["csv", "sqlite", "segmented", "binary"]
+
+@pytest.fixture
+def data_paths(tmp_path, monkeypatch):
+    """Every data file and directory under tmp_path, CSV backend."""
+    monkeypatch.setattr(v2, "VITALS_FILE", tmp_path / "vitals.csv")
+    monkeypatch.setattr(v2, "MAPPING_FILE", tmp_path / "patient_mapping.csv")
+    monkeypatch.setattr(v2, "DB_FILE", tmp_path / "vitals.db")
+    monkeypatch.setattr(v2, "BINARY_FILE", tmp_path / "vitals.bin")
+    monkeypatch.setattr(v2, "SEGMENT_DIR", tmp_path / "segments")
+    monkeypatch.setattr(v2, "SEGMENT_MB", 0.002)  # ~40 rows per segment, so reads cross several
+    monkeypatch.setattr(v2, "STORAGE_BACKEND", "csv")
+    return tmp_path
+
+@pytest.fixture(params=BACKENDS)
+def storage_paths(data_paths, monkeypatch, request):
+    """data_paths, once per storage backend."""
+    monkeypatch.setattr(v2, "STORAGE_BACKEND", request.param)
+    return data_paths
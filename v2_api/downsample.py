@@ -0,0 +1,106 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+# NumPy is imported inside the functions: the CLI imports this module at startup
+from v2_api.series import VITAL_COLUMNS, VitalsSeries
+
+# -------------------------
+# GLOBALS
+# -------------------------
+MIN_POINTS = 3  # first, last and at least one bucket
+
+# -------------------------
+# DOWNSAMPLING
+# -------------------------
+def news2_peaks(scores, budget: int):
+    """Indices where NEWS2 peaks: it rose to this reading and does not rise on the next.
+
+    At most `budget` peaks are returned, highest scores first (earliest
+    first among equal scores), in time order. Linear: the cut-off score is
+    found with a partial sort, not a full one.
+    """
+    import numpy as np
+
+    n = len(scores)
+    rise = np.ones(n, dtype=bool)
+    rise[1:] = scores[1:] > scores[:-1]
+    hold = np.ones(n, dtype=bool)
+    hold[:-1] = scores[:-1] >= scores[1:]
+    peaks = np.flatnonzero(rise & hold)
+    if len(peaks) <= budget:
+        return peaks
+    if budget <= 0:
+        return peaks[:0]
+    peak_scores = scores[peaks]
+    cutoff = np.partition(peak_scores, len(peaks) - budget)[len(peaks) - budget]
+    above = peaks[peak_scores > cutoff]
+    at_cutoff = peaks[peak_scores == cutoff][:budget - len(above)]
+    return np.sort(np.concatenate([above, at_cutoff]))
+
+
+def lttb_indices(x, ys, n_out: int):
+    """Largest-Triangle-Three-Buckets over several columns at once.
+
+    `x` is a 1-D array of times and `ys` an (n, columns) array, NaN for a
+    missing value. The first and last points are kept. Every other point
+    is picked from its bucket to maximise the triangle it forms with the
+    previous pick and the next bucket's average. The triangle is measured
+    in every column, each scaled to its own range, and the areas are
+    summed. One pass, O(n * columns).
+    """
+    import numpy as np
+
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < MIN_POINTS:
+        return np.array([0, n - 1][:max(n_out, 0)])
+
+    low, high = np.fmin.reduce(ys, axis=0), np.fmax.reduce(ys, axis=0)  # NaN-skipping, no warning for empty columns
+    spread = np.where(high > low, high - low, 1.0)
+    ys = (ys - low) / spread  # every vital on a 0..1 scale, so none dominates the area
+    known = ~np.isnan(ys)
+    filled = np.where(known, ys, 0.0)
+
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for j in range(n_out - 2):
+        start, stop = edges[j], edges[j + 1]
+        if j == n_out - 3:  # last bucket: the "next bucket" is the final point
+            next_x, next_y = x[n - 1], ys[n - 1]
+        else:
+            next_stop = edges[j + 2]
+            next_x = x[stop:next_stop].mean()
+            counts = known[stop:next_stop].sum(axis=0)
+            next_y = filled[stop:next_stop].sum(axis=0) / np.where(counts, counts, np.nan)
+        area = np.abs(
+            (x[a] - next_x) * (ys[start:stop] - ys[a])
+            - (x[a] - x[start:stop])[:, None] * (next_y - ys[a])
+        )
+        a = selected[j + 1] = start + int(np.argmax(np.nansum(area, axis=1)))
+    return selected
+
+
+def downsample(series: VitalsSeries, max_points: int = None) -> VitalsSeries:
+    """At most `max_points` readings of `series` for plotting, always keeping NEWS2 peaks.
+
+    Up to half the budget goes to NEWS2 peaks (news2_peaks); the rest is
+    chosen by LTTB across NEWS2 and every vital. Returns `series` itself
+    when it already fits.
+    """
+    if max_points is None or len(series) <= max_points:
+        return series
+    import numpy as np
+
+    max_points = max(max_points, MIN_POINTS)
+    micros = np.frombuffer(series.timestamps, dtype=np.int64)
+    x = (micros - micros[0]).astype(np.float64)
+    scores = np.frombuffer(series.news2_score, dtype=np.int64)
+    ys = np.column_stack([scores.astype(np.float64)] + [
+        np.frombuffer(series.column(name), dtype=np.float64) for name in VITAL_COLUMNS
+    ])
+    peaks = news2_peaks(scores, max_points // 2)
+    picks = lttb_indices(x, ys, max_points - len(peaks))
+    return series.take(np.union1d(peaks, picks).tolist())
@@ -0,0 +1,338 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import itertools
+import zipfile
+# NumPy and pyarrow are imported inside the functions, so importing the API doesn't load them
+
+from v2_api.metrics import metrics
+
+# -------------------------
+# GLOBALS
+# -------------------------
+# Format -> (media type, file suffix). parquet and arrow (IPC stream) need pyarrow; npz doesn't
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "npz": ("application/zip", "npz"),
+}
+
+# Exported columns and their types; patient_name and dob come from the patient table,
+# the rest from the readings (an empty cell becomes a null / masked value)
+COLUMN_TYPES = {
+    "patient_id": "int32", "patient_name": "str", "dob": "str", "timestamp": "datetime64[us]",
+    "news2_score": "int8", "bp_systolic": "int16", "bp_diastolic": "int16", "heart_rate": "int16",
+    "respiratory_rate": "int16", "temperature": "float64", "oxygen_sats": "int16", "loc": "str",
+}
+NUMERIC_COLUMNS = ("news2_score", "bp_systolic", "bp_diastolic", "heart_rate", "respiratory_rate",
+                   "temperature", "oxygen_sats")
+
+# -------------------------
+# HELPERS
+# -------------------------
+def have_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def default_format() -> str:
+    """Parquet when pyarrow is installed, NPZ otherwise."""
+    return "parquet" if have_pyarrow() else "npz"
+
+class PatientTable:
+    """The patient mapping as arrays indexed by patient ID, built once per export.
+
+    Joining a chunk of readings to names is then one NumPy gather
+    (names[patient_ids]) rather than a dict lookup per row.
+    """
+
+    def __init__(self, patients):
+        import numpy as np
+
+        patients = sorted(patients, key=lambda patient: int(patient[0]))
+        size = int(patients[-1][0]) + 1 if patients else 1
+        self.known = np.zeros(size, dtype=bool)
+        self.names = np.full(size, "", dtype=f"U{max([len(name) for _, name, _ in patients] + [1])}")
+        self.dobs = np.full(size, "", dtype=f"U{max([len(dob) for _, _, dob in patients] + [1])}")
+        for patient_id, name, dob in patients:
+            self.known[int(patient_id)] = True
+            self.names[int(patient_id)] = name
+            self.dobs[int(patient_id)] = dob
+
+    def join(self, patient_ids) -> tuple:
+        """(names, dobs, unknown mask) for an array of patient IDs."""
+        import numpy as np
+
+        slots = np.where(patient_ids < len(self.known), patient_ids, 0)
+        unknown = ~self.known[slots]
+        return self.names[slots], self.dobs[slots], unknown
+
+def _masked(values, missing):
+    """(values, mask); the mask is None when nothing is missing."""
+    return values, (missing if missing.any() else None)
+
+def _columns_from_rows(rows: list, table: PatientTable) -> dict:
+    """A chunk of storage rows (dicts of strings) as {column: (typed array, missing mask or None)}."""
+    import numpy as np
+
+    patient_ids = np.fromiter(map(int, [row["patient_id"] for row in rows]), np.int64, len(rows))
+    columns = {
+        "patient_id": (patient_ids.astype(np.int32), None),
+        "timestamp": (np.array([row["timestamp"] for row in rows], dtype="datetime64[us]"), None),
+    }
+    for name in NUMERIC_COLUMNS:
+        # float() per cell through map() beats NumPy's string casts; empty cells -> NaN -> masked
+        text = [row[name] for row in rows]
+        if not all(text):
+            text = [value or "nan" for value in text]
+        values = np.fromiter(map(float, text), np.float64, len(text))
+        missing = np.isnan(values)
+        if COLUMN_TYPES[name] != "float64":
+            values[missing] = 0
+        columns[name] = _masked(values.astype(COLUMN_TYPES[name]), missing)
+    loc = np.array([row["loc"] for row in rows])
+    columns["loc"] = _masked(loc, loc == "")
+    return _with_patients(columns, patient_ids, table)
+
+def _columns_from_records(records, table: PatientTable) -> dict:
+    """A slice of BinaryStorage.records() as the same columns, without going through text."""
+    import numpy as np
+    from v2_api.binary_store import LOC_LABELS, LOC_MISSING, MISSING
+
+    patient_ids = records["patient_id"].astype(np.int64)
+    columns = {
+        "patient_id": (patient_ids.astype(np.int32), None),
+        "timestamp": (records["timestamp"].view("datetime64[us]"), None),
+    }
+    for name in NUMERIC_COLUMNS:
+        values = records[name]
+        if name == "temperature":
+            columns[name] = _masked(values.copy(), np.isnan(values))
+        elif name == "news2_score":
+            columns[name] = (values.astype(np.int8), None)
+        else:
+            columns[name] = _masked(values.copy(), values == MISSING)
+    flags = records["loc"]
+    columns["loc"] = _masked(np.array(LOC_LABELS)[np.where(flags == LOC_MISSING, 2, flags)], flags == LOC_MISSING)
+    return _with_patients(columns, patient_ids, table)
+
+def _with_patients(columns: dict, patient_ids, table: PatientTable) -> dict:
+    names, dobs, unknown = table.join(patient_ids)
+    joined = {"patient_id": columns.pop("patient_id"), "patient_name": _masked(names, unknown),
+              "dob": _masked(dobs, unknown)}
+    joined.update(columns)
+    return {name: joined[name] for name in COLUMN_TYPES}
+
+def iter_column_chunks(store, table: PatientTable, chunk_rows: int):
+    """Every stored reading, in insertion order, as typed column chunks of at most `chunk_rows` rows."""
+    if hasattr(store, "records"):  # binary backend: slice the mapped records directly
+        records = store.records()
+        if records is None:
+            return
+        for first in range(0, len(records), chunk_rows):
+            chunk = records[first:first + chunk_rows]
+            metrics.inc("vitals_file_read_bytes_total", chunk.nbytes)
+            yield _columns_from_records(chunk, table)
+        return
+    rows = store.iter_all_rows()
+    while True:
+        chunk = list(itertools.islice(rows, chunk_rows))
+        if not chunk:
+            return
+        yield _columns_from_rows(chunk, table)
+
+# -------------------------
+# WRITERS
+# -------------------------
+# Each writer takes one chunk at a time and writes it straight to `sink`
+# (a file, or a ByteSink drained between chunks), so memory stays at about
+# one chunk whatever the size of the dataset.
+
+class ByteSink:
+    """Write-only file object that keeps what was written until drain() (for streaming responses).
+
+    It has no seek(), so zipfile writes the NPZ members in streaming mode.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+def _arrow_schema(pa):
+    types = {"int32": pa.int32(), "int8": pa.int8(), "int16": pa.int16(), "float64": pa.float64(),
+             "datetime64[us]": pa.timestamp("us"), "str": pa.string()}
+    fields = [pa.field(name, types[kind]) for name, kind in COLUMN_TYPES.items()]
+    # Names and dates of birth are dictionary-encoded against the patient table: one copy per patient
+    for i, name in enumerate(("patient_name", "dob"), start=1):
+        fields[i] = pa.field(name, pa.dictionary(pa.int32(), pa.string()))
+    return pa.schema(fields)
+
+class ArrowWriter:
+    """Parquet (one row group per chunk, zstd) or Arrow IPC stream, via pyarrow."""
+
+    def __init__(self, sink, table: PatientTable, fmt: str):
+        import pyarrow as pa
+
+        self.pa = pa
+        self.schema = _arrow_schema(pa)
+        # The patient table is the dictionary; each row just points at its patient's slot
+        self.dictionaries = {"patient_name": pa.array(table.names), "dob": pa.array(table.dobs)}
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            self.writer = pq.ParquetWriter(sink, self.schema, compression="zstd")
+        else:
+            self.writer = pa.ipc.new_stream(sink, self.schema)
+
+    def write(self, columns: dict):
+        import numpy as np
+
+        pa = self.pa
+        arrays = []
+        slots = columns["patient_id"][0]
+        for field in self.schema:
+            values, mask = columns[field.name]
+            if field.name in self.dictionaries:
+                indices = pa.array(slots if mask is None else np.where(mask, 0, slots), type=pa.int32(), mask=mask)
+                arrays.append(pa.DictionaryArray.from_arrays(indices, self.dictionaries[field.name]))
+            else:
+                arrays.append(pa.array(values, type=field.type, mask=mask))
+        self.writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+class NPZWriter:
+    """Compressed NPZ with one member per column per chunk: "<column>/<chunk>" (plus
+    "<column>.missing/<chunk>" masks where a chunk has empty cells). Read it back with load_npz()."""
+
+    def __init__(self, sink, table: PatientTable):
+        self.zip = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+        self.chunk = 0
+
+    def _member(self, name: str, values):
+        import numpy as np
+
+        with self.zip.open(f"{name}/{self.chunk:06d}.npy", "w", force_zip64=True) as f:
+            np.lib.format.write_array(f, np.ascontiguousarray(values), allow_pickle=False)
+
+    def write(self, columns: dict):
+        for name, (values, mask) in columns.items():
+            self._member(name, values)
+            if mask is not None:
+                self._member(f"{name}.missing", mask)
+        self.chunk += 1
+
+    def close(self):
+        self.zip.close()
+
+def load_npz(path) -> dict:
+    """An NPZ export as {column: array}; columns with empty cells come back as masked arrays."""
+    import numpy as np
+
+    with np.load(path, allow_pickle=False) as npz:
+        members = sorted(npz.files)
+        columns = {}
+        for name in COLUMN_TYPES:
+            chunks = [key for key in members if key.startswith(f"{name}/")]
+            if not chunks:
+                columns[name] = np.array([], dtype=object if COLUMN_TYPES[name] == "str" else COLUMN_TYPES[name])
+                continue
+            values, masks = [], []
+            for key in chunks:
+                values.append(npz[key])
+                mask_key = key.replace("/", ".missing/")
+                masks.append(npz[mask_key] if mask_key in npz.files else np.zeros(len(values[-1]), dtype=bool))
+            values, mask = np.concatenate(values), np.concatenate(masks)
+            columns[name] = np.ma.MaskedArray(values, mask=mask) if mask.any() else values
+    return columns
+
+# -------------------------
+# EXPORT
+# -------------------------
+def _export(store, fmt: str, sink, chunk_rows: int):
+    """Write every reading to `sink`; yields the running row count after each chunk."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r} (use {', '.join(map(repr, EXPORT_FORMATS))})")
+    if fmt != "npz" and not have_pyarrow():
+        raise ValueError(f"The {fmt} export needs pyarrow; install it or use format 'npz'.")
+    table = PatientTable(store.patients())  # the name join, done once
+    writer = NPZWriter(sink, table) if fmt == "npz" else ArrowWriter(sink, table, fmt)
+    rows = 0
+    for columns in iter_column_chunks(store, table, chunk_rows):
+        with metrics.stage("export_chunk"):
+            writer.write(columns)
+        rows += len(columns["patient_id"][0])
+        yield rows
+    writer.close()
+    yield rows
+
+def export_chunks(store, fmt: str, chunk_rows: int):
+    """The export file as a stream of bytes, one piece per chunk of readings (for a StreamingResponse).
+
+    Raises ValueError up front (before anything is sent) for an unknown or unavailable format.
+    """
+    sink = ByteSink()
+    progress = _export(store, fmt, sink, chunk_rows)
+    next(progress, None)  # validate the format and write the first chunk before the response starts
+
+    def body():
+        data = sink.drain()
+        if data:
+            yield data
+        for _ in progress:
+            data = sink.drain()
+            if data:
+                yield data
+
+    return body()
+
+def export_to_file(store, path, fmt: str, chunk_rows: int) -> int:
+    """Export every reading to `path`; returns the number of readings."""
+    rows = 0
+    with open(path, "wb") as f:
+        for rows in _export(store, fmt, f, chunk_rows):
+            pass
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import v2_api.vitals_tracker_v2 as v2
+
+    parser = argparse.ArgumentParser(description="Export every reading, joined to patient names, in a columnar format.")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default=None,
+                        help="default: parquet if pyarrow is installed, else npz")
+    parser.add_argument("--out", default=None, help="output file (default: vitals_export.<suffix>)")
+    parser.add_argument("--chunk-rows", type=int, default=v2.EXPORT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    fmt = args.format or default_format()
+    out = args.out or f"vitals_export.{EXPORT_FORMATS[fmt][1]}"
+    store = v2.get_storage()
+    store.init()
+    count = export_to_file(store, out, fmt, args.chunk_rows)
+    print(f"Exported {count} readings to {out} ({os.path.getsize(out) / 1e6:.1f} MB, {fmt})")
@@ -0,0 +1,70 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, fall back to locking within this process only
+    fcntl = None
+
+# -------------------------
+# GLOBALS
+# -------------------------
+LOCK_SUFFIX = ".lock"
+
+# Cross-process locking can be switched off to measure its cost (see benchmarks/bench_locking.py)
+LOCKING = True
+
+# -------------------------
+# CROSS-PROCESS FILE LOCK
+# -------------------------
+class FileLock:
+    """Re-entrant exclusive lock for one data file, across threads and processes.
+
+    Threads in this process queue on an RLock; the outermost holder also
+    takes an fcntl.flock on ``<file>.lock`` so other processes (e.g. several
+    uvicorn workers, the CLI, a bulk import) wait too. The lock file stays
+    open between acquisitions; a forked child opens its own, since a
+    descriptor inherited across fork() would share the parent's lock.
+    """
+
+    def __init__(self, path):
+        self.lock_path = str(path) + LOCK_SUFFIX
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        self._fd_pid = None  # process that opened _fd
+        self._locked = False
+
+    def _lock_fd(self) -> int:
+        if self._fd_pid != os.getpid():
+            self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._fd_pid = os.getpid()
+        return self._fd
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0 and LOCKING and fcntl is not None:
+            try:
+                fcntl.flock(self._lock_fd(), fcntl.LOCK_EX)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._locked = True
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._locked:
+            self._locked = False
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,134 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime
+
+from v2_api.series import VITAL_COLUMNS, VitalsSeries, to_micros
+
+# -------------------------
+# PER-PATIENT HISTORY CACHE
+# -------------------------
+class _Entry:
+    __slots__ = ("series", "version", "loaded")
+
+    def __init__(self, series, version, loaded):
+        self.series = series    # VitalsSeries sorted by timestamp (ties keep insertion order)
+        self.version = version  # storage data_version when last synced
+        self.loaded = loaded    # rows read from storage, in insertion order
+
+
+def _sorted_series(patient_id: str, rows: list) -> VitalsSeries:
+    return VitalsSeries.from_rows(patient_id, sorted(rows, key=lambda row: to_micros(row["timestamp"])))
+
+
+class HistoryCache:
+    """Timestamp-sorted VitalsSeries per patient, kept in step with storage.
+
+    A patient's readings are parsed once (a backend with load_series()
+    hands over typed columns instead); afterwards each get() asks the
+    backend for its cheap data_version and, if rows were added, reads only
+    those (load_tail) and appends them to the sorted columns. Up to
+    `max_patients` histories are kept, least recently used evicted first.
+    A get() that reads nothing from storage counts as a hit, anything else
+    (first load or new rows) as a miss.
+    """
+
+    def __init__(self, max_patients: int = 1024):
+        self.max_patients = max_patients
+        self._entries = OrderedDict()  # (store id, patient_id) -> _Entry
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, store, patient_id: str) -> VitalsSeries:
+        key = (id(store), patient_id)
+        version = store.data_version(patient_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None and entry.version == version:
+            self.hits += 1
+            return entry.series
+        self.misses += 1
+
+        if entry is not None and version[0] >= entry.loaded:
+            series = self._extend(store, patient_id, entry)
+            entry = _Entry(series, version, entry.loaded + (len(series) - len(entry.series)))
+        elif hasattr(store, "load_series"):  # the binary store builds the columns without text
+            series = store.load_series(patient_id)
+            entry = _Entry(series, version, len(series))
+        else:  # first load, or rows went away (file rewritten): start again
+            rows = store.load(patient_id)
+            entry = _Entry(_sorted_series(patient_id, rows), version, len(rows))
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_patients:
+                self._entries.popitem(last=False)
+        return entry.series
+
+    def _extend(self, store, patient_id: str, entry: _Entry) -> VitalsSeries:
+        """A new series with the rows stored since `entry` was built (the old one is left untouched)."""
+        new_rows = store.load_tail(patient_id, entry.loaded)
+        old = entry.series
+        if not new_rows:
+            return old
+        new_ts = [to_micros(row["timestamp"]) for row in new_rows]
+        in_order = all(a <= b for a, b in zip(new_ts, new_ts[1:])) and (not len(old) or old.timestamps[-1] <= new_ts[0])
+        if not in_order:  # a backfilled reading lands mid-history: re-sort everything
+            return _sorted_series(patient_id, old.to_rows() + new_rows)
+        series = VitalsSeries(patient_id)
+        for name in ("timestamps", "news2_score", "loc_codes") + VITAL_COLUMNS:
+            getattr(series, name).extend(getattr(old, name))
+        series.loc_labels.extend(old.loc_labels)
+        for row in new_rows:
+            series.append_row(row)
+        return series
+
+    def invalidate(self, patient_id: str = None):
+        with self._lock:
+            if patient_id is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[1] == patient_id]:
+                    del self._entries[key]
+
+# -------------------------
+# WINDOWED QUERIES
+# -------------------------
+def encode_cursor(micros: int, seen: int) -> str:
+    return f"{micros}.{seen}"
+
+def decode_cursor(cursor: str) -> tuple:
+    micros, _, seen = cursor.partition(".")
+    micros, seen = int(micros), int(seen)
+    if seen < 0:
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return micros, seen
+
+def window_bounds(series: VitalsSeries, since: datetime = None, until: datetime = None,
+                  limit: int = None, cursor: str = None) -> tuple:
+    """(start, end, next_cursor): series rows start..end-1 are the requested page.
+
+    The window is found by binary search over the sorted timestamp column, so
+    the cost depends on the page size, not on the length of the history.
+    A cursor is "<timestamp micros>.<rows already returned at that timestamp>",
+    so it stays valid when readings are added after it was issued.
+    """
+    timestamps = series.timestamps
+    lo = 0 if since is None else bisect_left(timestamps, to_micros(since.isoformat()))
+    hi = len(timestamps) if until is None else bisect_right(timestamps, to_micros(until.isoformat()))
+    if cursor is not None:
+        micros, seen = decode_cursor(cursor)
+        lo = max(lo, bisect_left(timestamps, micros) + seen)
+    end = hi if limit is None else min(hi, lo + limit)
+
+    next_cursor = None
+    if end < hi:
+        last = timestamps[end - 1]
+        next_cursor = encode_cursor(last, end - bisect_left(timestamps, last))
+    return lo, end, next_cursor
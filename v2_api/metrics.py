@@ -0,0 +1,247 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+# cProfile is imported only when a request is sampled for profiling
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from pathlib import Path
+
+# -------------------------
+# GLOBALS
+# -------------------------
+# Histogram upper bounds in seconds (Prometheus' defaults, plus sub-millisecond buckets for the hot paths)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (Prometheus type, help text); samples for other names are exposed as untyped
+DESCRIPTIONS = {
+    "vitals_stage_seconds": ("histogram", "Time spent in one stage of a request"),
+    "vitals_http_requests_total": ("counter", "HTTP requests by method, route and status"),
+    "vitals_http_request_seconds": ("histogram", "HTTP request time by route, until the response body is sent"),
+    "vitals_file_read_bytes_total": ("counter", "Bytes read from the vitals CSV to serve rows"),
+    "vitals_file_written_bytes_total": ("counter", "Bytes appended to the vitals CSV"),
+    "vitals_cache_hits_total": ("counter", "Cache lookups served from memory"),
+    "vitals_cache_misses_total": ("counter", "Cache lookups that had to read storage or render"),
+    "vitals_cache_hit_ratio": ("gauge", "hits / (hits + misses) since startup"),
+    "vitals_profiles_written_total": ("counter", "Sampled requests dumped as cProfile .prof files"),
+}
+
+_DISABLED = nullcontext()  # returned by stage()/profile() when there is nothing to do
+
+# -------------------------
+# COUNTERS AND HISTOGRAMS
+# -------------------------
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * (n_buckets + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.metrics.observe("vitals_stage_seconds", time.perf_counter() - self.start, stage=self.name)
+
+
+class _Profile:
+    """cProfile one sampled call and dump it to `directory` as <name>-<time>.prof."""
+
+    def __init__(self, metrics, name: str):
+        import cProfile
+
+        self.metrics = metrics
+        self.name = name
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self):
+        try:
+            self.profiler.enable()
+        except ValueError:  # Python 3.12+: another thread's request is being profiled right now
+            self.profiler = None
+
+    def __exit__(self, *exc):
+        if self.profiler is None:
+            return
+        self.profiler.disable()
+        directory = Path(self.metrics.profile_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.profiler.dump_stats(directory / f"{self.name}-{time.time_ns()}.prof")
+        self.metrics.inc("vitals_profiles_written_total", endpoint=self.name)
+
+
+class Metrics:
+    """Process-wide counters and latency histograms, exposed in Prometheus text format.
+
+    Samples are keyed by (name, sorted labels). When `enabled` is False,
+    stage() hands back a shared no-op context manager and inc()/observe()
+    return straight away, so instrumented code costs one attribute check.
+    collector() registers a function called at scrape time for values that
+    are kept elsewhere (cache hit counters). Independently of `enabled`, a
+    `profile_rate` fraction of profile() calls run under cProfile.
+    """
+
+    def __init__(self, enabled: bool = False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.profile_rate = 0.0
+        self.profile_dir = Path("profiles")
+        self._counters = {}    # (name, labels) -> number
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool = None, profile_rate: float = None, profile_dir=None):
+        if enabled is not None:
+            self.enabled = enabled
+        if profile_rate is not None:
+            self.profile_rate = profile_rate
+        if profile_dir is not None:
+            self.profile_dir = Path(profile_dir)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # ---- recording ----
+    def inc(self, name: str, amount: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(len(self.buckets))
+            histogram.counts[bisect_left(self.buckets, seconds)] += 1
+            histogram.sum += seconds
+            histogram.count += 1
+
+    def stage(self, name: str):
+        """Context manager timing one stage into vitals_stage_seconds{stage=name}."""
+        return _StageTimer(self, name) if self.enabled else _DISABLED
+
+    def collector(self, collect):
+        """Register collect() -> [(name, labels dict, value)], called on every render()."""
+        self._collectors.append(collect)
+        return collect
+
+    # ---- profiling ----
+    def profile(self, name: str):
+        """Context manager that cProfiles the block for a `profile_rate` sample of calls."""
+        if not self.profile_rate:
+            return _DISABLED
+        import random  # only once sampling is switched on
+        if random.random() >= self.profile_rate:
+            return _DISABLED
+        return _Profile(self, name)
+
+    def profiled(self, func):
+        """Decorator form of profile(), named after the function."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.profile(func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+
+    # ---- exposition ----
+    def render(self) -> str:
+        """Every sample in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: (list(h.counts), h.sum, h.count) for key, h in self._histograms.items()
+            }
+        for collect in self._collectors:
+            for name, labels, value in collect():
+                counters[(name, tuple(sorted(labels.items())))] = value
+
+        lines = []
+        by_name = {}
+        for key in counters:
+            by_name.setdefault(key[0], []).append(key)
+        for key in histograms:
+            by_name.setdefault(key[0], []).append(key)
+        for name in sorted(by_name):
+            kind, help_text = DESCRIPTIONS.get(name, ("untyped", ""))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key in sorted(by_name[name]):
+                labels = key[1]
+                if key in counters:
+                    lines.append(f"{name}{_labels(labels)} {_number(counters[key])}")
+                    continue
+                counts, total, count = histograms[key]
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{name}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+def _number(value) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+# The instance the app, the core module and the storage layer record into
+metrics = Metrics()
+
+# -------------------------
+# ASGI MIDDLEWARE
+# -------------------------
+class MetricsMiddleware:
+    """Counts HTTP requests and times them per route template (e.g. /patient/{patient_id})."""
+
+    def __init__(self, app, metrics: Metrics = metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = [500]  # if the app raises before responding
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")  # set by the router once matched
+            self.metrics.inc("vitals_http_requests_total", method=scope["method"], route=route, status=str(status[0]))
+            self.metrics.observe("vitals_http_request_seconds", time.perf_counter() - start, route=route)
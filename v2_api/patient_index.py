@@ -0,0 +1,175 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import csv
+import os
+from pathlib import Path
+
+from v2_api.file_lock import FileLock
+
+# -------------------------
+# GLOBALS
+# -------------------------
+MAPPING_FIELDS = ['patient_id', 'patient_name', 'dob']
+MAPPING_HEADER = ",".join(MAPPING_FIELDS)
+
+# One index per mapping file, shared by the CLI and the API within a process
+_indexes = {}
+
+# -------------------------
+# PATIENT IDENTITY INDEX
+# -------------------------
+def normalise_identity(patient_name: str, dob: str) -> tuple:
+    """Return the (name, dob) key used to match patients."""
+    return patient_name.strip().lower(), dob.strip()
+
+
+class PatientIndex:
+    """In-memory (name, dob) -> patient ID map for one mapping CSV.
+
+    The file is read once and kept in sync on append. Every lookup stats the
+    file and reloads it if its mtime/size no longer match what we last saw,
+    so writes from another process are picked up. New IDs are allocated and
+    appended under a cross-process lock, so concurrent writers (threads,
+    uvicorn workers, the CLI) never hand out the same ID twice.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._ids = {}
+        self._next_id = 1
+        self._stamp = None
+        self._end = 0  # bytes of the file already indexed
+        self._lock = FileLock(self.path)
+
+    def _file_stamp(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def _ensure_file(self):
+        """Create the mapping file, or prepend its header if it is missing."""
+        if not self.path.exists():
+            with open(self.path, 'w', newline='') as f:
+                f.write(MAPPING_HEADER + "\n")
+            return
+        with open(self.path, 'r', newline='') as f:
+            first_line = f.readline()
+            if first_line.strip() == MAPPING_HEADER:
+                return
+            lines = [first_line] + f.readlines()
+        with open(self.path, 'w', newline='') as f:
+            f.write(MAPPING_HEADER + "\n")
+            f.writelines(lines)
+
+    def reload(self):
+        """Rebuild the index from the mapping file."""
+        with self._lock:
+            self._ensure_file()
+            self._ids = {}
+            self._next_id = 1
+            self._end = 0
+            stamp = self._file_stamp()
+            self._read_tail()
+            self._stamp = stamp  # last, so the unlocked check in refresh() sees a finished index
+
+    def _read_tail(self):
+        """Index the complete rows after byte self._end (the file is append-only)."""
+        with open(self.path, 'rb') as f:
+            f.seek(self._end)
+            data = f.read()
+        complete = data[:data.rfind(b"\n") + 1]  # a row still being written is left for next time
+        lines = complete.decode().splitlines()
+        if self._end == 0:
+            lines = lines[1:]  # header
+        for row in csv.DictReader(lines, fieldnames=MAPPING_FIELDS):
+            if not row['patient_id']:
+                continue
+            key = normalise_identity(row['patient_name'], row['dob'])
+            self._ids.setdefault(key, row['patient_id'])
+            self._next_id = max(self._next_id, int(row['patient_id']) + 1)
+        self._end += len(complete)
+
+    def _stamp_or_none(self):
+        try:
+            return self._file_stamp()
+        except FileNotFoundError:
+            return None
+
+    def refresh(self):
+        """Pick up rows appended since we last looked; reload if the file was rewritten or vanished."""
+        stamp = self._stamp_or_none()
+        if stamp is not None and stamp == self._stamp:
+            return
+        # Under the lock, so two threads never index the same tail and both advance _end
+        with self._lock:
+            stamp = self._stamp_or_none()
+            if stamp is not None and stamp == self._stamp:
+                return  # another thread caught up while we waited
+            if stamp is None or self._stamp is None or stamp[1] < self._end or not self._header_ok():
+                self.reload()
+                return
+            self._read_tail()
+            self._stamp = stamp
+
+    def _header_ok(self) -> bool:
+        with open(self.path, 'rb') as f:
+            return f.readline().strip() == MAPPING_HEADER.encode()
+
+    def lookup(self, patient_name: str, dob: str):
+        """Return the patient ID for (name, dob), or None if unknown."""
+        self.refresh()
+        return self._ids.get(normalise_identity(patient_name, dob))
+
+    def patients(self) -> list:
+        """(patient_id, patient_name, dob) for every patient, names as stored (normalised)."""
+        self.refresh()
+        return [(patient_id, name, dob) for (name, dob), patient_id in self._ids.items()]
+
+    def get_or_create(self, patient_name: str, dob: str) -> tuple:
+        """Return (patient_id, created), appending a new patient if needed."""
+        return self.get_or_create_many([(patient_name, dob)])[0]
+
+    def get_or_create_many(self, identities) -> list:
+        """get_or_create for many (name, dob) pairs with one refresh and one append."""
+        identities = list(identities)
+        self.refresh()
+        ids = self._ids
+        if all(normalise_identity(name, dob) in ids for name, dob in identities):
+            return [(ids[normalise_identity(name, dob)], False) for name, dob in identities]  # no lock needed
+
+        # A new patient: allocate under the lock, against the file as it is now
+        with self._lock:
+            self.refresh()
+            return self._get_or_create_locked(identities)
+
+    def _get_or_create_locked(self, identities) -> list:
+        results = []
+        new_rows = []
+        for patient_name, dob in identities:
+            key = normalise_identity(patient_name, dob)
+            patient_id = self._ids.get(key)
+            if patient_id is not None:
+                results.append((patient_id, False))
+                continue
+            patient_id = str(self._next_id)
+            self._ids[key] = patient_id
+            self._next_id += 1
+            new_rows.append({'patient_id': patient_id, 'patient_name': key[0], 'dob': key[1]})
+            results.append((patient_id, True))
+
+        if new_rows:
+            with open(self.path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=MAPPING_FIELDS)
+                writer.writerows(new_rows)
+            self._stamp = self._file_stamp()
+            self._end = self._stamp[1]
+        return results
+
+
+def get_patient_index(path) -> PatientIndex:
+    """Return the process-wide index for a mapping file, creating it on first use."""
+    key = os.path.abspath(path)
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = PatientIndex(key)
+    return index
@@ -0,0 +1,102 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import threading
+from collections import OrderedDict
+
+# -------------------------
+# GLOBALS
+# -------------------------
+EVICTION_POLICIES = ("lru", "fifo")
+
+# -------------------------
+# RENDERED-PNG CACHE
+# -------------------------
+class PNGCache:
+    """Bounded cache of rendered trend PNGs keyed on (patient_id, variant, data version).
+
+    The data version changes whenever the patient gets a new reading, so a
+    stale chart is never served; invalidate() also drops a patient's entries
+    as soon as we append for them, freeing the memory straight away. The
+    variant tells apart charts of the same data (store, max_points), which
+    are cached side by side. Versions of one variant compare as tuples
+    (row count first), and a put() drops only that variant's older ones.
+    Entries are evicted once either cap (`max_entries`, `max_bytes`) is hit:
+    "lru" drops the least recently served chart, "fifo" the oldest rendered.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 256, policy: str = "lru"):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy!r} (use one of {', '.join(EVICTION_POLICIES)})")
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.policy = policy
+        self._entries = OrderedDict()  # (patient_id, variant, version) -> PNG bytes, oldest first
+        self._by_patient = {}           # patient_id -> set of keys, for invalidate()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, patient_id: str, version, variant=()):
+        key = (patient_id, variant, version)
+        with self._lock:
+            png = self._entries.get(key)
+            if png is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if self.policy == "lru":
+                self._entries.move_to_end(key)
+            return png
+
+    def put(self, patient_id: str, version, png: bytes, variant=()):
+        if len(png) > self.max_bytes or self.max_entries <= 0:
+            return  # would evict everything else and still not fit
+        key = (patient_id, variant, version)
+        with self._lock:
+            for old_key in list(self._by_patient.get(patient_id, ())):
+                if old_key[1] != variant or old_key == key:
+                    continue
+                if old_key[2] > version:
+                    return  # rendered from data that has since grown: keep the newer chart
+                self._remove(old_key)  # older versions of this chart can never be served again
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = png
+            self._by_patient.setdefault(patient_id, set()).add(key)
+            self.bytes += len(png)
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, patient_id: str):
+        """Drop every cached chart for a patient (called when we append for them)."""
+        with self._lock:
+            keys = self._by_patient.get(patient_id)
+            if keys:
+                for key in list(keys):
+                    self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_patient.clear()
+            self.bytes = 0
+
+    def _remove(self, key):
+        png = self._entries.pop(key)
+        self.bytes -= len(png)
+        keys = self._by_patient[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._by_patient[key[0]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries), "bytes": self.bytes,
+                "max_entries": self.max_entries, "max_bytes": self.max_bytes, "policy": self.policy,
+                "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "invalidations": self.invalidations,
+            }
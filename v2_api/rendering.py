@@ -0,0 +1,89 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import io
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from v2_api.series import EPOCH
+
+# -------------------------
+# GLOBALS
+# -------------------------
+NUMERICAL_VITALS = ["bp_systolic", "heart_rate", "respiratory_rate", "temperature", "oxygen_sats"]
+MICROS_PER_DAY = 86_400 * 1_000_000
+
+# One figure template per thread: Figure/Agg objects are not shared, and no pyplot state is used
+_local = threading.local()
+
+# -------------------------
+# FIGURE TEMPLATE
+# -------------------------
+class TrendsTemplate:
+    """A prebuilt 12x6 trends figure: axes, formatters, lines and legend made once.
+
+    render() only swaps in the line data and title, rescales the axes and
+    prints the canvas, so a chart costs one Agg draw instead of building a
+    figure, its artists and its layout from scratch.
+    """
+
+    def __init__(self):
+        self.figure = Figure(figsize=(12, 6))
+        self.canvas = FigureCanvasAgg(self.figure)
+        ax1 = self.ax1 = self.figure.add_subplot()
+        ax2 = self.ax2 = ax1.twinx()
+
+        # Placeholder data with real dates, so both axes take on date units
+        dummy_t = [datetime(2025, 1, 1), datetime(2025, 1, 1) + timedelta(hours=1)]
+        self.lines = {
+            vital: ax1.plot(dummy_t, [0, 1], marker='o', label=vital.replace("_", " ").title())[0]
+            for vital in NUMERICAL_VITALS
+        }
+        self.news2_line = ax2.plot(dummy_t, [0, 1], color='red', marker='x', linestyle='--', label="NEWS2 Score")[0]
+
+        ax1.set_xlabel("Timestamp")
+        ax1.set_ylabel("Vital Values")
+        ax1.tick_params(axis='x', rotation=45)
+        ax2.set_ylabel("NEWS2 Score", color='red')
+        ax1.legend(list(self.lines.values()) + [self.news2_line],
+                   [line.get_label() for line in self.lines.values()] + [self.news2_line.get_label()],
+                   loc='upper left')
+        self.title = ax1.set_title("Vital Trends for Patient 0")
+
+        # Lay the figure out once; every chart has the same labels, fonts and title height
+        self.figure.tight_layout()
+        ax1.xaxis.set_major_formatter(mdates.DateFormatter("%d-%b-%y %H:%M"))
+        self.date_offset = mdates.date2num(EPOCH)  # matplotlib day number of series.EPOCH
+
+    def render(self, series) -> bytes:
+        """Draw `series` (a VitalsSeries) into the template and return PNG bytes."""
+        x = np.frombuffer(series.timestamps, dtype=np.int64) / MICROS_PER_DAY + self.date_offset
+        for vital, line in self.lines.items():
+            line.set_data(x, np.frombuffer(series.column(vital), dtype=np.float64))
+        self.news2_line.set_data(x, np.frombuffer(series.news2_score, dtype=np.int64))
+        self.title.set_text(f"Vital Trends for Patient {series.patient_id}")
+        for ax in (self.ax1, self.ax2):
+            ax.relim()
+            ax.autoscale_view()
+
+        buf = io.BytesIO()
+        self.canvas.print_png(buf)
+        return buf.getvalue()
+
+
+def get_template() -> TrendsTemplate:
+    """Return this thread's trends template, building it on first use."""
+    template = getattr(_local, "template", None)
+    if template is None:
+        template = _local.template = TrendsTemplate()
+    return template
+
+
+def render_trends_png(series) -> bytes:
+    """Trend chart for a VitalsSeries as PNG bytes; safe to call from many threads at once."""
+    return get_template().render(series)
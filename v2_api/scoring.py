@@ -0,0 +1,149 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+from bisect import bisect_left
+# numpy is imported inside the batch methods so the scalar path never pays for it
+
+# -------------------------
+# GLOBALS
+# -------------------------
+LOC_KEY = "Level of consciousness (fully awake and responsive?)"
+
+# Flat CSV column -> key in `thresholds`
+COLUMN_THRESHOLDS = {
+    "bp_systolic": "bp_systolic",
+    "bp_diastolic": "bp_diastolic",
+    "heart_rate": "Heart rate",
+    "respiratory_rate": "Respiratory rate",
+    "temperature": "Temperature",
+    "oxygen_sats": "Oxygen saturations",
+    "loc": LOC_KEY,
+}
+
+# Columns that add to the NEWS2 total (diastolic is reported but not scored)
+SCORED_COLUMNS = ("bp_systolic", "heart_rate", "respiratory_rate", "temperature", "oxygen_sats", "loc")
+
+# -------------------------
+# THRESHOLD COMPILATION
+# -------------------------
+def match_level(vital_thresholds: dict, value) -> str:
+    """Reference dict walk: first level whose (min, max) range contains value, else Normal."""
+    for alert_level, level_range in vital_thresholds.items():
+        ranges = level_range if isinstance(level_range, list) else [level_range]
+        for min_val, max_val in ranges:
+            if (min_val is None or value >= min_val) and (max_val is None or value <= max_val):
+                return alert_level
+    return "Normal"
+
+
+def compile_ranges(vital_thresholds: dict) -> tuple:
+    """Split the number line at every range edge and resolve each piece once.
+
+    Returns (edges, region_levels) where edges are the sorted distinct range
+    endpoints and region_levels has 2 * len(edges) + 1 entries: region 2i is
+    the open interval just below edges[i], region 2i + 1 is edges[i] itself
+    and the last region is everything above the largest edge. Every range
+    test is `>= edge` or `<= edge`, so all values inside one region get the
+    same level as match_level() gives its representative.
+    """
+    edges = sorted({
+        bound
+        for level_range in vital_thresholds.values()
+        for pair in (level_range if isinstance(level_range, list) else [level_range])
+        for bound in pair if bound is not None
+    })
+    representatives = [edges[0] - 1]
+    for i, edge in enumerate(edges):
+        representatives.append(edge)
+        representatives.append((edge + edges[i + 1]) / 2 if i + 1 < len(edges) else edge + 1)
+    return edges, [match_level(vital_thresholds, value) for value in representatives]
+
+
+class CompiledThresholds:
+    """`thresholds` compiled to interval tables, shared by scalar and batch scoring."""
+
+    def __init__(self, thresholds: dict, alert_scores: dict):
+        self.levels = list(dict.fromkeys(
+            ["Normal"] + [level for name, vital in thresholds.items() if name != LOC_KEY for level in vital]
+            + list(thresholds.get(LOC_KEY, {}))
+        ))
+        self.level_codes = {level: code for code, level in enumerate(self.levels)}
+        # NEWS2 points per level code; unscored levels ("Alert", "High Alert") add nothing
+        self.level_scores = [alert_scores.get(level, 0) for level in self.levels]
+        self.vitals = {}       # vital -> (edges, region level codes)
+        self.region_names = {}  # vital -> region level names, for the scalar path
+        self.int_tables = {}    # vital -> (lowest value, level name per integer value)
+        for name, vital_thresholds in thresholds.items():
+            if name == LOC_KEY:
+                continue
+            edges, region_levels = compile_ranges(vital_thresholds)
+            self.vitals[name] = (edges, [self.level_codes[level] for level in region_levels])
+            self.region_names[name] = region_levels
+            if all(isinstance(edge, int) for edge in edges):
+                # One slot per integer from just below the first edge to just above the last;
+                # anything further out shares the first/last region's level
+                low = edges[0] - 1
+                self.int_tables[name] = (low, [match_level(vital_thresholds, v) for v in range(low, edges[-1] + 2)])
+
+    # -------------------------
+    # SCALAR SCORING
+    # -------------------------
+    def level(self, vital_name: str, value) -> str:
+        """Alert level for one value: a table index for ints, a bisect over the edges otherwise."""
+        if type(value) is int:
+            table = self.int_tables.get(vital_name)
+            if table is not None:
+                low, levels = table
+                i = value - low
+                if i < 0:
+                    i = 0
+                elif i >= len(levels):
+                    i = len(levels) - 1
+                return levels[i]
+        if value != value:  # NaN fails every comparison
+            return "Normal"
+        edges = self.vitals[vital_name][0]
+        i = bisect_left(edges, value)
+        return self.region_names[vital_name][2 * i + (i < len(edges) and edges[i] == value)]
+
+    # -------------------------
+    # BATCH (NumPy) SCORING
+    # -------------------------
+    def level_codes_batch(self, vital_name: str, values):
+        """Level code for every value of one vital, via searchsorted over the edges."""
+        import numpy as np
+
+        if vital_name == LOC_KEY:
+            values = np.asarray(values)
+            awake = values == 1 if values.dtype.kind in "biu" else values == "Yes"  # 0/1 flags (binary store) or strings
+            return np.where(awake, self.level_codes["Normal"], self.level_codes["Severe Alert"]).astype(np.uint8)
+
+        edges, region_levels = self.vitals[vital_name]
+        edges = np.asarray(edges, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        idx = np.searchsorted(edges, values, side="left")
+        on_edge = edges[np.minimum(idx, len(edges) - 1)] == values
+        codes = np.asarray(region_levels, dtype=np.uint8)[2 * idx + on_edge]
+        codes[np.isnan(values)] = self.level_codes["Normal"]  # NaN fails every comparison
+        return codes
+
+    def score_batch(self, columns: dict) -> tuple:
+        """Score whole columns at once.
+
+        `columns` maps flat CSV names (bp_systolic, heart_rate, ..., loc) to
+        equal-length arrays. Returns ({column: level codes}, NEWS2 totals);
+        `self.levels[code]` turns a code back into its level name.
+        """
+        import numpy as np
+
+        levels = {
+            column: self.level_codes_batch(COLUMN_THRESHOLDS[column], values)
+            for column, values in columns.items() if column in COLUMN_THRESHOLDS
+        }
+        n = len(next(iter(levels.values()))) if levels else 0
+        score_table = np.asarray(self.level_scores, dtype=np.int64)
+        totals = np.zeros(n, dtype=np.int64)
+        for column in SCORED_COLUMNS:
+            if column in levels:
+                totals += score_table[levels[column]]
+        return levels, totals
@@ -0,0 +1,490 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import csv
+import gzip
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from v2_api.file_lock import LOCK_SUFFIX, FileLock
+from v2_api.metrics import metrics
+from v2_api.patient_index import get_patient_index
+from v2_api.series import to_micros
+from v2_api.vitals_index import INDEX_SUFFIX, drop_vitals_index, get_vitals_index
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# GLOBALS
+# -------------------------
+MANIFEST_NAME = "manifest.json"
+MERGE_FACTOR = 4           # compaction merges neighbouring sealed segments up to this many segment sizes
+BLOCK_BYTES = 64 * 1024    # merged segments are gzipped in independent blocks of about this much CSV
+RETIRE_GRACE_SECONDS = 60  # merged-away files are deleted this long after they left the manifest
+
+# -------------------------
+# SEGMENTED STORAGE BACKEND
+# -------------------------
+class SegmentedStorage:
+    """vitals.csv split into bounded segments, listed in a manifest.
+
+    New rows only ever go to the active segment (a plain CSV with its own
+    VitalsIndex). Once it reaches `segment_bytes`, or is older than
+    `segment_seconds`, it is sealed: its per-patient row counts go into
+    manifest.json and a fresh active segment is started. A patient's rows
+    are read from the sealed segments that list the patient, then from the
+    active one, so reads never open segments that can't contain them.
+
+    compact() (run by a background thread, see start_compactor) works on
+    sealed segments only: it merges runs of neighbours into one gzipped
+    segment and records its time range. A merged file is a series of gzip
+    members of about BLOCK_BYTES each (still one valid .csv.gz) with a
+    sidecar listing the blocks each patient appears in, so a patient read
+    only decompresses those. The merged file is written without holding
+    the lock; ingest only waits for the manifest swap.
+    Files merged away are deleted after RETIRE_GRACE_SECONDS, so readers
+    that listed segments just before the swap can still open them.
+
+    The manifest is replaced atomically (write + os.replace) under a
+    cross-process lock; every process re-reads it when its mtime changes.
+    """
+
+    name = "segmented"
+
+    def __init__(self, directory, mapping_path, fieldnames, segment_bytes: int = 64 * 1024 * 1024,
+                 segment_seconds: float = None):
+        self.directory = Path(directory)
+        self.mapping_path = Path(mapping_path)
+        self.fieldnames = list(fieldnames)
+        self.header_len = len(",".join(self.fieldnames)) + 1
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.manifest_path = self.directory / MANIFEST_NAME
+        self._manifest = None
+        self._manifest_stamp = None
+        self._lock = FileLock(self.manifest_path)  # created with the directory, on first use
+        self._compact_lock = threading.Lock()       # one compaction at a time in this process
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._compactor = None
+        self._blocks = {}     # merged segment file -> its block index (the files never change)
+        self._ordered = {}    # patient_id -> (rows checked, last timestamp, or None once one went backwards)
+        self.compactions = 0  # merged segments written, for stats/tests
+
+    # ---- manifest ----
+    def _stat_manifest(self):
+        try:
+            st = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _current(self):
+        """The manifest as last written by any process (None before the first write)."""
+        stamp = self._stat_manifest()
+        if stamp is None:
+            self._manifest = self._manifest_stamp = None
+        elif stamp != self._manifest_stamp:
+            with open(self.manifest_path, 'r') as f:
+                self._manifest = json.load(f)
+            self._manifest_stamp = stamp
+        return self._manifest
+
+    def _write_manifest(self, manifest: dict):
+        tmp_path = self.manifest_path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest = manifest
+        self._manifest_stamp = self._stat_manifest()
+
+    def _new_active(self, first_row: int) -> dict:
+        return {"file": f"segment-{first_row:012d}.csv", "first_row": first_row, "created": time.time()}
+
+    def _manifest_for_write(self) -> dict:
+        """The current manifest, creating the directory and first segment if needed (hold the lock)."""
+        manifest = self._current()
+        if manifest is None:
+            manifest = {"active": self._new_active(0), "segments": [], "retired": []}
+            self._write_manifest(manifest)
+        return manifest
+
+    def _active_index(self, manifest: dict):
+        return get_vitals_index(self.directory / manifest["active"]["file"], self.fieldnames)
+
+    def init(self):
+        get_patient_index(self.mapping_path).refresh()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._active_index(self._manifest_for_write()).refresh()
+
+    # ---- patients ----
+    def get_or_create_patient(self, patient_name: str, dob: str) -> tuple:
+        return get_patient_index(self.mapping_path).get_or_create(patient_name, dob)
+
+    def get_or_create_patients(self, identities) -> list:
+        return get_patient_index(self.mapping_path).get_or_create_many(identities)
+
+    def patients(self) -> list:
+        return get_patient_index(self.mapping_path).patients()
+
+    # ---- writes ----
+    def append(self, row: dict):
+        self.append_many([row])
+
+    def append_many(self, rows):
+        if self._manifest is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            manifest = self._manifest_for_write()
+            if self._should_rotate(manifest):
+                manifest = self._seal(manifest)
+            self._active_index(manifest).append_many(rows)
+
+    def _should_rotate(self, manifest: dict) -> bool:
+        try:
+            size = os.path.getsize(self.directory / manifest["active"]["file"])
+        except FileNotFoundError:
+            return False
+        if size <= self.header_len:
+            return False  # never seal an empty segment
+        if size >= self.segment_bytes:
+            return True
+        return self.segment_seconds is not None and time.time() - manifest["active"]["created"] >= self.segment_seconds
+
+    def _seal(self, manifest: dict) -> dict:
+        """Move the active segment into the sealed list and start a new one (hold the lock)."""
+        active = manifest["active"]
+        path = self.directory / active["file"]
+        index = self._active_index(manifest)
+        index.refresh()
+        patients = index.patient_counts()
+        rows = sum(patients.values())
+        sealed = {
+            "file": active["file"], "first_row": active["first_row"], "rows": rows,
+            "bytes": os.path.getsize(path) - self.header_len, "min_ts": None, "max_ts": None,
+            "patients": patients, "parts": {str(active["first_row"]): 0}, "compressed": False,
+        }
+        manifest = dict(manifest, active=self._new_active(active["first_row"] + rows),
+                        segments=manifest["segments"] + [sealed])
+        self._write_manifest(manifest)  # its VitalsIndex stays: reads seek into it until it is merged
+        self._wake.set()
+        return manifest
+
+    def sync(self):
+        manifest = self._current()
+        if manifest is not None:
+            path = self.directory / manifest["active"]["file"]
+            if path.exists():
+                with open(path, 'ab') as f:
+                    os.fsync(f.fileno())
+
+    # ---- reads ----
+    def segments_for(self, patient_id: str, since: int = None, until: int = None) -> list:
+        """Sealed segments holding rows for `patient_id`, optionally only those that can
+        overlap since..until (timestamp micros; segments not compacted yet have no range and are kept)."""
+        manifest = self._current()
+        return [] if manifest is None else self._segments_for(manifest, patient_id, since, until)
+
+    def _segments_for(self, manifest: dict, patient_id: str, since: int = None, until: int = None) -> list:
+        return [
+            segment for segment in manifest["segments"]
+            if patient_id in segment["patients"]
+            and (since is None or segment["max_ts"] is None or segment["max_ts"] >= since)
+            and (until is None or segment["min_ts"] is None or segment["min_ts"] <= until)
+        ]
+
+    def _open(self, segment: dict):
+        path = self.directory / segment["file"]
+        return gzip.open(path, 'rb') if segment["compressed"] else open(path, 'rb')
+
+    def _parse(self, line: bytes) -> dict:
+        values = next(csv.reader([line.decode()]))
+        return dict(zip(self.fieldnames, values + [None] * (len(self.fieldnames) - len(values))))
+
+    def _iter_segment(self, segment: dict, offset: int = 0):
+        """Every row of one sealed segment from body byte `offset`, in stored order."""
+        read = 0
+        try:
+            with self._open(segment) as f:
+                f.seek(self.header_len + offset)
+                for line in f:
+                    read += len(line)
+                    yield self._parse(line)
+        finally:
+            metrics.inc("vitals_file_read_bytes_total", read)
+
+    def _block_index(self, segment: dict) -> dict:
+        index = self._blocks.get(segment["file"])
+        if index is None:
+            with open(self.directory / (segment["file"] + INDEX_SUFFIX), 'r') as f:
+                index = self._blocks[segment["file"]] = json.load(f)
+        return index
+
+    def _iter_patient(self, segment: dict, patient_id: str, skip: int):
+        """One patient's rows of a sealed segment after the first `skip`."""
+        if not segment["compressed"]:
+            yield from get_vitals_index(self.directory / segment["file"], self.fieldnames).iter_rows(patient_id, skip)
+            return
+        index = self._block_index(segment)
+        starts = index["blocks"] + [None]
+        prefix = f"\n{patient_id},".encode()
+        read = 0
+        try:
+            with open(self.directory / segment["file"], 'rb') as f:
+                for block in index["patients"][patient_id]:
+                    start, end = starts[block], starts[block + 1]
+                    f.seek(start)
+                    data = b"\n" + zlib.decompress(f.read(-1 if end is None else end - start), wbits=31)
+                    read += len(data) - 1
+                    found = data.find(prefix)
+                    while found != -1:  # find() skips the other patients' lines without splitting them
+                        line_end = data.index(b"\n", found + 1)
+                        if skip:
+                            skip -= 1
+                        else:
+                            yield self._parse(data[found + 1:line_end + 1])
+                        found = data.find(prefix, line_end)
+        finally:
+            metrics.inc("vitals_file_read_bytes_total", read)
+
+    def _iter_stored(self, patient_id: str, skip: int = 0):
+        """The patient's rows after the first `skip`, in insertion order."""
+        manifest = self._current()
+        if manifest is None:
+            return
+        active = self._active_index(manifest)
+        for segment in self._segments_for(manifest, patient_id):
+            count = segment["patients"][patient_id]
+            if skip >= count:
+                skip -= count  # whole segment already held by the caller: not opened
+                continue
+            yield from self._iter_patient(segment, patient_id, skip)
+            skip = 0
+        if (self.directory / manifest["active"]["file"]).exists():
+            yield from active.iter_rows(patient_id, skip)
+
+    def iter_rows(self, patient_id: str):
+        """The patient's rows in timestamp order (ties in insertion order), one at a time.
+
+        Readings are normally appended in time order, so they are streamed as
+        stored once that has been checked; the check is remembered and only
+        reads rows added since. A patient with backfilled (earlier) readings
+        after later ones is sorted in memory instead.
+        """
+        checked, last = self._ordered.get(patient_id, (0, ""))
+        count = checked
+        if last is not None:
+            for row in self._iter_stored(patient_id, checked):
+                count += 1
+                if row["timestamp"] < last:  # ISO 8601 from isoformat(): string order is time order
+                    last = None
+                    break
+                last = row["timestamp"]
+            self._ordered[patient_id] = (count, last)
+        if last is None:
+            yield from sorted(self._iter_stored(patient_id), key=lambda row: to_micros(row["timestamp"]))
+        else:
+            yield from itertools.islice(self._iter_stored(patient_id), count)  # rows added since weren't checked
+
+    def load(self, patient_id: str) -> list:
+        return list(self._iter_stored(patient_id))
+
+    def load_tail(self, patient_id: str, skip: int) -> list:
+        return list(self._iter_stored(patient_id, skip))
+
+    def read_since(self, position):
+        # position = (first_row of the segment it was taken in, body byte offset in that segment);
+        # a segment merged since is found through its "parts", an unknown position reads everything
+        manifest = self._current()
+        if manifest is None or not (self.directory / manifest["active"]["file"]).exists():
+            return iter(()), None
+        active = manifest["active"]
+        segments, offset, active_offset = manifest["segments"], 0, 0
+        if position is not None and position[0] == active["first_row"]:
+            segments, active_offset = [], position[1]
+        elif position is not None:
+            for i, segment in enumerate(segments):
+                part = segment["parts"].get(str(position[0]))
+                if part is not None and part + position[1] <= segment["bytes"]:
+                    segments, offset = segments[i:], part + position[1]
+                    break
+        active_rows, end = self._active_index(manifest).read_since(self.header_len + active_offset)
+        if self.header_len + active_offset > end:  # active segment rewritten smaller: its rows restart at 0
+            segments, offset = manifest["segments"], 0
+        return self._chain(segments, offset, active_rows), (active["first_row"], end - self.header_len)
+
+    def _chain(self, segments: list, offset: int, active_rows):
+        for segment in segments:
+            yield from self._iter_segment(segment, offset)
+            offset = 0
+        yield from active_rows
+
+    def iter_all_rows(self):
+        return self.read_since(None)[0]
+
+    def data_version(self, patient_id: str) -> tuple:
+        manifest = self._current()
+        if manifest is None or not (self.directory / manifest["active"]["file"]).exists():
+            return (0, -1, -1)
+        sealed = sum(segment["patients"][patient_id] for segment in self._segments_for(manifest, patient_id))
+        count, last_offset = self._active_index(manifest).version(patient_id)
+        return (sealed + count, manifest["active"]["first_row"], last_offset)
+
+    # ---- compaction ----
+    def compact(self) -> int:
+        """Merge runs of sealed segments into gzipped segments of up to
+        MERGE_FACTOR * segment_bytes; returns how many files were written."""
+        with self._compact_lock:
+            manifest = self._current()
+            if manifest is None:
+                return 0
+            written = 0
+            for group in self._merge_groups(manifest["segments"]):
+                if self._merge(group):
+                    written += 1
+            self._delete_retired()
+            self.compactions += written
+            return written
+
+    def _merge_groups(self, segments: list) -> list:
+        """Runs of neighbouring sealed segments worth rewriting: several small ones, or one still uncompressed."""
+        limit = MERGE_FACTOR * self.segment_bytes
+        groups, group, size = [], [], 0
+        for segment in segments:
+            if group and size + segment["bytes"] > limit:
+                groups.append(group)
+                group, size = [], 0
+            group.append(segment)
+            size += segment["bytes"]
+        if group:
+            groups.append(group)
+        return [group for group in groups if len(group) > 1 or not group[0]["compressed"]]
+
+    def _merge(self, group: list) -> bool:
+        """Write `group` as one gzipped segment (plus its block index), then swap it into the manifest."""
+        first, last = group[0], group[-1]
+        name = f"segment-{first['first_row']:012d}-{last['first_row'] + last['rows'] - 1:012d}.csv.gz"
+        path = self.directory / name
+        merged = {
+            "file": name, "first_row": first["first_row"], "rows": 0, "bytes": 0,
+            "min_ts": None, "max_ts": None, "patients": {}, "parts": {}, "compressed": True,
+        }
+        index = {"blocks": [], "patients": {}}  # compressed offset of each block; patient -> block numbers
+        low = high = None
+        tmp_path = path.with_name(f"{name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as out:
+            out.write(gzip.compress((",".join(self.fieldnames) + "\n").encode()))
+            block, in_block = [], set()
+
+            def flush():
+                index["blocks"].append(out.tell())
+                for patient_id in in_block:
+                    index["patients"].setdefault(patient_id, []).append(len(index["blocks"]) - 1)
+                out.write(gzip.compress(b"".join(block), compresslevel=6))
+                block.clear()
+                in_block.clear()
+
+            size = 0
+            for segment in group:
+                for part, offset in segment["parts"].items():
+                    merged["parts"][part] = merged["bytes"] + offset
+                with self._open(segment) as f:
+                    f.seek(self.header_len)
+                    for line in f:
+                        patient_id, timestamp, _ = line.split(b",", 2)
+                        micros = to_micros(timestamp.decode())
+                        low = micros if low is None or micros < low else low
+                        high = micros if high is None or micros > high else high
+                        block.append(line)
+                        in_block.add(patient_id.decode())
+                        size += len(line)
+                        if size >= BLOCK_BYTES:
+                            flush()
+                            size = 0
+                for patient_id, count in segment["patients"].items():
+                    merged["patients"][patient_id] = merged["patients"].get(patient_id, 0) + count
+                merged["rows"] += segment["rows"]
+                merged["bytes"] += segment["bytes"]
+            if block:
+                flush()
+        merged["min_ts"], merged["max_ts"] = low, high
+        index_tmp = Path(str(tmp_path) + INDEX_SUFFIX)
+        with open(index_tmp, 'w') as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(index_tmp, str(path) + INDEX_SUFFIX)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            manifest = self._current()
+            files = [segment["file"] for segment in manifest["segments"]]
+            names = [segment["file"] for segment in group]
+            if names[0] not in files or files[files.index(names[0]):files.index(names[0]) + len(names)] != names:
+                if name not in files:  # another process compacted these differently first
+                    _remove_quietly(path)
+                    _remove_quietly(Path(str(path) + INDEX_SUFFIX))
+                return False
+            i = files.index(names[0])
+            segments = manifest["segments"][:i] + [merged] + manifest["segments"][i + len(names):]
+            retired = manifest["retired"] + [{"file": name, "at": time.time()} for name in names]
+            self._write_manifest(dict(manifest, segments=segments, retired=retired))
+        return True
+
+    def _delete_retired(self):
+        manifest = self._current()
+        now = time.time()
+        if not any(now - entry["at"] >= RETIRE_GRACE_SECONDS for entry in manifest["retired"]):
+            return
+        with self._lock:
+            manifest = self._current()
+            keep = []
+            for entry in manifest["retired"]:
+                if now - entry["at"] < RETIRE_GRACE_SECONDS:
+                    keep.append(entry)
+                    continue
+                path = self.directory / entry["file"]
+                drop_vitals_index(path)
+                self._blocks.pop(entry["file"], None)
+                for stale in (path, Path(str(path) + INDEX_SUFFIX), Path(str(path) + LOCK_SUFFIX)):
+                    _remove_quietly(stale)
+            self._write_manifest(dict(manifest, retired=keep))
+
+    def start_compactor(self, interval: float = 60):
+        """Compact every `interval` seconds, and soon after each rotation, on a daemon thread."""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._stop.clear()
+        self._compactor = threading.Thread(target=self._run_compactor, args=(interval,),
+                                           name="vitals-compactor", daemon=True)
+        self._compactor.start()
+
+    def stop_compactor(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._compactor is not None:
+            self._compactor.join(timeout)
+            self._compactor = None
+
+    def _run_compactor(self, interval: float):
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.compact()
+            except Exception:
+                logger.exception("segment compaction failed")
+
+
+def _remove_quietly(path: Path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
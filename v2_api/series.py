@@ -0,0 +1,131 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+from array import array
+from datetime import datetime, timedelta
+
+# -------------------------
+# GLOBALS
+# -------------------------
+EPOCH = datetime(1970, 1, 1)  # timestamps are naive local time, stored as microseconds from this
+
+# Numeric vitals kept as array('d'); news2_score is an integer column
+VITAL_COLUMNS = ("bp_systolic", "bp_diastolic", "heart_rate", "respiratory_rate", "temperature", "oxygen_sats")
+FLOAT_COLUMNS = ("temperature",)  # written with repr(float), e.g. "37.0"
+NAN = float("nan")
+
+# -------------------------
+# HELPERS
+# -------------------------
+def to_micros(timestamp: str) -> int:
+    delta = datetime.fromisoformat(timestamp) - EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+def from_micros(micros: int) -> datetime:
+    return EPOCH + timedelta(microseconds=micros)
+
+def _parse_number(value) -> float:
+    return NAN if value is None or value == "" else float(value)
+
+def _format_number(value: float, as_float: bool) -> str:
+    """Inverse of _parse_number for values written by csv.DictWriter."""
+    if value != value:  # NaN: the cell was empty
+        return ""
+    if as_float or not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+# -------------------------
+# COLUMN-ORIENTED SERIES
+# -------------------------
+class VitalsSeries:
+    """One patient's readings as parallel typed columns, parsed once at load.
+
+    Instead of a dict of ~10 strings per reading, each column is a compact
+    array: timestamps as int64 microseconds, news2_score as int64, the numeric
+    vitals as float64 (NaN for a missing value) and LOC as small integer codes.
+    `row(i)` / `to_rows()` give back the exact strings the CSV holds, so JSON
+    built from a series matches JSON built from csv.DictReader.
+    """
+
+    __slots__ = ("patient_id", "timestamps", "news2_score", "loc_codes", "loc_labels") + VITAL_COLUMNS
+
+    def __init__(self, patient_id: str):
+        self.patient_id = patient_id
+        self.timestamps = array('q')
+        self.news2_score = array('q')
+        for name in VITAL_COLUMNS:
+            setattr(self, name, array('d'))
+        self.loc_codes = array('B')
+        self.loc_labels = []  # distinct LOC strings, e.g. ["Yes", "No/Unsure"]
+
+    @classmethod
+    def from_rows(cls, patient_id: str, rows) -> "VitalsSeries":
+        series = cls(patient_id)
+        # Bind the column appends once; this loop is the whole load cost
+        append_ts, append_score = series.timestamps.append, series.news2_score.append
+        vital_appends = [(name, getattr(series, name).append) for name in VITAL_COLUMNS]
+        append_code, labels = series.loc_codes.append, series.loc_labels
+        codes = {}
+        for row in rows:
+            append_ts(to_micros(row["timestamp"]))
+            append_score(int(row["news2_score"]))
+            for name, append in vital_appends:
+                append(_parse_number(row[name]))
+            loc = "" if row["loc"] is None else row["loc"]
+            code = codes.get(loc)
+            if code is None:
+                code = codes[loc] = len(labels)
+                labels.append(loc)
+            append_code(code)
+        return series
+
+    def append_row(self, row: dict):
+        """Parse one CSV-style row (strings or numbers) onto the end of the columns."""
+        self.timestamps.append(to_micros(row["timestamp"]))
+        self.news2_score.append(int(row["news2_score"]))
+        for name in VITAL_COLUMNS:
+            getattr(self, name).append(_parse_number(row[name]))
+        loc = "" if row["loc"] is None else row["loc"]
+        try:
+            code = self.loc_labels.index(loc)
+        except ValueError:
+            code = len(self.loc_labels)
+            self.loc_labels.append(loc)
+        self.loc_codes.append(code)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def column(self, name: str):
+        """Return the typed column for a CSV field name."""
+        if name == "timestamp":
+            return self.timestamps
+        return getattr(self, name)
+
+    def datetimes(self) -> list:
+        return [from_micros(t) for t in self.timestamps]
+
+    def row(self, i: int) -> dict:
+        """Reading i as the dict of strings csv.DictReader would return."""
+        row = {
+            "patient_id": self.patient_id,
+            "timestamp": from_micros(self.timestamps[i]).isoformat(),
+            "news2_score": str(self.news2_score[i]),
+        }
+        for name in VITAL_COLUMNS:
+            row[name] = _format_number(getattr(self, name)[i], name in FLOAT_COLUMNS)
+        row["loc"] = self.loc_labels[self.loc_codes[i]]
+        return row
+
+    def take(self, indices) -> "VitalsSeries":
+        """A new series holding only the readings at `indices`, in that order."""
+        series = VitalsSeries(self.patient_id)
+        for name in ("timestamps", "news2_score", "loc_codes") + VITAL_COLUMNS:
+            column = getattr(self, name)
+            getattr(series, name).extend(column[i] for i in indices)
+        series.loc_labels.extend(self.loc_labels)
+        return series
+
+    def to_rows(self) -> list:
+        return [self.row(i) for i in range(len(self))]
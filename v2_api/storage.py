@@ -0,0 +1,280 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import csv
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from v2_api.patient_index import get_patient_index
+from v2_api.vitals_index import get_vitals_index
+
+# -------------------------
+# STORAGE BACKENDS
+# -------------------------
+# Every backend exposes the same calls:
+#   init()                                   -> create files/tables if missing (app startup; constructors touch nothing)
+#   get_or_create_patient(patient_name, dob) -> (patient_id, created)
+#   get_or_create_patients([(name, dob), ...]) -> [(patient_id, created), ...] in one pass
+#   patients()                               -> [(patient_id, patient_name, dob), ...] for every patient
+#   append(row) / append_many(rows)          -> rows keyed by the CSV columns
+#   load(patient_id)                         -> list of dicts of strings, as csv.DictReader returns them
+#   load_tail(patient_id, skip)              -> the patient's rows after the first `skip`, in insertion order
+#   iter_rows(patient_id)                    -> the patient's rows in timestamp order (ties in insertion order),
+#                                               one row read at a time (streaming)
+#   iter_all_rows()                          -> every patient's rows in insertion order, one pass (startup rebuilds)
+#   read_since(position)                     -> (rows stored after `position`, new position); None = from the start
+#   data_version(patient_id)                 -> cheap token that changes whenever the patient gets a row
+#   sync()                                   -> force appended rows to disk (fsync)
+# so callers (and the JSON they return) don't care which one is configured.
+
+class CSVStorage:
+    """The original flat-file layout: patient_mapping.csv + vitals.csv."""
+
+    name = "csv"
+
+    def __init__(self, vitals_path, mapping_path, fieldnames):
+        self.vitals_path = Path(vitals_path)
+        self.mapping_path = Path(mapping_path)
+        self.fieldnames = list(fieldnames)
+
+    def init(self):
+        get_patient_index(self.mapping_path).refresh()                 # patient_mapping.csv + header
+        get_vitals_index(self.vitals_path, self.fieldnames).refresh()  # vitals.csv + header + .idx
+
+    def get_or_create_patient(self, patient_name: str, dob: str) -> tuple:
+        return get_patient_index(self.mapping_path).get_or_create(patient_name, dob)
+
+    def get_or_create_patients(self, identities) -> list:
+        return get_patient_index(self.mapping_path).get_or_create_many(identities)
+
+    def patients(self) -> list:
+        return get_patient_index(self.mapping_path).patients()
+
+    def append(self, row: dict):
+        get_vitals_index(self.vitals_path, self.fieldnames).append(row)
+
+    def append_many(self, rows):
+        get_vitals_index(self.vitals_path, self.fieldnames).append_many(rows)
+
+    def load(self, patient_id: str) -> list:
+        if not self.vitals_path.exists():
+            return []
+        return get_vitals_index(self.vitals_path, self.fieldnames).load(patient_id)
+
+    def load_tail(self, patient_id: str, skip: int) -> list:
+        if not self.vitals_path.exists():
+            return []
+        return get_vitals_index(self.vitals_path, self.fieldnames).load(patient_id, skip)
+
+    def iter_rows(self, patient_id: str):
+        if not self.vitals_path.exists():
+            return iter(())
+        return get_vitals_index(self.vitals_path, self.fieldnames).iter_rows_by_time(patient_id)
+
+    def iter_all_rows(self):
+        if not self.vitals_path.exists():
+            return iter(())
+        return get_vitals_index(self.vitals_path, self.fieldnames).iter_all()
+
+    def read_since(self, position):
+        # position = byte offset in vitals.csv
+        if not self.vitals_path.exists():
+            return iter(()), None
+        return get_vitals_index(self.vitals_path, self.fieldnames).read_since(position)
+
+    def data_version(self, patient_id: str) -> tuple:
+        if not self.vitals_path.exists():
+            return (0, -1)
+        return get_vitals_index(self.vitals_path, self.fieldnames).version(patient_id)
+
+    def sync(self):
+        if self.vitals_path.exists():
+            with open(self.vitals_path, 'ab') as f:
+                os.fsync(f.fileno())
+
+
+class SQLiteStorage:
+    """stdlib sqlite3 store in WAL mode, indexed on (patient_id, timestamp) and news2_score."""
+
+    name = "sqlite"
+
+    # Column affinities; everything is handed back as strings to match the CSV backend
+    COLUMN_TYPES = {
+        "patient_id": "INTEGER NOT NULL", "timestamp": "TEXT NOT NULL", "news2_score": "INTEGER",
+        "bp_systolic": "INTEGER", "bp_diastolic": "INTEGER", "heart_rate": "INTEGER",
+        "respiratory_rate": "INTEGER", "temperature": "REAL", "oxygen_sats": "INTEGER", "loc": "TEXT",
+    }
+
+    def __init__(self, db_path, fieldnames):
+        self.db_path = Path(db_path)
+        self.fieldnames = list(fieldnames)
+        self._local = threading.local()  # sqlite3 connections are per-thread
+        self._insert_sql = (
+            f"INSERT INTO vitals ({', '.join(self.fieldnames)}) "
+            f"VALUES ({', '.join('?' for _ in self.fieldnames)})"
+        )
+        self._select_sql = (
+            f"SELECT {', '.join(self.fieldnames)} FROM vitals "
+            "WHERE patient_id = ? ORDER BY timestamp, id"
+        )
+        self._tail_sql = (
+            f"SELECT {', '.join(self.fieldnames)} FROM vitals "
+            "WHERE patient_id = ? ORDER BY id LIMIT -1 OFFSET ?"
+        )
+        self._schema_ready = False  # the database is created on first connection, not here
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            if not self._schema_ready:
+                self._create_schema(conn)
+                self._schema_ready = True
+        return conn
+
+    def init(self):
+        self._connect()
+
+    def _create_schema(self, conn):
+        columns = ", ".join(f"{name} {self.COLUMN_TYPES.get(name, 'TEXT')}" for name in self.fieldnames)
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS patients ("
+                "patient_id INTEGER PRIMARY KEY, patient_name TEXT NOT NULL, dob TEXT NOT NULL, "
+                "UNIQUE (patient_name, dob))"
+            )
+            conn.execute(f"CREATE TABLE IF NOT EXISTS vitals (id INTEGER PRIMARY KEY, {columns})")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_vitals_patient_ts ON vitals (patient_id, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_vitals_news2 ON vitals (news2_score)")
+
+    def get_or_create_patient(self, patient_name: str, dob: str) -> tuple:
+        return self.get_or_create_patients([(patient_name, dob)])[0]
+
+    def get_or_create_patients(self, identities) -> list:
+        results = []
+        with self._connect() as conn:  # one transaction for the whole batch
+            for patient_name, dob in identities:
+                patient_name, dob = patient_name.strip().lower(), dob.strip()
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO patients (patient_name, dob) VALUES (?, ?)", (patient_name, dob)
+                )
+                created = cur.rowcount == 1
+                (patient_id,) = conn.execute(
+                    "SELECT patient_id FROM patients WHERE patient_name = ? AND dob = ?", (patient_name, dob)
+                ).fetchone()
+                results.append((str(patient_id), created))
+        return results
+
+    def patients(self) -> list:
+        cur = self._connect().execute("SELECT patient_id, patient_name, dob FROM patients ORDER BY patient_id")
+        return [(str(patient_id), patient_name, dob) for patient_id, patient_name, dob in cur]
+
+    def append(self, row: dict):
+        self.append_many([row])
+
+    def append_many(self, rows):
+        with self._connect() as conn:
+            conn.executemany(self._insert_sql, ([row.get(name) for name in self.fieldnames] for row in rows))
+
+    def load(self, patient_id: str) -> list:
+        return self._rows(self._connect().execute(self._select_sql, (patient_id,)))
+
+    def load_tail(self, patient_id: str, skip: int) -> list:
+        return self._rows(self._connect().execute(self._tail_sql, (patient_id, skip)))
+
+    def iter_rows(self, patient_id: str):
+        return self._iter(self._select_sql, (patient_id,))
+
+    def iter_all_rows(self):
+        return self._iter(f"SELECT {', '.join(self.fieldnames)} FROM vitals ORDER BY id", ())
+
+    def read_since(self, position):
+        # position = last vitals.id seen
+        (last_id,) = self._connect().execute("SELECT MAX(id) FROM vitals").fetchone()
+        last_id = last_id or 0
+        start = position if position is not None and position <= last_id else 0
+        sql = f"SELECT {', '.join(self.fieldnames)} FROM vitals WHERE id > ? AND id <= ? ORDER BY id"
+        return self._iter(sql, (start, last_id)), last_id
+
+    def _iter(self, sql: str, params: tuple):
+        # Its own connection: a streamed response may resume the generator on
+        # a different worker thread, and one read transaction gives a snapshot
+        self._connect()  # make sure the schema exists
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        try:
+            for values in conn.execute(sql, params):
+                yield self._row(values)
+        finally:
+            conn.close()
+
+    def _row(self, values) -> dict:
+        return {name: "" if value is None else str(value) for name, value in zip(self.fieldnames, values)}
+
+    def _rows(self, cur) -> list:
+        return [self._row(values) for values in cur]
+
+    def data_version(self, patient_id: str) -> tuple:
+        count, last_id = self._connect().execute(
+            "SELECT COUNT(*), MAX(id) FROM vitals WHERE patient_id = ?", (patient_id,)
+        ).fetchone()
+        return (count, -1 if last_id is None else last_id)
+
+    def sync(self):
+        # synchronous=NORMAL only syncs the WAL at checkpoints: force one
+        self._connect().execute("PRAGMA wal_checkpoint(FULL)")
+
+
+# -------------------------
+# MIGRATION
+# -------------------------
+def migrate_csv_to_sqlite(vitals_csv, mapping_csv, db_path, fieldnames) -> dict:
+    """Copy patient_mapping.csv and vitals.csv into a SQLite store, keeping patient IDs."""
+    store = SQLiteStorage(db_path, fieldnames)
+    conn = store._connect()
+    if conn.execute("SELECT 1 FROM vitals LIMIT 1").fetchone():
+        raise ValueError(f"{db_path} already contains readings; migrate into a fresh database.")
+    counts = {"patients": 0, "vitals": 0}
+
+    if Path(mapping_csv).exists():
+        with open(mapping_csv, 'r', newline='') as f, conn:
+            rows = [
+                (int(row['patient_id']), row['patient_name'].strip().lower(), row['dob'].strip())
+                for row in csv.DictReader(f) if row.get('patient_id')
+            ]
+            conn.executemany("INSERT OR IGNORE INTO patients (patient_id, patient_name, dob) VALUES (?, ?, ?)", rows)
+            counts["patients"] = len(rows)
+
+    if Path(vitals_csv).exists():
+        with open(vitals_csv, 'r', newline='') as f:
+            reader = csv.DictReader(f)
+            batch = []
+            for row in reader:
+                if not row.get('patient_id'):
+                    continue
+                batch.append(row)
+                if len(batch) >= 10_000:
+                    store.append_many(batch)
+                    counts["vitals"] += len(batch)
+                    batch = []
+            store.append_many(batch)
+            counts["vitals"] += len(batch)
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+    from v2_api.vitals_tracker_v2 import CSVNAMES, DB_FILE, MAPPING_FILE, VITALS_FILE
+
+    parser = argparse.ArgumentParser(description="One-shot migration of the CSV files into SQLite.")
+    parser.add_argument("--vitals", default=VITALS_FILE, help="source vitals CSV")
+    parser.add_argument("--mapping", default=MAPPING_FILE, help="source patient mapping CSV")
+    parser.add_argument("--db", default=DB_FILE, help="target SQLite database")
+    args = parser.parse_args()
+
+    counts = migrate_csv_to_sqlite(args.vitals, args.mapping, args.db, CSVNAMES)
+    print(f"Migrated {counts['patients']} patients and {counts['vitals']} readings into {args.db}")
@@ -0,0 +1,239 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import threading
+from collections import deque
+
+from v2_api.series import VITAL_COLUMNS, from_micros, to_micros
+
+# -------------------------
+# GLOBALS
+# -------------------------
+SUMMARY_FIELDS = ("news2_score",) + VITAL_COLUMNS
+MICROS_PER_HOUR = 3_600 * 1_000_000
+
+# -------------------------
+# HELPERS
+# -------------------------
+def _parse_value(value):
+    """A stored cell as int or float (as written), or None when the reading is missing."""
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+# -------------------------
+# RUNNING AGGREGATES
+# -------------------------
+class WindowStat:
+    """Mean, min, max and least-squares slope of (time, value) points in a sliding time window.
+
+    Points arrive in time order. Sums for the mean and slope are kept
+    running; min/max use monotonic deques. Adding a point and evicting old
+    ones are amortised O(1).
+    """
+
+    __slots__ = ("points", "mins", "maxs", "origin", "n", "st", "sy", "stt", "sty")
+
+    def __init__(self):
+        self.points = deque()  # (micros, value), oldest first
+        self.mins = deque()    # increasing values: mins[0] is the window minimum
+        self.maxs = deque()    # decreasing values: maxs[0] is the window maximum
+        self._reset()
+
+    def _reset(self):
+        self.origin = None  # sums use hours from here, which keeps them small
+        self.n = 0
+        self.st = self.sy = self.stt = self.sty = 0.0
+
+    def add(self, micros: int, value):
+        if self.origin is None:
+            self.origin = micros
+        t = (micros - self.origin) / MICROS_PER_HOUR
+        self.points.append((micros, value))
+        self.n += 1
+        self.st += t
+        self.sy += value
+        self.stt += t * t
+        self.sty += t * value
+        while self.mins and self.mins[-1][1] > value:
+            self.mins.pop()
+        self.mins.append((micros, value))
+        while self.maxs and self.maxs[-1][1] < value:
+            self.maxs.pop()
+        self.maxs.append((micros, value))
+
+    def evict(self, before: int):
+        """Drop points older than `before` (micros)."""
+        points = self.points
+        while points and points[0][0] < before:
+            micros, value = points.popleft()
+            t = (micros - self.origin) / MICROS_PER_HOUR
+            self.n -= 1
+            self.st -= t
+            self.sy -= value
+            self.stt -= t * t
+            self.sty -= t * value
+        if not points:
+            self._reset()  # start the sums afresh rather than carry rounding error
+        while self.mins and self.mins[0][0] < before:
+            self.mins.popleft()
+        while self.maxs and self.maxs[0][0] < before:
+            self.maxs.popleft()
+
+    def slope(self):
+        """Least-squares change per hour, or None with fewer than two distinct times."""
+        denominator = self.n * self.stt - self.st * self.st
+        if self.n < 2 or denominator <= 1e-12:
+            return None
+        return (self.n * self.sty - self.st * self.sy) / denominator
+
+    def to_dict(self) -> dict:
+        if not self.n:
+            return {"count": 0, "mean": None, "min": None, "max": None, "slope_per_hour": None}
+        return {
+            "count": self.n,
+            "mean": self.sy / self.n,
+            "min": self.mins[0][1],
+            "max": self.maxs[0][1],
+            "slope_per_hour": self.slope(),
+        }
+
+
+class PatientSummary:
+    """All-time count/sum/min/max/last and a windowed WindowStat for NEWS2 and each vital."""
+
+    def __init__(self, patient_id: str, window_hours: float):
+        self.patient_id = patient_id
+        self.window = int(window_hours * MICROS_PER_HOUR)
+        self.rows = 0          # stored rows folded in, in insertion order (for load_tail)
+        self.version = None    # storage data_version when last caught up
+        self.latest = None     # micros of the newest reading
+        self.totals = {name: [0, 0, None, None, None] for name in SUMMARY_FIELDS}  # count, sum, min, max, last
+        self.windows = {name: WindowStat() for name in SUMMARY_FIELDS}
+
+    def add_row(self, row: dict) -> bool:
+        """Fold in one stored row. False if it is an out-of-order reading inside the window
+        (the window can't take it in O(1): the caller rebuilds this patient instead)."""
+        micros = to_micros(row["timestamp"])
+        in_order = self.latest is None or micros >= self.latest
+        if not in_order and micros >= self.latest - self.window:
+            return False
+        self.rows += 1
+        for name in SUMMARY_FIELDS:
+            value = _parse_value(row[name])
+            if value is None:
+                continue
+            total = self.totals[name]
+            total[0] += 1
+            total[1] += value
+            total[2] = value if total[2] is None else min(total[2], value)
+            total[3] = value if total[3] is None else max(total[3], value)
+            if in_order:  # a backfilled reading older than the window changes only the totals
+                total[4] = value
+                self.windows[name].add(micros, value)
+        if in_order:
+            self.latest = micros
+            for window in self.windows.values():
+                window.evict(micros - self.window)
+        return True
+
+    def to_dict(self) -> dict:
+        latest = from_micros(self.latest)
+        vitals = {}
+        for name in SUMMARY_FIELDS:
+            count, total, low, high, last = self.totals[name]
+            vitals[name] = {
+                "count": count, "sum": total, "min": low, "max": high, "last": last,
+                "window": self.windows[name].to_dict(),
+            }
+        return {
+            "patient_id": self.patient_id,
+            "readings": self.rows,
+            "latest_timestamp": latest.isoformat(),
+            "latest_news2_score": self.totals["news2_score"][4],
+            "window_hours": self.window / MICROS_PER_HOUR,
+            "window_start": from_micros(self.latest - self.window).isoformat(),
+            "vitals": vitals,
+        }
+
+
+class SummaryStore:
+    """PatientSummary per patient, kept in step with storage one new row at a time.
+
+    rebuild() fills every patient in a single pass over storage (app
+    startup). get() asks the backend for its cheap data_version and folds in
+    only rows stored since the last call (load_tail), so rows written by the
+    CLI or other worker processes count too and a read never re-reads the
+    whole history. A backfilled reading inside a patient's window, or rows
+    that went away, rebuild just that patient.
+    """
+
+    def __init__(self, window_hours: float = 24):
+        self.window_hours = window_hours
+        self._summaries = {}      # (store id, patient_id) -> PatientSummary
+        self._patient_locks = {}  # (store id, patient_id) -> Lock held while that summary is read/updated
+        self._lock = threading.Lock()  # guards the two dicts only, never held across storage reads
+
+    def _build(self, store, patient_id: str) -> PatientSummary:
+        summary = PatientSummary(patient_id, self.window_hours)
+        rows = store.load(patient_id)
+        for row in sorted(rows, key=lambda row: to_micros(row["timestamp"])):
+            summary.add_row(row)
+        return summary
+
+    def rebuild(self, store):
+        """Recompute every patient's summary from storage in one pass."""
+        summaries, redo = {}, set()
+        for row in store.iter_all_rows():
+            patient_id = row["patient_id"]
+            summary = summaries.get(patient_id)
+            if summary is None:
+                summary = summaries[patient_id] = PatientSummary(patient_id, self.window_hours)
+            if not summary.add_row(row):
+                redo.add(patient_id)
+        for patient_id in redo:
+            summaries[patient_id] = self._build(store, patient_id)
+        with self._lock:
+            for key in [key for key in self._summaries if key[0] == id(store)]:
+                del self._summaries[key]
+            self._summaries.update(((id(store), patient_id), s) for patient_id, s in summaries.items())
+
+    def _patient_lock(self, key) -> threading.Lock:
+        with self._lock:
+            lock = self._patient_locks.get(key)
+            if lock is None:
+                lock = self._patient_locks[key] = threading.Lock()
+            return lock
+
+    def get(self, store, patient_id: str):
+        """The patient's summary as a dict (see PatientSummary.to_dict), or None if they have no readings.
+
+        Storage is read under the patient's own lock, so rebuilding one
+        patient's summary never holds up another patient's.
+        """
+        key = (id(store), patient_id)
+        version = store.data_version(patient_id)
+        with self._patient_lock(key):
+            with self._lock:
+                summary = self._summaries.get(key)
+            if summary is not None and summary.version == version:
+                return summary.to_dict() if summary.rows else None
+            if summary is not None and version[0] >= summary.rows:
+                for row in store.load_tail(patient_id, summary.rows):
+                    if not summary.add_row(row):
+                        summary = self._build(store, patient_id)
+                        break
+            else:  # first read, or rows went away (file rewritten): start again
+                summary = self._build(store, patient_id)
+            summary.version = version
+            with self._lock:
+                self._summaries[key] = summary
+            return summary.to_dict() if summary.rows else None
+
+    def invalidate(self):
+        with self._lock:
+            self._summaries.clear()
+            self._patient_locks.clear()
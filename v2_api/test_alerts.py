@@ -0,0 +1,72 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api.alerts import AlertBroker, sse_stream
+
+NORMAL = {
+    "Blood pressure": {"systolic": 120, "diastolic": 80}, "Heart rate": 75, "Respiratory rate": 16,
+    "Temperature": 37.0, "Oxygen saturations": 98, "Level of consciousness (fully awake and responsive?)": "Yes"
+}
+SEVERE_HR = dict(NORMAL, **{"Heart rate": 135})                                  # NEWS2 3, one Severe Alert
+UNWELL = dict(NORMAL, **{"Respiratory rate": 22, "Temperature": 38.5, "Heart rate": 120,
+                         "Oxygen saturations": 94})                              # NEWS2 5, no Severe Alert
+
+@pytest.fixture
+def storage_paths(data_paths, monkeypatch):
+    monkeypatch.setattr(v2, "alert_broker", AlertBroker(5, ["Severe Alert"], buffer_size=10))
+    return data_paths
+
+
+def test_readings_reach_only_matching_subscribers(storage_paths):
+    by_default = v2.alert_broker.subscribe()
+    score_only = v2.alert_broker.subscribe(min_score=5, levels=[])
+    v2.add_vitals("Calm Patient", "01/01/00", NORMAL)
+    v2.add_vitals("Fast Heart", "02/02/02", SEVERE_HR)
+    v2.add_vitals_batch([{"patient_name": "Unwell Patient", "dob": "03/03/03", "vitals": UNWELL}])
+
+    events, dropped = by_default.drain()
+    assert [e["patient_id"] for e in events] == ["2", "3"] and dropped == 0
+    assert events[0]["levels"] == {"Heart rate": "Severe Alert"}
+    assert events[1]["total_news2_score"] == 5
+    assert [e["patient_id"] for e in score_only.drain()[0]] == ["3"]
+
+
+def test_slow_subscriber_drops_oldest_without_stalling_ingest(storage_paths):
+    stuck = v2.alert_broker.subscribe(min_score=0)  # never drained
+    start = time.perf_counter()
+    for i in range(5000):
+        v2.alert_broker.publish({"patient_id": str(i), "total_news2_score": 9, "levels": {}})
+    assert time.perf_counter() - start < 1.0
+    events, dropped = stuck.drain()
+    assert len(events) == 10 and dropped == 4990
+    assert events[-1]["patient_id"] == "4999"
+    v2.alert_broker.unsubscribe(stuck)
+    assert not v2.alert_broker.has_subscribers()
+
+
+def test_sse_stream_pushes_events_published_from_other_threads():
+    broker = AlertBroker(5, ["Severe Alert"], buffer_size=10)
+
+    async def collect():
+        subscription = broker.subscribe()
+        checks = iter([False, False, False, True])
+        async def is_disconnected():
+            return next(checks)
+        stream = sse_stream(broker, subscription, is_disconnected, keepalive=0.05)
+        chunks = [await stream.__anext__()]  # ": connected"
+        threading.Timer(0.01, broker.publish, [{"patient_id": "7", "total_news2_score": 6, "levels": {}}]).start()
+        chunks += [chunk async for chunk in stream]
+        return chunks
+
+    chunks = asyncio.run(collect())
+    assert chunks[0] == ": connected\n\n"
+    alert = next(chunk for chunk in chunks if chunk.startswith("id:"))
+    lines = alert.strip().split("\n")
+    assert lines[:2] == ["id: 1", "event: alert"]
+    assert json.loads(lines[2][len("data: "):])["patient_id"] == "7"
+    assert not broker.has_subscribers()  # unsubscribed when the client went away
@@ -1,4 +1,5 @@
 from fastapi.testclient import TestClient
+import v2_api.vitals_tracker_v2 as v2
 from v2_api.app import app
 
 client = TestClient(app)
@@ -31,4 +32,53 @@ def test_add_vitals_and_fetch():
     patient_id = data["patient_id"]
     response = client.get(f"/patient/{patient_id}")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
\ No newline at end of file
+    assert isinstance(response.json(), list)
+
+
+def test_add_vitals_batch_matches_single_endpoint(data_paths):
+    vitals_payload = {
+        "Blood pressure": {"systolic": 95, "diastolic": 105},
+        "Heart rate": 120,
+        "Respiratory rate": 22,
+        "Temperature": 38.5,
+        "Oxygen saturations": 93,
+        "Level of consciousness (fully awake and responsive?)": "No/Unsure"
+    }
+    single = client.post("/add_vitals/?patient_name=Test Patient&dob=01/01/00", json=vitals_payload).json()
+
+    response = client.post("/add_vitals/batch", json=[
+        {"patient_name": "Test Patient", "dob": "01/01/00", "vitals": vitals_payload},
+        {"patient_name": "Bad Dob", "dob": "31/02/00", "vitals": vitals_payload},
+        {"patient_name": "Other Patient", "dob": "02/02/02", "vitals": vitals_payload,
+         "timestamp": "2025-01-01T08:00:00"},
+    ])
+    assert response.status_code == 200
+    first, rejected, third = response.json()
+    assert first == single
+    assert rejected["status_code"] == 400
+    assert third["patient_id"] == "2"
+
+    history = client.get(f"/patient/{third['patient_id']}").json()
+    assert history[0]["timestamp"] == "2025-01-01T08:00:00"
+    assert len(client.get("/patient/1").json()) == 2
+
+
+def test_vitals_outside_the_storable_range_are_rejected(data_paths):
+    vitals_payload = {
+        "Blood pressure": {"systolic": 120, "diastolic": 80},
+        "Heart rate": 40000,
+        "Respiratory rate": 18,
+        "Temperature": 37.0,
+        "Oxygen saturations": 98,
+        "Level of consciousness (fully awake and responsive?)": "Yes"
+    }
+    assert client.post("/add_vitals/?patient_name=Test Patient&dob=01/01/00", json=vitals_payload).status_code == 422
+    response = client.post("/add_vitals/batch", json=[{"patient_name": "Test Patient", "dob": "01/01/00", "vitals": vitals_payload}])
+    assert response.status_code == 422
+
+    results = v2.add_vitals_batch([
+        {"patient_name": "Test Patient", "dob": "01/01/00", "vitals": vitals_payload},
+        {"patient_name": "Test Patient", "dob": "01/01/00", "vitals": dict(vitals_payload, **{"Heart rate": 75.5})},
+    ])
+    assert [result["status_code"] for result in results] == [400, 400]
+    assert client.get("/patient/1").json() == []
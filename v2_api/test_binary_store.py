@@ -0,0 +1,99 @@
+import csv
+import mmap
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api.binary_store import RECORD, BinaryStorage, binary_to_csv, csv_to_binary, pack_row, vital_column
+from v2_api.series import VitalsSeries
+
+START = datetime(2025, 1, 1, 8, 30, 0, 250000)
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "patient_id": str(rng.randint(1, 6)), "timestamp": (START + timedelta(minutes=rng.randint(0, 600))).isoformat(),
+        "news2_score": str(rng.randint(0, 12)), "bp_systolic": str(rng.randint(85, 180)),
+        "bp_diastolic": str(rng.randint(50, 100)), "heart_rate": str(rng.randint(45, 140)),
+        "respiratory_rate": str(rng.randint(10, 28)), "temperature": rng.choice(["36.5", "37.0", "38.2", ""]),
+        "oxygen_sats": "" if rng.random() < 0.2 else str(rng.randint(88, 100)),
+        "loc": rng.choice(["Yes", "Yes", "No/Unsure"]),
+    } for _ in range(n)]
+
+@pytest.fixture
+def store(tmp_path):
+    store = BinaryStorage(tmp_path / "vitals.bin", tmp_path / "patient_mapping.csv", v2.CSVNAMES)
+    store.init()
+    return store
+
+
+def test_records_are_a_zero_copy_view_of_the_mapped_file(store):
+    rows = make_rows(50)
+    store.append_many(rows)
+    records = store.records()
+    assert records.dtype.itemsize == RECORD.size == 32
+    assert isinstance(records.base.obj, mmap.mmap)  # a view over the map, not a copy
+    assert (store.path.stat().st_size - 32) == len(records) * 32
+    assert records["patient_id"].tolist() == [int(row["patient_id"]) for row in rows]
+
+    store.append_many(make_rows(5, seed=1))  # the file grew: re-mapped, only the new records indexed
+    assert len(store.records()) == 55
+    for patient_id in map(str, range(1, 7)):
+        expected = [row for row in rows + make_rows(5, seed=1) if row["patient_id"] == patient_id]
+        assert store.load(patient_id) == expected
+        assert store.load_tail(patient_id, 2) == expected[2:]
+        assert store.data_version(patient_id)[0] == len(expected)
+
+
+def test_series_and_batch_scoring_work_off_the_records(store):
+    rows = make_rows(200)
+    store.append_many(rows)
+    for patient_id in map(str, range(1, 7)):
+        mine = sorted((row for row in rows if row["patient_id"] == patient_id), key=lambda row: row["timestamp"])
+        assert store.load_series(patient_id).to_rows() == VitalsSeries.from_rows(patient_id, mine).to_rows()
+
+    records = store.records()
+    columns = {name: vital_column(records, name) for name in v2.COLUMN_THRESHOLDS}
+    _, totals = v2.score_news2_batch(columns)
+    expected = [v2.compute_news2_score({
+        "Blood pressure": {"systolic": int(row["bp_systolic"]), "diastolic": int(row["bp_diastolic"])},
+        "Heart rate": int(row["heart_rate"]), "Respiratory rate": int(row["respiratory_rate"]),
+        "Temperature": float(row["temperature"] or "nan"), "Oxygen saturations": float(row["oxygen_sats"] or "nan"),
+        "Level of consciousness (fully awake and responsive?)": row["loc"],
+    }) for row in rows]
+    assert totals.tolist() == expected
+
+
+def test_csv_converters_round_trip(tmp_path):
+    rows = make_rows(120)
+    source = tmp_path / "vitals.csv"
+    with open(source, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=v2.CSVNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
+    assert csv_to_binary(source, tmp_path / "vitals.bin", v2.CSVNAMES) == 120
+    with pytest.raises(ValueError):
+        csv_to_binary(source, tmp_path / "vitals.bin", v2.CSVNAMES)
+    assert binary_to_csv(tmp_path / "vitals.bin", tmp_path / "back.csv", v2.CSVNAMES) == 120
+    assert (tmp_path / "back.csv").read_text() == source.read_text()
+
+
+def test_torn_record_is_dropped_before_the_next_append(store):
+    store.append_many(make_rows(3))
+    with open(store.path, "ab") as f:
+        f.write(b"\x01" * 10)  # a writer died mid-record
+    assert len(store.records()) == 3
+    store.append_many(make_rows(2, seed=5))
+    assert store.path.stat().st_size == 32 + 5 * 32
+    assert list(store.iter_all_rows()) == make_rows(3) + make_rows(2, seed=5)
+
+
+@pytest.mark.parametrize("heart_rate", ["40000", 75.5, "-32768"])
+def test_vitals_that_do_not_fit_a_record_are_refused_not_truncated(store, heart_rate):
+    row = dict(make_rows(1)[0], heart_rate=heart_rate)
+    with pytest.raises(ValueError, match="heart_rate"):
+        pack_row(row)
+    store.append_many([dict(row, heart_rate="32767"), dict(row, heart_rate="")])
+    assert [r["heart_rate"] for r in store.load(row["patient_id"])] == ["32767", ""]
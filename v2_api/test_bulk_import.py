@@ -0,0 +1,89 @@
+import csv
+import json
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api.bulk_import import checkpoint_path, run_import
+
+FIELDS = ["patient_name", "dob", "timestamp", "bp_systolic", "bp_diastolic", "heart_rate",
+          "respiratory_rate", "temperature", "oxygen_sats", "loc"]
+
+def write_input(path, n):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for i in range(n):
+            writer.writerow([f"Patient {i % 3}", "01/01/00", f"2024-01-01T{i // 60:02d}:{i % 60:02d}:00",
+                             90 + i % 40, 80, 50 + i % 80, 12 + i % 15, 36.0 + (i % 30) / 10, 90 + i % 10, "Yes"])
+        writer.writerow(["Bad Row", "31/02/00", "2024-01-01T00:00:00", 120, 80, 75, 18, 37.0, 98, "Yes"])
+
+def test_bulk_import_scores_and_resumes(data_paths):
+    source = data_paths / "observations.csv"
+    write_input(source, 50)
+
+    state = run_import(source, chunk_size=10, workers=2, max_chunks=2, progress=False)
+    assert (state["imported"], state["done"]) == (20, False)
+
+    state = run_import(source, chunk_size=10, workers=2, progress=False)
+    assert (state["imported"], state["rejected"], state["done"]) == (50, 1, True)
+    assert json.loads(checkpoint_path(source).read_text())["done"]
+    assert run_import(source, chunk_size=10, workers=2, progress=False)["imported"] == 50  # already complete
+
+    rows = v2.get_patient_vitals("1")
+    assert len(rows) == 17
+    for row in rows:
+        vitals = {
+            "Blood pressure": {"systolic": int(row["bp_systolic"]), "diastolic": int(row["bp_diastolic"])},
+            "Heart rate": int(row["heart_rate"]),
+            "Respiratory rate": int(row["respiratory_rate"]),
+            "Temperature": float(row["temperature"]),
+            "Oxygen saturations": int(row["oxygen_sats"]),
+            "Level of consciousness (fully awake and responsive?)": row["loc"],
+        }
+        assert int(row["news2_score"]) == v2.compute_news2_score(vitals)
+    rejects = (data_paths / "observations.csv.rejects.ndjson").read_text().splitlines()
+    assert json.loads(rejects[0])["line"] == 52
+
+def test_resume_skips_rows_already_committed(data_paths):
+    source = data_paths / "observations.ndjson"
+    with open(source, "w") as f:
+        for i in range(5):
+            f.write(json.dumps({"patient_name": "P", "dob": "01/01/00", "timestamp": f"2024-01-01T00:0{i}:00",
+                                "bp_systolic": 120, "bp_diastolic": 80, "heart_rate": 75, "respiratory_rate": 18,
+                                "temperature": 37.0, "oxygen_sats": 98, "loc": "Yes"}) + "\n")
+    run_import(source, chunk_size=2, workers=1, max_chunks=1, progress=False)
+    # Simulate a crash after the next chunk was appended but before it was checkpointed
+    state = json.loads(checkpoint_path(source).read_text())
+    run_import(source, chunk_size=2, workers=1, max_chunks=1, progress=False)
+    checkpoint_path(source).write_text(json.dumps(state))
+    run_import(source, chunk_size=2, workers=1, progress=False)
+    assert [r["timestamp"][-5:] for r in v2.get_patient_vitals("1")] == ["00:00", "01:00", "02:00", "03:00", "04:00"]
+
+def test_ndjson_lines_that_are_not_objects_are_rejected(data_paths):
+    source = data_paths / "observations.ndjson"
+    good = {"patient_name": "P", "dob": "01/01/00", "timestamp": "2024-01-01T00:00:00", "bp_systolic": 120,
+            "bp_diastolic": 80, "heart_rate": 75, "respiratory_rate": 18, "temperature": 37.0, "oxygen_sats": 98, "loc": "Yes"}
+    source.write_text(json.dumps(good) + '\n"just a string"\n[1, 2]\n')
+    state = run_import(source, chunk_size=10, workers=1, progress=False)
+    assert (state["imported"], state["rejected"], state["done"]) == (1, 2, True)
+    rejects = [json.loads(line) for line in (data_paths / "observations.ndjson.rejects.ndjson").read_text().splitlines()]
+    assert [(reject["line"], reject["error"]) for reject in rejects] == [(2, "line is not a JSON object"), (3, "line is not a JSON object")]
+
+def test_lines_that_are_not_utf8_are_rejected(data_paths):
+    source = data_paths / "observations.csv"
+    write_input(source, 2)
+    with open(source, "ab") as f:
+        f.write(b"Caf\xe9 Patient,01/01/00,2024-01-01T01:00:00,120,80,75,18,37.0,98,Yes\n")
+    state = run_import(source, chunk_size=10, workers=1, progress=False)
+    assert (state["imported"], state["rejected"], state["done"]) == (2, 2, True)  # the bad DOB row and the bad bytes
+    rejects = [json.loads(line) for line in (data_paths / "observations.csv.rejects.ndjson").read_text().splitlines()]
+    assert (rejects[-1]["line"], rejects[-1]["error"]) == (5, "line is not valid UTF-8")
+
+def test_vitals_outside_the_storable_range_are_rejected(data_paths):
+    source = data_paths / "observations.ndjson"
+    good = {"patient_name": "P", "dob": "01/01/00", "timestamp": "2024-01-01T00:00:00", "bp_systolic": 120,
+            "bp_diastolic": 80, "heart_rate": 75, "respiratory_rate": 18, "temperature": 37.0, "oxygen_sats": 98, "loc": "Yes"}
+    source.write_text("".join(json.dumps(dict(good, heart_rate=value)) + "\n" for value in (75, 40000, 75.5, -1)))
+    state = run_import(source, chunk_size=10, workers=1, progress=False)
+    assert (state["imported"], state["rejected"]) == (1, 3)
+    rejects = [json.loads(line) for line in (data_paths / "observations.ndjson.rejects.ndjson").read_text().splitlines()]
+    assert {reject["error"] for reject in rejects} == {"heart_rate must be a whole number from 0 to 32767"}
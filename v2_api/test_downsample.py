@@ -0,0 +1,60 @@
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api.app import app
+from v2_api.downsample import downsample, lttb_indices, news2_peaks
+from v2_api.series import VitalsSeries
+
+
+def make_series(n, spike_at=None):
+    rows = []
+    for i in range(n):
+        rows.append({
+            "patient_id": "1", "timestamp": (datetime(2025, 1, 1) + timedelta(minutes=15 * i)).isoformat(),
+            "news2_score": str(9 if i == spike_at else 1 + (i // 50) % 2),
+            "bp_systolic": str(120 + int(10 * math.sin(i / 40))), "bp_diastolic": "80",
+            "heart_rate": str(70 + i % 7), "respiratory_rate": "16", "temperature": "37.0",
+            "oxygen_sats": "" if i % 11 == 0 else "97", "loc": "Yes",
+        })
+    return VitalsSeries.from_rows("1", rows)
+
+
+def test_lttb_keeps_ends_and_the_extremes_of_a_signal():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 100)
+    y[123] = 5.0  # a lone spike
+    picked = lttb_indices(x, y[:, None], 50)
+    assert len(picked) == 50 and picked[0] == 0 and picked[-1] == 999
+    assert list(picked) == sorted(set(picked))
+    assert 123 in picked
+    assert list(lttb_indices(x[:10], y[:10, None], 50)) == list(range(10))
+
+
+def test_news2_peaks_and_budget():
+    scores = np.array([0, 3, 3, 1, 5, 2, 2, 7, 0])
+    assert list(news2_peaks(scores, 10)) == [1, 4, 7]
+    assert list(news2_peaks(scores, 2)) == [4, 7]  # highest kept when over budget
+
+
+def test_downsample_keeps_news2_peaks_and_readings_unchanged():
+    series = make_series(5000, spike_at=3210)
+    small = downsample(series, 200)
+    assert len(small) <= 200
+    assert 9 in small.news2_score
+    rows = {row["timestamp"]: row for row in series.to_rows()}
+    assert all(rows[row["timestamp"]] == row for row in small.to_rows())  # picked, not interpolated
+    assert downsample(series, None) is series and downsample(small, 500) is small
+
+def test_trends_endpoints_take_max_points(data_paths):
+    v2.get_storage().append_many(make_series(600, spike_at=321).to_rows())
+    client = TestClient(app)
+    rows = client.get("/trends/1/json", params={"max_points": 40}).json()
+    assert len(rows) <= 40 and max(int(row["news2_score"]) for row in rows) == 9
+    assert len(client.get("/trends/1/json").json()) == 600
+    assert client.get("/trends/1/json", params={"max_points": 40, "limit": 5}).status_code == 400
+    response = client.get("/trends/1/png", params={"max_points": 40})
+    assert response.status_code == 200 and response.content.startswith(b"\x89PNG")
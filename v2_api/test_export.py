@@ -0,0 +1,103 @@
+import io
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api import export
+from v2_api.app import app
+from v2_api.export import COLUMN_TYPES, export_chunks, export_to_file, load_npz
+
+@pytest.fixture
+def storage_paths(storage_paths, monkeypatch):
+    monkeypatch.setattr(v2, "EXPORT_CHUNK_ROWS", 7)  # several chunks, the last one short
+    return storage_paths
+
+def fill(n=40, seed=0):
+    """n readings for 5 named patients plus one ID missing from the mapping; some cells empty."""
+    store = v2.get_storage()
+    store.init()
+    ids = [patient_id for patient_id, _ in store.get_or_create_patients(
+        [(f"patient {i}", f"0{i}/01/80") for i in range(1, 6)])]
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        rows.append({
+            "patient_id": rng.choice(ids + ["99"]), "timestamp": (datetime(2025, 1, 1) + timedelta(minutes=i)).isoformat(),
+            "news2_score": rng.randint(0, 12), "bp_systolic": rng.randint(85, 180), "bp_diastolic": rng.randint(50, 100),
+            "heart_rate": rng.randint(45, 140), "respiratory_rate": rng.randint(10, 28),
+            "temperature": "" if i % 9 == 4 else round(rng.uniform(35.0, 39.5), 1),
+            "oxygen_sats": "" if i % 6 == 1 else rng.randint(88, 100), "loc": rng.choice(["Yes", "No/Unsure"]),
+        })
+    store.append_many(rows)
+    return rows
+
+def assert_matches(columns, rows, check_dtypes=True):
+    names = dict((patient_id, name) for patient_id, name, _ in v2.get_storage().patients())
+    if check_dtypes:
+        assert columns["patient_id"].dtype == np.int32
+        assert columns["timestamp"].dtype == np.dtype("datetime64[us]")
+        for name in ("news2_score", "heart_rate", "oxygen_sats", "temperature"):
+            assert np.ma.getdata(columns[name]).dtype == np.dtype(COLUMN_TYPES[name])
+    assert columns["patient_id"].tolist() == [int(row["patient_id"]) for row in rows]
+    assert [None if value is np.ma.masked else value for value in columns["patient_name"]] == \
+        [names.get(row["patient_id"]) for row in rows]
+    assert columns["timestamp"].astype("datetime64[us]").tolist() == [datetime.fromisoformat(row["timestamp"]) for row in rows]
+    for name in ("news2_score", "heart_rate", "oxygen_sats", "temperature"):
+        expected = [None if row[name] == "" else float(row[name]) for row in rows]
+        assert [None if value is np.ma.masked else float(value) for value in np.ma.asarray(columns[name])] == expected
+    assert columns["loc"].tolist() == [row["loc"] for row in rows]
+
+
+def test_npz_export_is_typed_chunked_and_joined_to_names(storage_paths):
+    rows = fill()
+    assert export_to_file(v2.get_storage(), storage_paths / "out.npz", "npz", 7) == len(rows)
+    with np.load(storage_paths / "out.npz") as npz:
+        assert len([key for key in npz.files if key.startswith("patient_id/")]) == 6  # 40 rows, 7 per chunk
+    assert_matches(load_npz(storage_paths / "out.npz"), rows)
+
+
+def from_arrow(table) -> dict:
+    """An Arrow table as load_npz() returns it (nulls masked; numbers with nulls come back as floats)."""
+    import pyarrow as pa
+
+    columns = {}
+    for name in COLUMN_TYPES:
+        column = table[name].combine_chunks()
+        if pa.types.is_dictionary(column.type):
+            column = column.dictionary_decode()
+        mask = column.is_null().to_numpy(zero_copy_only=False)
+        values = column.to_numpy(zero_copy_only=False)
+        columns[name] = np.ma.MaskedArray(values, mask=mask) if mask.any() else values
+    return columns
+
+
+def test_parquet_and_arrow_exports_match(storage_paths):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    rows = fill()
+    for fmt in ("parquet", "arrow"):
+        body = b"".join(export_chunks(v2.get_storage(), fmt, 7))
+        table = pq.read_table(io.BytesIO(body)) if fmt == "parquet" else pa.ipc.open_stream(body).read_all()
+        assert table.num_rows == len(rows)
+        assert [str(table.schema.field(name).type) for name in ("patient_id", "timestamp", "news2_score", "heart_rate", "temperature")] \
+            == ["int32", "timestamp[us]", "int8", "int16", "double"]
+        assert pa.types.is_dictionary(table.schema.field("patient_name").type)  # one copy of each name
+        assert_matches(from_arrow(table), rows, check_dtypes=False)
+
+
+def test_export_endpoint_streams_the_dataset(storage_paths, monkeypatch):
+    rows = fill()
+    with TestClient(app) as client:
+        response = client.get("/export?format=npz")
+        assert response.status_code == 200
+        assert response.headers["content-disposition"] == 'attachment; filename="vitals_export.npz"'
+        assert_matches(load_npz(io.BytesIO(response.content)), rows)
+
+        monkeypatch.setattr(export, "have_pyarrow", lambda: False)
+        assert client.get("/export?format=parquet").status_code == 400
+        assert client.get("/export").headers["content-type"] == "application/zip"  # falls back to NPZ
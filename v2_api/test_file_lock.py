@@ -0,0 +1,93 @@
+import csv
+import multiprocessing
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from v2_api import patient_index
+from v2_api.file_lock import fcntl
+from v2_api.patient_index import PatientIndex
+from v2_api.storage import CSVStorage
+from v2_api.vitals_index import VitalsIndex
+from v2_api.vitals_tracker_v2 import CSVNAMES
+
+PROCESSES = 6
+WRITES = 150
+
+
+def writer(vitals_path, mapping_path, seed, barrier):
+    """One process: register patients (shared names across processes) and append their rows."""
+    store = CSVStorage(vitals_path, mapping_path, CSVNAMES)
+    rng = random.Random(seed)
+    barrier.wait()
+    for i in range(WRITES):
+        name = f"patient {rng.randint(1, 40)}"
+        patient_id, _ = store.get_or_create_patient(name, "01/01/00")
+        row = {"patient_id": patient_id, "timestamp": f"2025-01-01T00:00:00.{seed:02d}{i:04d}", "news2_score": 0,
+               "bp_systolic": 120, "bp_diastolic": 80, "heart_rate": 70, "respiratory_rate": 16,
+               "temperature": 37.0, "oxygen_sats": 98, "loc": name}
+        if i % 10:
+            store.append(row)
+        else:
+            store.append_many([row])  # exercise both write paths
+
+
+@pytest.mark.skipif(fcntl is None, reason="cross-process locking needs fcntl")
+def test_concurrent_processes_no_duplicate_ids_lost_or_torn_rows(tmp_path):
+    vitals_path, mapping_path = tmp_path / "vitals.csv", tmp_path / "patient_mapping.csv"
+    ctx = multiprocessing.get_context("fork")
+    barrier = ctx.Barrier(PROCESSES)
+    procs = [ctx.Process(target=writer, args=(vitals_path, mapping_path, seed, barrier)) for seed in range(PROCESSES)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+
+    # Patient mapping: one row per identity, one identity per ID
+    with open(mapping_path, newline='') as f:
+        mapping = list(csv.DictReader(f))
+    ids = [row["patient_id"] for row in mapping]
+    names = [row["patient_name"] for row in mapping]
+    assert len(set(ids)) == len(ids)
+    assert len(set(names)) == len(names)
+    id_for_name = {row["patient_name"]: row["patient_id"] for row in mapping}
+
+    # Vitals: every row present, whole, and filed under its patient's ID
+    with open(vitals_path, 'rb') as f:
+        lines = f.read().split(b"\n")
+    assert lines[-1] == b""
+    rows = list(csv.DictReader(line.decode() for line in lines[:-1]))
+    assert len(rows) == PROCESSES * WRITES
+    assert all(None not in row.values() and len(row) == len(CSVNAMES) for row in rows)
+    assert all(id_for_name[row["loc"]] == row["patient_id"] for row in rows)
+
+    # The persisted byte-offset index agrees with the data
+    index = VitalsIndex(vitals_path, CSVNAMES)
+    for name, patient_id in id_for_name.items():
+        assert index.load(patient_id) == [row for row in rows if row["patient_id"] == patient_id]
+
+
+def test_threads_refreshing_the_patient_index_read_each_appended_row_once(tmp_path, monkeypatch):
+    normalise = patient_index.normalise_identity
+    monkeypatch.setattr(patient_index, "normalise_identity",  # widen the gap between reading a tail and moving _end
+                        lambda name, dob: time.sleep(0.001) or normalise(name, dob))
+    mapping_path = tmp_path / "patient_mapping.csv"
+    index = PatientIndex(mapping_path)
+    other = PatientIndex(mapping_path)  # another process appending to the same file
+    for round_ in range(5):
+        names = [f"patient {round_}-{i}" for i in range(5)]
+        created = other.get_or_create_many((name, "01/01/00") for name in names)
+        barrier = threading.Barrier(8)
+
+        def lookup():
+            barrier.wait()
+            return [index.lookup(name, "01/01/00") for name in names]
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: lookup(), range(8)))
+        assert all(ids == [patient_id for patient_id, _ in created] for ids in results)
+        assert index._end == mapping_path.stat().st_size
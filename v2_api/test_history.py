@@ -0,0 +1,110 @@
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api.app import app
+
+VITALS = {
+    "Blood pressure": {"systolic": 120, "diastolic": 80},
+    "Heart rate": 75,
+    "Respiratory rate": 18,
+    "Temperature": 37.0,
+    "Oxygen saturations": 98,
+    "Level of consciousness (fully awake and responsive?)": "Yes"
+}
+
+def add_readings(hours):
+    v2.add_vitals_batch([
+        {"patient_name": "Test Patient", "dob": "01/01/00", "vitals": VITALS,
+         "timestamp": datetime(2025, 1, 1, hour)}
+        for hour in hours
+    ])
+
+def hours_of(rows):
+    return [int(row["timestamp"][11:13]) for row in rows]
+
+def read_all_pages(limit, **window):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = v2.query_history("1", limit=limit, cursor=cursor, **window)
+        pages.append(hours_of(rows))
+        if cursor is None:
+            return pages
+
+def read_rest(cursor, limit):
+    hours = []
+    while cursor is not None:
+        rows, cursor = v2.query_history("1", limit=limit, cursor=cursor)
+        hours += hours_of(rows)
+    return hours
+
+
+def test_window_and_pages_match_a_full_scan(storage_paths):
+    add_readings(range(10))
+    rows, cursor = v2.query_history("1", since=datetime(2025, 1, 1, 3), until=datetime(2025, 1, 1, 6))
+    assert hours_of(rows) == [3, 4, 5, 6] and cursor is None
+    assert read_all_pages(4) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert read_all_pages(2, since=datetime(2025, 1, 1, 5)) == [[5, 6], [7, 8], [9]]
+    assert v2.get_patient_vitals("1") == v2.query_history("1")[0]
+
+
+def test_cursor_survives_appends_ties_and_backfill(storage_paths):
+    add_readings([0, 1, 1, 1, 2])
+    first, cursor = v2.query_history("1", limit=2)
+    assert hours_of(first) == [0, 1]
+    add_readings([5, 1])  # a later reading, and one backfilled into the middle of hour 1
+    assert read_rest(cursor, limit=2) == [1, 1, 1, 2, 5]
+    assert hours_of(v2.get_patient_vitals("1")) == [0, 1, 1, 1, 1, 2, 5]  # sorted by time
+
+
+def test_api_pages_through_history_with_next_cursor_header(storage_paths):
+    add_readings(range(5))
+    client = TestClient(app)
+    seen, params = [], {"limit": 2, "since": "2025-01-01T01:00:00"}
+    while True:
+        response = client.get("/trends/1/json", params=params)
+        assert response.status_code == 200
+        seen += hours_of(response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert seen == [1, 2, 3, 4]
+    assert len(client.get("/patient/1").json()) == 5
+    assert client.get("/patient/1", params={"cursor": "nope"}).status_code == 400
+    assert client.get("/patient/1", params={"limit": 0}).status_code == 422
+
+
+def test_ndjson_stream_matches_the_json_list(storage_paths, monkeypatch):
+    add_readings([3, 1, 2])
+    monkeypatch.setattr(v2, "NDJSON_CHUNK_BYTES", 1)  # one chunk per row
+    assert len(list(v2.ndjson_chunks(v2.iter_history("1")[0]))) == 3
+    client = TestClient(app)
+    as_list = client.get("/patient/1").json()
+
+    response = client.get("/trends/1/json", headers={"Accept": "application/x-ndjson"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert streamed == as_list  # timestamp order, backfilled readings included
+    assert [json.loads(line) for line in client.get("/patient/1", params={"stream": "true"}).text.splitlines()] == as_list
+
+    response = client.get("/patient/1", params={"stream": "true", "since": "2025-01-01T02:00:00", "limit": 1})
+    assert [json.loads(line) for line in response.text.splitlines()] == as_list[1:2]
+    assert "X-Next-Cursor" in response.headers
+
+
+def test_streamed_history_stays_in_order_as_readings_arrive(storage_paths):
+    client = TestClient(app)
+
+    def streamed():
+        return [json.loads(line) for line in client.get("/patient/1", params={"stream": "true"}).text.splitlines()]
+
+    add_readings([1, 2])
+    assert hours_of(streamed()) == [1, 2]
+    add_readings([4])    # in order: only the new row is checked
+    assert hours_of(streamed()) == [1, 2, 4]
+    add_readings([0])    # a backfill
+    add_readings([3, 5])
+    assert hours_of(streamed()) == [0, 1, 2, 3, 4, 5]
+    assert streamed() == client.get("/patient/1").json()
@@ -0,0 +1,88 @@
+import pstats
+
+import pytest
+from fastapi.testclient import TestClient
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api.app import app
+from v2_api.history import HistoryCache
+from v2_api.metrics import Metrics, metrics
+from v2_api.png_cache import PNGCache
+
+NORMAL = {
+    "Blood pressure": {"systolic": 120, "diastolic": 80}, "Heart rate": 75, "Respiratory rate": 16,
+    "Temperature": 37.0, "Oxygen saturations": 98, "Level of consciousness (fully awake and responsive?)": "Yes"
+}
+
+@pytest.fixture
+def storage_paths(data_paths, monkeypatch):
+    monkeypatch.setattr(v2, "png_cache", PNGCache())
+    monkeypatch.setattr(v2, "history_cache", HistoryCache())
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.reset()
+    yield data_paths
+    metrics.reset()
+
+def samples(text: str) -> dict:
+    """{'name{labels}': value} for every sample line of a /metrics body."""
+    return {line.rpartition(" ")[0]: float(line.rpartition(" ")[2])
+            for line in text.splitlines() if line and not line.startswith("#")}
+
+
+def test_histograms_render_as_cumulative_prometheus_buckets():
+    registry = Metrics(enabled=True, buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.05, 0.05, 3.0):
+        registry.observe("vitals_stage_seconds", seconds, stage='say "hi"')
+    registry.inc("vitals_file_read_bytes_total", 100)
+    registry.inc("vitals_file_read_bytes_total", 28)
+    text = registry.render()
+    assert "# TYPE vitals_stage_seconds histogram" in text
+    got = samples(text)
+    assert got['vitals_stage_seconds_bucket{stage="say \\"hi\\"",le="0.01"}'] == 1
+    assert got['vitals_stage_seconds_bucket{stage="say \\"hi\\"",le="0.1"}'] == 3
+    assert got['vitals_stage_seconds_bucket{stage="say \\"hi\\"",le="+Inf"}'] == 4
+    assert got['vitals_stage_seconds_count{stage="say \\"hi\\""}'] == 4
+    assert got['vitals_stage_seconds_sum{stage="say \\"hi\\""}'] == pytest.approx(3.105)
+    assert got["vitals_file_read_bytes_total"] == 128
+
+
+def test_disabled_metrics_record_nothing():
+    registry = Metrics(enabled=False)
+    with registry.stage("save_to_csv"):
+        pass
+    registry.inc("vitals_file_written_bytes_total", 10)
+    assert registry.stage("a") is registry.stage("b")  # one shared no-op, nothing allocated per call
+    assert registry.render() == "\n"
+
+
+def test_metrics_endpoint_reports_stages_requests_bytes_and_cache_hits(storage_paths):
+    with TestClient(app) as client:
+        for _ in range(3):
+            assert client.post("/add_vitals/", params={"patient_name": "Jane", "dob": "01/01/00"}, json=NORMAL).status_code == 200
+        assert client.get("/trends/1/png").headers["X-Cache"] == "MISS"
+        assert client.get("/trends/1/png").headers["X-Cache"] == "HIT"
+        client.get("/patient/1")
+        response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    got = samples(response.text)
+
+    for stage in ("pydantic_validation", "get_or_create_patient_id", "compute_news2_score",
+                  "flatten_vitals", "save_to_csv", "format_response"):
+        assert got[f'vitals_stage_seconds_count{{stage="{stage}"}}'] == 3
+    assert got['vitals_stage_seconds_count{stage="render_png"}'] == 1  # the second chart came from the cache
+    assert got['vitals_http_requests_total{method="POST",route="/add_vitals/",status="200"}'] == 3
+    assert got['vitals_http_requests_total{method="GET",route="/trends/{patient_id}/png",status="200"}'] == 2
+    assert got['vitals_cache_hit_ratio{cache="png"}'] == 0.5
+    data_bytes = (storage_paths / "vitals.csv").stat().st_size - len(",".join(v2.CSVNAMES)) - 1
+    assert got["vitals_file_written_bytes_total"] == data_bytes
+    assert got["vitals_file_read_bytes_total"] == data_bytes  # each row read once, then served from memory
+
+
+def test_sampled_requests_are_profiled(storage_paths, monkeypatch):
+    monkeypatch.setattr(metrics, "profile_rate", 1.0)
+    monkeypatch.setattr(metrics, "profile_dir", storage_paths / "profiles")
+    with TestClient(app) as client:
+        client.post("/add_vitals/", params={"patient_name": "Jane", "dob": "01/01/00"}, json=NORMAL)
+    [dump] = (storage_paths / "profiles").glob("add_vitals_api-*.prof")
+    functions = {name for _, _, name in pstats.Stats(str(dump)).stats}
+    assert {"add_vitals", "build_alerts", "save_to_csv"} <= functions
@@ -0,0 +1,83 @@
+from fastapi.testclient import TestClient
+
+from v2_api.app import app
+from v2_api.png_cache import PNGCache
+
+client = TestClient(app)
+
+
+def test_eviction_policies_and_byte_cap():
+    lru = PNGCache(max_bytes=1000, max_entries=2, policy="lru")
+    fifo = PNGCache(max_bytes=1000, max_entries=2, policy="fifo")
+    for cache in (lru, fifo):
+        cache.put("1", (1,), b"a" * 10)
+        cache.put("2", (1,), b"b" * 10)
+        assert cache.get("1", (1,)) == b"a" * 10   # touch patient 1
+        cache.put("3", (1,), b"c" * 10)
+    assert lru.get("1", (1,)) is not None and lru.get("2", (1,)) is None
+    assert fifo.get("1", (1,)) is None and fifo.get("2", (1,)) is not None
+
+    capped = PNGCache(max_bytes=25, max_entries=10)
+    capped.put("1", (1,), b"a" * 10)
+    capped.put("2", (1,), b"b" * 10)
+    capped.put("3", (1,), b"c" * 10)
+    assert capped.stats()["entries"] == 2 and capped.bytes == 20 and capped.evictions == 1
+    capped.put("4", (1,), b"d" * 30)  # bigger than the whole cache: not stored
+    assert capped.get("4", (1,)) is None
+
+
+def test_new_version_replaces_and_invalidate_drops():
+    cache = PNGCache()
+    cache.put("1", (2, 100), b"old")
+    cache.put("1", (3, 200), b"new")
+    assert cache.get("1", (2, 100)) is None
+    assert cache.stats()["entries"] == 1
+    cache.invalidate("1")
+    assert cache.get("1", (3, 200)) is None
+    assert cache.bytes == 0 and cache.invalidations == 1
+
+
+def test_variants_are_cached_side_by_side_and_only_older_versions_dropped():
+    cache = PNGCache()
+    cache.put("1", (2, 100), b"default", variant=("store", 1000))
+    cache.put("1", (2, 100), b"small", variant=("store", 200))
+    cache.put("1", (2, 100), b"other store", variant=("other", 1000))
+    assert cache.get("1", (2, 100), ("store", 1000)) == b"default"
+    assert cache.stats()["entries"] == 3
+
+    cache.put("1", (3, 200), b"new small", variant=("store", 200))
+    cache.put("1", (2, 100), b"late small", variant=("store", 200))  # a slow render of the old data
+    assert cache.get("1", (2, 100), ("store", 200)) is None
+    assert cache.get("1", (3, 200), ("store", 200)) == b"new small"
+    assert cache.get("1", (2, 100), ("store", 1000)) == b"default"
+    assert cache.stats()["entries"] == 3
+
+
+def test_trends_png_cached_until_patient_gets_a_reading(data_paths):
+    vitals_payload = {
+        "Blood pressure": {"systolic": 120, "diastolic": 80},
+        "Heart rate": 75,
+        "Respiratory rate": 18,
+        "Temperature": 37.0,
+        "Oxygen saturations": 98,
+        "Level of consciousness (fully awake and responsive?)": "Yes"
+    }
+    for _ in range(2):
+        patient_id = client.post("/add_vitals/?patient_name=Test Patient&dob=01/01/00",
+                                 json=vitals_payload).json()["patient_id"]
+
+    first = client.get(f"/trends/{patient_id}/png")
+    second = client.get(f"/trends/{patient_id}/png")
+    assert first.headers["content-type"] == "image/png"
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+    assert first.content == second.content
+
+    client.post("/add_vitals/?patient_name=Test Patient&dob=01/01/00", json=vitals_payload)
+    third = client.get(f"/trends/{patient_id}/png")
+    assert third.headers["x-cache"] == "MISS"
+    assert third.content != first.content
+
+    small = client.get(f"/trends/{patient_id}/png?max_points=3")
+    assert small.headers["x-cache"] == "MISS"
+    assert client.get(f"/trends/{patient_id}/png").headers["x-cache"] == "HIT"  # not evicted by the other size
+    assert client.get(f"/trends/{patient_id}/png?max_points=3").headers["x-cache"] == "HIT"
@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from v2_api.rendering import get_template, render_trends_png
+from v2_api.series import VitalsSeries
+
+
+def make_series(patient_id, n, base):
+    rows = [
+        {"patient_id": patient_id, "timestamp": f"2025-01-{day:02d}T08:00:00", "news2_score": str(day % 7),
+         "bp_systolic": str(base + day), "bp_diastolic": "80", "heart_rate": str(60 + day),
+         "respiratory_rate": "16", "temperature": "37.0", "oxygen_sats": "" if day == 3 else "97", "loc": "Yes"}
+        for day in range(1, n + 1)
+    ]
+    return VitalsSeries.from_rows(patient_id, rows)
+
+
+def test_template_is_reused_and_renders_only_the_new_data():
+    short, long = make_series("1", 3, 100), make_series("2", 20, 150)
+    png_short = render_trends_png(short)
+    template = get_template()
+    png_long = render_trends_png(long)
+    assert get_template() is template
+    assert png_short.startswith(b"\x89PNG") and png_short != png_long
+    assert render_trends_png(short) == png_short  # nothing left over from the previous chart
+    assert template.title.get_text() == "Vital Trends for Patient 1"
+
+
+def test_concurrent_renders_match_sequential_output():
+    series = [make_series(str(i), 5 + i, 100 + 10 * i) for i in range(4)]
+    expected = [render_trends_png(s) for s in series]
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(render_trends_png, series * 4))
+    assert results == expected * 4
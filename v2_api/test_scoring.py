@@ -0,0 +1,61 @@
+import math
+import random
+
+import numpy as np
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api.scoring import COLUMN_THRESHOLDS, LOC_KEY, match_level
+
+def boundary_values(vital_thresholds):
+    """Every range endpoint plus the nearest floats and steps either side of it."""
+    values = {float("nan")}
+    for level_range in vital_thresholds.values():
+        for pair in level_range if isinstance(level_range, list) else [level_range]:
+            for bound in pair:
+                if bound is None:
+                    continue
+                for v in (bound, bound - 1, bound + 1, bound - 0.05, bound + 0.05):
+                    values.update({v, math.nextafter(v, -math.inf), math.nextafter(v, math.inf)})
+    return sorted(values, key=lambda v: (math.isnan(v), v))
+
+def test_compiled_check_alert_matches_dict_walk_at_every_boundary():
+    for vital, vital_thresholds in v2.thresholds.items():
+        if vital == LOC_KEY:
+            continue
+        values = boundary_values(vital_thresholds)
+        values += [int(v) for v in values if not math.isnan(v) and v == int(v)] + [-1000, 10**9]
+        for value in values:
+            assert v2.check_alert(vital, value) == match_level(vital_thresholds, value), (vital, value)
+
+def test_batch_levels_match_scalar_check_alert_at_every_boundary():
+    for column, vital in COLUMN_THRESHOLDS.items():
+        if vital == LOC_KEY:
+            values = ["Yes", "No/Unsure", "No", ""]
+        else:
+            values = boundary_values(v2.thresholds[vital])
+        codes = v2.compiled_thresholds.level_codes_batch(vital, np.array(values))
+        for value, code in zip(values, codes):
+            assert v2.compiled_thresholds.levels[code] == v2.check_alert(vital, value), (vital, value)
+            if vital != LOC_KEY:
+                assert v2.compiled_thresholds.levels[code] == match_level(v2.thresholds[vital], value)
+
+def test_batch_totals_match_compute_news2_score():
+    rng = random.Random(0)
+    columns = {column: [] for column in COLUMN_THRESHOLDS}
+    expected = []
+    for _ in range(2000):
+        vitals = {
+            "Blood pressure": {"systolic": rng.randint(60, 240), "diastolic": rng.randint(30, 130)},
+            "Heart rate": rng.randint(30, 160),
+            "Respiratory rate": rng.randint(5, 35),
+            "Temperature": round(rng.uniform(34.0, 41.0), 1),
+            "Oxygen saturations": rng.randint(85, 100),
+            LOC_KEY: rng.choice(["Yes", "No/Unsure"]),
+        }
+        for column, value in v2.flatten_vitals(vitals).items():
+            columns[column].append(value)
+        expected.append(v2.compute_news2_score(vitals))
+
+    levels, totals = v2.score_news2_batch({c: np.array(v) for c, v in columns.items()})
+    assert totals.tolist() == expected
+    assert levels["heart_rate"][0] == v2.check_alert("Heart rate", columns["heart_rate"][0])
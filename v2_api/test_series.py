@@ -0,0 +1,26 @@
+from v2_api.series import VitalsSeries
+
+ROWS = [
+    {"patient_id": "1", "timestamp": "2025-09-09T19:08:16.423473", "news2_score": "0", "bp_systolic": "120",
+     "bp_diastolic": "80", "heart_rate": "75", "respiratory_rate": "18", "temperature": "37.0",
+     "oxygen_sats": "98", "loc": "Yes"},
+    {"patient_id": "1", "timestamp": "2025-09-09T20:00:00", "news2_score": "14", "bp_systolic": "92",
+     "bp_diastolic": "85", "heart_rate": "125", "respiratory_rate": "26", "temperature": "39.5",
+     "oxygen_sats": "92", "loc": "No/Unsure"},
+]
+
+def test_series_round_trips_csv_rows_exactly():
+    series = VitalsSeries.from_rows("1", ROWS)
+    assert len(series) == 2
+    assert list(series.column("heart_rate")) == [75.0, 125.0]
+    assert list(series.news2_score) == [0, 14]
+    assert series.datetimes()[1].hour == 20
+    assert series.to_rows() == ROWS
+    assert [list(r) for r in series.to_rows()] == [list(r) for r in ROWS]  # same key order in JSON
+
+def test_series_accepts_numeric_rows_and_blanks():
+    row = dict(ROWS[0], heart_rate=None, temperature=36.5, news2_score=3)
+    series = VitalsSeries.from_rows("1", [row])
+    assert series.row(0)["heart_rate"] == ""
+    assert series.row(0)["temperature"] == "36.5"
+    assert series.row(0)["news2_score"] == "3"
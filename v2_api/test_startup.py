@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+HEAVY = ("matplotlib", "fastapi", "numpy")
+
+
+def imported_after(module, cwd, watched=HEAVY):
+    """Watched (by default heavy) packages in sys.modules after a cold `import module`, run from `cwd`."""
+    code = f"import sys, {module}; print(','.join(m for m in {watched!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=cwd, env={**os.environ, "PYTHONPATH": str(ROOT_DIR)},
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def test_cli_import_is_light_and_has_no_side_effects(tmp_path):
+    assert imported_after("vitals_tracker", tmp_path) == ""
+    assert list(tmp_path.iterdir()) == []  # patient_mapping.csv is created by main(), not on import
+
+
+def test_v2_core_import_skips_fastapi_and_matplotlib(tmp_path):
+    assert imported_after("v2_api.vitals_tracker_v2", tmp_path) == ""
+    # Only loaded when configured or on first use
+    lazy = ("v2_api.segments", "v2_api.binary_store", "v2_api.export")
+    assert imported_after("v2_api.vitals_tracker_v2", tmp_path, lazy) == ""
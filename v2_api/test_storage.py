@@ -0,0 +1,42 @@
+import pytest
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api.storage import migrate_csv_to_sqlite
+
+VITALS = {
+    "Blood pressure": {"systolic": 95, "diastolic": 80},
+    "Heart rate": 75,
+    "Respiratory rate": 18,
+    "Temperature": 37.0,
+    "Oxygen saturations": 98,
+    "Level of consciousness (fully awake and responsive?)": "Yes"
+}
+
+def test_backends_round_trip_identically(storage_paths):
+    first = v2.add_vitals("Test Patient", "01/01/00", VITALS)
+    second = v2.add_vitals("Other Patient", "02/02/02", VITALS)
+    v2.add_vitals("test patient ", "01/01/00", VITALS)
+    assert (first["patient_id"], second["patient_id"]) == ("1", "2")
+
+    rows = v2.get_patient_vitals("1")
+    assert len(rows) == 2
+    assert {k: v for k, v in rows[0].items() if k != "timestamp"} == {
+        "patient_id": "1", "news2_score": "2", "bp_systolic": "95", "bp_diastolic": "80",
+        "heart_rate": "75", "respiratory_rate": "18", "temperature": "37.0",
+        "oxygen_sats": "98", "loc": "Yes"
+    }
+
+def test_migrate_csv_to_sqlite_keeps_ids_and_rows(data_paths, monkeypatch):
+    v2.add_vitals("Test Patient", "01/01/00", VITALS)
+    v2.add_vitals("Other Patient", "02/02/02", VITALS)
+    csv_rows = v2.get_patient_vitals("2")
+
+    counts = migrate_csv_to_sqlite(v2.VITALS_FILE, v2.MAPPING_FILE, v2.DB_FILE, v2.CSVNAMES)
+    assert counts == {"patients": 2, "vitals": 2}
+
+    monkeypatch.setattr(v2, "STORAGE_BACKEND", "sqlite")
+    assert v2.get_patient_vitals("2") == csv_rows
+    assert v2.get_or_create_patient_id("Other Patient", "02/02/02") == "2"
+    assert v2.get_or_create_patient_id("New Patient", "03/03/03") == "3"
+    with pytest.raises(ValueError):
+        migrate_csv_to_sqlite(v2.VITALS_FILE, v2.MAPPING_FILE, v2.DB_FILE, v2.CSVNAMES)
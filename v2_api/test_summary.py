@@ -0,0 +1,124 @@
+import random
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api.app import app
+from v2_api.summary import SUMMARY_FIELDS, SummaryStore
+
+START = datetime(2025, 1, 1)
+
+def make_row(patient_id, hours, rng):
+    return {
+        "patient_id": patient_id, "timestamp": (START + timedelta(hours=hours)).isoformat(),
+        "news2_score": rng.randint(0, 12), "bp_systolic": rng.randint(85, 180), "bp_diastolic": rng.randint(50, 100),
+        "heart_rate": rng.randint(45, 140), "respiratory_rate": rng.randint(10, 28),
+        "temperature": round(rng.uniform(35.0, 39.5), 1), "oxygen_sats": "" if rng.random() < 0.2 else rng.randint(88, 100),
+        "loc": "Yes",
+    }
+
+def expected_summary(rows, window_hours=24):
+    """Brute force over the full history."""
+    rows = sorted(rows, key=lambda row: row["timestamp"])
+    latest = datetime.fromisoformat(rows[-1]["timestamp"])
+    start = latest - timedelta(hours=window_hours)
+    vitals = {}
+    for name in SUMMARY_FIELDS:
+        points = [(datetime.fromisoformat(r["timestamp"]), float(r[name])) for r in rows if r[name] != ""]
+        values = [v for _, v in points]
+        window = [((t - start).total_seconds() / 3600, v) for t, v in points if t >= start]
+        n = len(window)
+        mt, my = sum(t for t, _ in window) / n, sum(v for _, v in window) / n
+        spread = sum((t - mt) ** 2 for t, _ in window)
+        slope = sum((t - mt) * (v - my) for t, v in window) / spread if spread else None
+        vitals[name] = {"count": len(values), "sum": sum(values), "min": min(values), "max": max(values),
+                        "last": values[-1], "window": (n, my, min(v for _, v in window), max(v for _, v in window), slope)}
+    return vitals
+
+def assert_matches(summary, rows):
+    for name, expected in expected_summary(rows).items():
+        got = summary["vitals"][name]
+        window = got["window"]
+        assert (got["count"], got["min"], got["max"], got["last"]) == (
+            expected["count"], expected["min"], expected["max"], expected["last"])
+        assert got["sum"] == pytest.approx(expected["sum"])
+        n, mean, low, high, slope = expected["window"]
+        assert (window["count"], window["min"], window["max"]) == (n, low, high)
+        assert window["mean"] == pytest.approx(mean)
+        assert window["slope_per_hour"] == pytest.approx(slope, abs=1e-9)
+
+
+def test_running_summary_matches_a_full_recompute(storage_paths):
+    rng = random.Random(1)
+    store = v2.get_storage()
+    rows = []
+    for step in range(60):  # ~30 minutes apart, so the 24h window keeps evicting
+        batch = [make_row("1", step * 0.5 + i * 0.1, rng) for i in range(rng.randint(1, 3))]
+        if step == 40:
+            batch.append(make_row("1", step * 0.5 - 3, rng))   # backfilled inside the window
+        if step == 50:
+            batch.append(make_row("1", 1, rng))                 # backfilled long before it
+        store.append_many(batch)  # as another process (or the CLI) would: no in-process hook
+        rows += batch
+        summary = v2.get_trends_summary("1")
+        assert summary["readings"] == len(rows)
+        assert_matches(summary, rows)
+    latest = max(rows, key=lambda row: row["timestamp"])
+    assert v2.get_trends_summary("1")["latest_news2_score"] == latest["news2_score"]
+
+
+def test_startup_rebuild_covers_every_patient_in_one_pass(storage_paths):
+    rng = random.Random(2)
+    rows = [make_row(str(i % 5 + 1), i * 0.7, rng) for i in range(200)]
+    v2.get_storage().append_many(rows)
+    summaries = SummaryStore()
+    summaries.rebuild(v2.get_storage())
+    for patient_id in map(str, range(1, 6)):
+        assert_matches(summaries.get(v2.get_storage(), patient_id), [r for r in rows if r["patient_id"] == patient_id])
+    assert summaries.get(v2.get_storage(), "99") is None
+
+
+def test_summary_endpoint(storage_paths):
+    client = TestClient(app)
+    assert client.get("/trends/1/summary").status_code == 404
+    vitals = {"Blood pressure": {"systolic": 95, "diastolic": 80}, "Heart rate": 75, "Respiratory rate": 18,
+              "Temperature": 37.0, "Oxygen saturations": 98, "Level of consciousness (fully awake and responsive?)": "Yes"}
+    v2.add_vitals("Test Patient", "01/01/00", vitals)
+    body = client.get("/trends/1/summary").json()
+    assert body["latest_news2_score"] == 2 and body["readings"] == 1
+    assert body["vitals"]["temperature"]["last"] == 37.0
+    assert body["vitals"]["heart_rate"]["window"] == {"count": 1, "mean": 75.0, "min": 75, "max": 75, "slope_per_hour": None}
+
+
+class SlowLoadStore:
+    """The configured store, but a full load() of patient 1 waits until released."""
+
+    def __init__(self, store):
+        self.store, self.loading, self.release = store, threading.Event(), threading.Event()
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def load(self, patient_id):
+        if patient_id == "1":
+            self.loading.set()
+            self.release.wait(5)
+        return self.store.load(patient_id)
+
+
+def test_a_cold_rebuild_does_not_block_other_patients(data_paths):
+    rng = random.Random(3)
+    rows = [make_row(str(i % 2 + 1), i, rng) for i in range(10)]
+    v2.get_storage().append_many(rows)
+    store, summaries = SlowLoadStore(v2.get_storage()), SummaryStore()
+    slow = threading.Thread(target=summaries.get, args=(store, "1"))
+    slow.start()
+    assert store.loading.wait(5)
+    assert_matches(summaries.get(store, "2"), [r for r in rows if r["patient_id"] == "2"])  # not stuck behind patient 1
+    assert slow.is_alive()
+    store.release.set()
+    slow.join(5)
+    assert_matches(summaries.get(store, "1"), [r for r in rows if r["patient_id"] == "1"])
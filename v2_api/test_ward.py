@@ -0,0 +1,61 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api.app import app
+from v2_api.ward import WardBoard
+
+@pytest.fixture
+def storage_paths(storage_paths, monkeypatch):
+    monkeypatch.setattr(v2, "ward_board", WardBoard())
+    return storage_paths
+
+def make_row(patient_id, minutes, score):
+    return {
+        "patient_id": patient_id, "timestamp": (datetime(2025, 1, 1) + timedelta(minutes=minutes)).isoformat(),
+        "news2_score": score, "bp_systolic": 120, "bp_diastolic": 80, "heart_rate": 135 if score >= 3 else 75,
+        "respiratory_rate": 16, "temperature": 37.0, "oxygen_sats": 98, "loc": "Yes",
+    }
+
+def brute_force_top(rows, n):
+    latest = {}
+    for row in rows:  # insertion order; a later row with the same time wins
+        current = latest.get(row["patient_id"])
+        if current is None or row["timestamp"] >= current["timestamp"]:
+            latest[row["patient_id"]] = row
+    ranked = sorted(latest.values(), key=lambda row: (row["news2_score"], row["timestamp"]), reverse=True)
+    return [(row["patient_id"], row["news2_score"]) for row in ranked][:n], len(latest)
+
+
+def test_overview_matches_a_full_scan_as_rows_arrive(storage_paths):
+    rng = random.Random(3)
+    store = v2.get_storage()
+    rows = []
+    for step in range(30):
+        batch = [make_row(str(rng.randint(1, 40)), step * 10 + rng.randint(-30, 5), rng.randint(0, 12))
+                 for _ in range(rng.randint(1, 20))]  # some readings are backfilled (older than the latest)
+        store.append_many(batch)
+        rows += batch
+        overview = v2.get_ward_overview(10)
+        expected, total = brute_force_top(rows, 10)
+        got = [(p["patient_id"], p["news2_score"]) for p in overview["patients"]]
+        assert [score for _, score in got] == [score for _, score in expected]
+        assert overview["total_patients"] == total
+        latest = {row["patient_id"]: row for row in sorted(rows, key=lambda row: row["timestamp"])}
+        for patient in overview["patients"]:
+            assert patient["news2_score"] == latest[patient["patient_id"]]["news2_score"]
+
+
+def test_overview_endpoint_reports_alert_levels(storage_paths):
+    v2.get_storage().append_many([
+        make_row("1", 0, 1), make_row("2", 0, 4), make_row("1", 60, 7), make_row("3", 0, 0),
+    ])
+    body = TestClient(app).get("/ward/overview", params={"n": 2}).json()
+    assert body["total_patients"] == 3
+    assert [(p["patient_id"], p["news2_score"]) for p in body["patients"]] == [("1", 7), ("2", 4)]
+    assert body["patients"][0]["alerts"]["heart_rate"] == "Severe Alert"
+    assert body["patients"][0]["alerts"]["loc"] == "Normal"
+    assert body["patients"][0]["vitals"]["temperature"] == "37.0"
@@ -0,0 +1,127 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import v2_api.vitals_tracker_v2 as v2
+from v2_api.app import app
+from v2_api.storage import CSVStorage
+from v2_api.write_behind import WriteBehindQueue
+
+
+def make_row(i, patient_id="1"):
+    return {"patient_id": patient_id, "timestamp": f"2025-01-01T00:00:{i % 60:02d}.{i:06d}", "news2_score": 0,
+            "bp_systolic": 120, "bp_diastolic": 80, "heart_rate": 70, "respiratory_rate": 16,
+            "temperature": 37.0, "oxygen_sats": 98, "loc": "Yes"}
+
+
+class SlowStore:
+    """Records append_many/sync calls; the first append blocks until released."""
+
+    def __init__(self):
+        self.batches, self.syncs = [], 0
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.fail_next = False
+
+    def append_many(self, rows):
+        self.entered.set()
+        self.release.wait()
+        if self.fail_next:
+            self.fail_next = False
+            raise OSError("disk full")
+        self.batches.append(list(rows))
+
+    def sync(self):
+        self.syncs += 1
+
+
+def test_rows_queued_during_a_write_are_grouped_and_flushed_in_order():
+    store = SlowStore()
+    queue = WriteBehindQueue(store, max_batch=50, fsync_interval_ms=0)
+    queue.put(make_row(0))
+    assert store.entered.wait(5)     # writer has taken row 0 and is blocked in append_many
+    queue.put_many([make_row(i) for i in range(1, 120)])
+    store.release.set()
+    queue.flush(timeout=5)
+
+    written = [row for batch in store.batches for row in batch]
+    assert [row["timestamp"] for row in written] == [make_row(i)["timestamp"] for i in range(120)]
+    assert [len(batch) for batch in store.batches] == [1, 50, 50, 19]
+    assert store.syncs == len(store.batches)  # fsync_interval_ms=0: sync every group
+    queue.close()
+
+
+def test_failed_append_is_retried_and_close_drains():
+    store = SlowStore()
+    store.fail_next = True
+    store.release.set()
+    queue = WriteBehindQueue(store, retry_interval=0.01)
+    queue.put_many([make_row(i) for i in range(3)])
+    queue.close(timeout=5)
+    assert [len(batch) for batch in store.batches] == [3]
+    assert queue.pending() == 0 and queue.error is None
+
+
+class PickyStore:
+    """Rejects rows whose heart rate it cannot store; optionally every append fails with an I/O error."""
+
+    def __init__(self):
+        self.rows, self.calls, self.disk_full = [], 0, False
+
+    def append_many(self, rows):
+        self.calls += 1
+        if self.disk_full:
+            raise OSError("disk full")
+        if any(row["heart_rate"] > 32767 for row in rows):
+            raise ValueError("heart_rate out of range")
+        self.rows += rows
+
+
+def test_a_row_that_cannot_be_stored_is_dropped_without_blocking_the_rest():
+    store = PickyStore()
+    queue = WriteBehindQueue(store, max_batch=100)
+    rows = [make_row(i) for i in range(40)]
+    rows[13]["heart_rate"] = 40000
+    queue.put_many(rows)
+    queue.flush(timeout=5)
+    assert store.rows == rows[:13] + rows[14:]  # everything else written, in order
+    assert [row for row, _ in queue.dead_letters] == [rows[13]]
+    assert queue.pending() == 0
+    assert store.calls < 20  # found by halving the group, not row by row
+    queue.close()
+
+
+def test_flush_gives_up_after_its_timeout_while_writes_keep_failing():
+    store = PickyStore()
+    store.disk_full = True
+    queue = WriteBehindQueue(store, retry_interval=0.01)
+    queue.put(make_row(0))
+    with pytest.raises(RuntimeError, match="1 queued readings not written") as excinfo:
+        queue.flush(timeout=0.1)
+    assert isinstance(excinfo.value.__cause__, OSError)
+    store.disk_full = False  # transient: the row is retried, not dropped
+    queue.flush(timeout=5)
+    assert store.rows == [make_row(0)] and not queue.dead_letters
+    queue.close()
+
+
+def test_api_write_behind_reads_its_own_writes(data_paths, monkeypatch):
+    monkeypatch.setattr(v2, "WRITE_BEHIND", True)
+    vitals_payload = {
+        "Blood pressure": {"systolic": 120, "diastolic": 80},
+        "Heart rate": 75,
+        "Respiratory rate": 18,
+        "Temperature": 37.0,
+        "Oxygen saturations": 98,
+        "Level of consciousness (fully awake and responsive?)": "Yes"
+    }
+    with TestClient(app) as client:
+        for _ in range(5):
+            patient_id = client.post("/add_vitals/?patient_name=Test Patient&dob=01/01/00",
+                                     json=vitals_payload).json()["patient_id"]
+        assert len(client.get(f"/patient/{patient_id}").json()) == 5
+        client.post("/add_vitals/?patient_name=Test Patient&dob=01/01/00", json=vitals_payload)
+    # Leaving the client runs the shutdown hook, which drains the queue
+    assert not v2._writers
+    assert len(CSVStorage(data_paths / "vitals.csv", data_paths / "patient_mapping.csv", v2.CSVNAMES).load("1")) == 6
@@ -0,0 +1,389 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import csv
+import io
+import os
+from array import array
+from pathlib import Path
+
+from v2_api.file_lock import FileLock
+from v2_api.metrics import metrics
+from v2_api.series import to_micros
+
+# -------------------------
+# GLOBALS
+# -------------------------
+INDEX_SUFFIX = ".idx"
+SCAN_BLOCK_BYTES = 1024 * 1024  # full scans (iter_all/read_since) parse this much per csv.reader call
+
+# One index per vitals file, shared by the CLI and the API within a process
+_indexes = {}
+
+# -------------------------
+# PER-PATIENT BYTE-OFFSET INDEX
+# -------------------------
+class VitalsIndex:
+    """patient_id -> byte offsets of that patient's rows in a vitals CSV.
+
+    The index is persisted next to the data as an append-only sidecar
+    (``vitals.csv.idx``, one ``patient_id,offset`` line per row). Rows appended
+    by another process are picked up by scanning only the new tail of the
+    file; the index is rebuilt if the sidecar is missing or no longer matches
+    the data (file shrank, header rewritten, offsets out of range).
+
+    Appends, tail scans and rebuilds hold a cross-process lock on the data
+    file, so rows and sidecar entries from concurrent writers never
+    interleave; reads of an unchanged file take no lock at all.
+    """
+
+    def __init__(self, path, fieldnames):
+        self.path = Path(path)
+        self.index_path = Path(str(path) + INDEX_SUFFIX)
+        self.fieldnames = list(fieldnames)
+        self.header = ",".join(self.fieldnames)
+        self._offsets = {}
+        self._ordered = {}   # patient_id -> (rows checked, last timestamp, or None once one went backwards)
+        self._end = 0        # bytes of the data file covered by the index
+        self._stamp = None   # (mtime_ns, size) of the data file when last synced
+        self._sidecar_end = 0  # bytes of the sidecar we have already seen
+        self._loaded = False
+        # Shared by request threads, the write-behind writer and other processes
+        self._lock = FileLock(self.path)
+
+    # ---- file helpers ----
+    def _file_stamp(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def _header_ok(self) -> bool:
+        with open(self.path, 'rb') as f:
+            return f.readline().strip() == self.header.encode()
+
+    def _ensure_header(self):
+        """Create the vitals file, or prepend its header if it is missing."""
+        if not self.path.exists():
+            with open(self.path, 'w', newline='') as f:
+                f.write(self.header + "\n")
+            return
+        if self._header_ok():
+            return
+        with open(self.path, 'r+', newline='') as f:
+            lines = f.readlines()
+            f.seek(0)
+            f.write(self.header + "\n")
+            f.writelines(lines)
+            f.truncate()
+
+    def _scan(self, start: int) -> list:
+        """Return (patient_id, offset) for every complete row from byte `start`."""
+        entries = []
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            pos = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partial row still being written
+                if pos > 0 and line.strip():
+                    entries.append((line.split(b",", 1)[0].decode(), pos))
+                pos += len(line)
+        self._end = pos
+        return entries
+
+    def _add(self, entries):
+        for patient_id, offset in entries:
+            self._offsets.setdefault(patient_id, []).append(offset)
+
+    def _append_sidecar(self, entries):
+        if entries:
+            with open(self.index_path, 'a') as f:
+                f.writelines(f"{pid},{offset}\n" for pid, offset in entries)
+                self._sidecar_end = f.tell()
+
+    def _sidecar_offsets_since(self, start: int) -> set:
+        """Offsets other writers have recorded in the sidecar after byte `start`."""
+        try:
+            with open(self.index_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                f.seek(start if start <= size else 0)  # smaller: rewritten by a rebuild
+                data = f.read()
+        except FileNotFoundError:
+            return set()
+        self._sidecar_end = size
+        return {int(offset) for offset in (line.rpartition(b",")[2] for line in data.split(b"\n")) if offset.isdigit()}
+
+    # ---- building ----
+    def rebuild(self):
+        """Re-index the whole data file and rewrite the sidecar."""
+        with self._lock:
+            self._ensure_header()
+            self._offsets, self._ordered = {}, {}
+            entries = self._scan(0)
+            self._add(entries)
+            tmp_path = Path(str(self.index_path) + ".tmp")
+            with open(tmp_path, 'w') as f:
+                f.writelines(f"{pid},{offset}\n" for pid, offset in entries)
+            os.replace(tmp_path, self.index_path)
+            self._sidecar_end = os.path.getsize(self.index_path)
+            self._stamp = self._file_stamp()
+            self._loaded = True
+
+    def _load_sidecar(self) -> bool:
+        """Load the persisted index; False if it is missing or stale."""
+        if not self.index_path.exists() or not self._header_ok():
+            return False
+        by_offset = {}  # duplicates from other processes' tail scans collapse here
+        with open(self.index_path, 'r') as f:
+            self._sidecar_end = os.fstat(f.fileno()).st_size
+            for line in f:
+                pid, _, offset = line.rstrip("\n").rpartition(",")
+                if not pid or not offset.isdigit():
+                    continue  # torn sidecar line
+                by_offset[int(offset)] = pid
+        offsets = {}
+        last_pid, last_offset = None, -1
+        for offset in sorted(by_offset):
+            last_pid, last_offset = by_offset[offset], offset
+            offsets.setdefault(last_pid, []).append(offset)
+
+        with open(self.path, 'rb') as f:
+            end = len(f.readline())
+            if last_pid is not None:
+                f.seek(last_offset)
+                line = f.readline()
+        if last_pid is not None:
+            if not line.endswith(b"\n") or line.split(b",", 1)[0].decode() != last_pid:
+                return False
+            end = last_offset + len(line)
+        self._offsets, self._ordered = offsets, {}
+        self._end = end
+        self._add_tail()
+        return True
+
+    def _add_tail(self):
+        entries = self._scan(self._end)
+        self._add(entries)
+        # Rows written through another VitalsIndex are already in the sidecar;
+        # only record the ones that aren't (e.g. appended by some other tool)
+        if entries:
+            recorded = self._sidecar_offsets_since(self._sidecar_end)
+            self._append_sidecar([entry for entry in entries if entry[1] not in recorded])
+        self._stamp = self._file_stamp()
+
+    def _current_stamp(self):
+        try:
+            return self._file_stamp()
+        except FileNotFoundError:
+            return None
+
+    def refresh(self):
+        """Bring the index up to date with the data file."""
+        if self._loaded and self._stamp is not None and self._current_stamp() == self._stamp:
+            return  # unchanged: no lock needed
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        if not self.path.exists():
+            self.rebuild()
+            return
+        if not self._loaded:
+            if not self._load_sidecar():
+                self.rebuild()
+            self._loaded = True
+            return
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        # Someone else touched the file: append-only growth is scanned
+        # incrementally, anything else means our offsets can't be trusted.
+        if stamp[1] < self._end or not self._header_ok() or not self._ends_at_row_boundary():
+            self.rebuild()
+        else:
+            self._add_tail()
+
+    def _ends_at_row_boundary(self) -> bool:
+        if self._end == 0:
+            return False
+        with open(self.path, 'rb') as f:
+            f.seek(self._end - 1)
+            return f.read(1) == b"\n"
+
+    def invalidate(self):
+        """Drop the index so the next access rebuilds it from the data file."""
+        with self._lock:
+            self._loaded = False
+            self._offsets, self._ordered = {}, {}
+            if self.index_path.exists():
+                os.remove(self.index_path)
+
+    # ---- reads / writes ----
+    def _parse(self, line: bytes) -> dict:
+        values = next(csv.reader([line.decode()]))
+        return dict(zip(self.fieldnames, values + [None] * (len(self.fieldnames) - len(values))))
+
+    def load(self, patient_id: str, skip: int = 0) -> list:
+        """Return one patient's rows (as csv.DictReader would) by seeking to each.
+
+        `skip` leaves out the patient's first rows in file order, so a caller
+        that already holds them can read just the new ones.
+        """
+        return list(self.iter_rows(patient_id, skip))
+
+    def iter_rows(self, patient_id: str, skip: int = 0):
+        """Generator form of load(): one row parsed at a time, for streaming large histories."""
+        self.refresh()
+        offsets = self._offsets.get(patient_id, [])[skip:]  # a snapshot: later appends aren't included
+        return self._read_rows(offsets)
+
+    def iter_rows_by_time(self, patient_id: str):
+        """iter_rows() in timestamp order (ties in file order), still one row at a time.
+
+        Readings are normally appended in time order. Whether a patient's are
+        is checked from the timestamps alone and remembered, so each row is
+        checked once. If a backfill put an earlier reading after later ones,
+        the offsets are first sorted on their timestamps (one 8-byte key per
+        row) and the rows are read in that order.
+        """
+        self.refresh()
+        ordered = self._ordered
+        offsets = self._offsets.get(patient_id, [])[:]  # a snapshot: later appends aren't included
+        checked, last = ordered.get(patient_id, (0, b""))
+        if checked > len(offsets):
+            checked, last = 0, b""  # remembered from before a rebuild
+        if last is not None and checked < len(offsets):
+            for timestamp in self._read_timestamps(offsets[checked:]):
+                if timestamp < last:  # ISO 8601 from isoformat(): byte order is time order
+                    last = None
+                    break
+                last = timestamp
+            ordered[patient_id] = (len(offsets), last)
+        if last is None:
+            keys = array('q', (to_micros(timestamp.decode()) for timestamp in self._read_timestamps(offsets)))
+            offsets = [offsets[i] for i in sorted(range(len(offsets)), key=keys.__getitem__)]
+        return self._read_rows(offsets)
+
+    def _read_timestamps(self, offsets):
+        read = 0
+        try:
+            with open(self.path, 'rb') as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    line = f.readline()
+                    read += len(line)
+                    yield line.split(b",", 2)[1]
+        finally:
+            metrics.inc("vitals_file_read_bytes_total", read)
+
+    def _read_rows(self, offsets):
+        if not offsets:
+            return
+        read = 0
+        try:
+            with open(self.path, 'rb') as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    line = f.readline()
+                    read += len(line)
+                    yield self._parse(line)
+        finally:
+            metrics.inc("vitals_file_read_bytes_total", read)
+
+    def iter_all(self):
+        """Every indexed row, all patients, in file order (one pass, one row at a time)."""
+        return self.read_since(None)[0]
+
+    def read_since(self, position):
+        """(rows appended after byte `position`, the new position) for tail-following readers.
+
+        `position` None (or one past the end, after the file was rewritten
+        smaller) reads from the first row. Rows are parsed lazily.
+        """
+        self.refresh()
+        end = self._end
+        return self._iter_range(position if position is not None and position <= end else 0, end), end
+
+    def _iter_range(self, start: int, end: int):
+        # Whole blocks of lines go through one csv.reader: a reader per line costs
+        # more than the parsing itself on a full scan
+        fieldnames = self.fieldnames
+        with open(self.path, 'rb') as f:
+            header = len(f.readline())
+            pos = first = max(start, header)
+            f.seek(pos)
+            try:
+                while pos < end:
+                    block = f.read(min(SCAN_BLOCK_BYTES, end - pos))
+                    if not block:
+                        break
+                    if pos + len(block) < end and not block.endswith(b"\n"):
+                        block += f.readline()  # finish the last line (end is always at a line break)
+                    pos += len(block)
+                    for values in csv.reader(block.decode().split("\n")):
+                        if not values or (len(values) == 1 and not values[0].strip()):
+                            continue  # blank line
+                        if len(values) < len(fieldnames):
+                            values += [None] * (len(fieldnames) - len(values))
+                        yield dict(zip(fieldnames, values))
+            finally:
+                metrics.inc("vitals_file_read_bytes_total", pos - first)
+
+    def version(self, patient_id: str) -> tuple:
+        """(row count, offset of the last row) for a patient: changes on every append for them."""
+        self.refresh()
+        offsets = self._offsets.get(patient_id)
+        return (len(offsets), offsets[-1]) if offsets else (0, -1)
+
+    def patient_counts(self) -> dict:
+        """{patient_id: number of rows} for every patient in the file."""
+        self.refresh()
+        return {patient_id: len(offsets) for patient_id, offsets in self._offsets.items()}
+
+    def append(self, row: dict):
+        """Append one row to the data file and record its offset."""
+        self.append_many([row])
+
+    def append_many(self, rows):
+        """Append rows with a single write and record each row's offset."""
+        with self._lock:
+            self._append_many(rows)
+
+    def _append_many(self, rows):
+        self._refresh()
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=self.fieldnames)
+        encoded, pids = [], []
+        for row in rows:
+            buf.seek(0)
+            buf.truncate()
+            writer.writerow(row)
+            encoded.append(buf.getvalue().encode())
+            pids.append(str(row['patient_id']))
+        if not encoded:
+            return
+        data = b"".join(encoded)
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(data)
+        metrics.inc("vitals_file_written_bytes_total", len(data))
+        entries = []
+        for pid, data in zip(pids, encoded):
+            entries.append((pid, offset))
+            offset += len(data)
+        self._add(entries)
+        self._append_sidecar(entries)
+        self._end = offset
+        self._stamp = self._file_stamp()
+
+
+def get_vitals_index(path, fieldnames) -> VitalsIndex:
+    """Return the process-wide index for a vitals file, creating it on first use."""
+    key = os.path.abspath(path)
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = VitalsIndex(key, fieldnames)
+    return index
+
+def drop_vitals_index(path):
+    """Forget the process-wide index for a vitals file (e.g. a segment that was sealed or deleted)."""
+    _indexes.pop(os.path.abspath(path), None)
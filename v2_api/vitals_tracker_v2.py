@@ -1,16 +1,25 @@
 # -------------------------
 # IMPORTS
 # -------------------------
-import csv
+import atexit
+import json
+import os
 from pathlib import Path
 from datetime import datetime
-import matplotlib          # Import matplotlib first
-matplotlib.use("Agg")  # Non-GUI backend for PNG output
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from fastapi import HTTPException
-import io
-from fastapi.responses import StreamingResponse
+# FastAPI, matplotlib (v2_api.rendering), NumPy, the segmented/binary backends and the
+# exporter are imported inside the functions that need them, so the CLI, bulk-import
+# workers and tests start without them
+from v2_api.alerts import AlertBroker
+from v2_api.downsample import downsample
+from v2_api.history import HistoryCache, window_bounds
+from v2_api.metrics import metrics
+from v2_api.png_cache import PNGCache
+from v2_api.scoring import COLUMN_THRESHOLDS, CompiledThresholds
+from v2_api.series import VitalsSeries
+from v2_api.storage import CSVStorage, SQLiteStorage
+from v2_api.summary import SummaryStore
+from v2_api.ward import WardBoard
+from v2_api.write_behind import WriteBehindQueue
 
 # -------------------------
 # PATHS
@@ -18,12 +27,61 @@ from fastapi.responses import StreamingResponse
 ROOT_DIR = Path(__file__).parent.parent  # parent of v2_api/
 MAPPING_FILE = ROOT_DIR / "patient_mapping.csv"
 VITALS_FILE = ROOT_DIR / "vitals.csv"
-
-# Ensure patient mapping exists
-if not MAPPING_FILE.exists():
-    with open(MAPPING_FILE, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=['patient_id', 'patient_name', 'dob'])
-        writer.writeheader()
+DB_FILE = Path(os.environ.get("VITALS_DB", ROOT_DIR / "vitals.db"))
+BINARY_FILE = Path(os.environ.get("VITALS_BINARY_FILE", ROOT_DIR / "vitals.bin"))
+
+# Storage backend: "csv" (default, the files above), "sqlite" (DB_FILE), "segmented" (SEGMENT_DIR)
+# or "binary" (fixed-width records in BINARY_FILE, read through mmap)
+STORAGE_BACKEND = os.environ.get("VITALS_STORAGE", "csv")
+
+# Segmented backend: a new segment is started once the active one reaches VITALS_SEGMENT_MB
+# (or is VITALS_SEGMENT_HOURS old, if set); sealed segments are merged and gzipped in the
+# background every VITALS_COMPACT_SECONDS, and soon after each rotation
+SEGMENT_DIR = Path(os.environ.get("VITALS_SEGMENT_DIR", ROOT_DIR / "vitals_segments"))
+SEGMENT_MB = float(os.environ.get("VITALS_SEGMENT_MB", "64"))
+SEGMENT_HOURS = float(os.environ["VITALS_SEGMENT_HOURS"]) if os.environ.get("VITALS_SEGMENT_HOURS") else None
+COMPACT_SECONDS = float(os.environ.get("VITALS_COMPACT_SECONDS", "60"))
+
+# Write-behind: add_vitals queues the scored row and a background writer appends
+# rows in groups. VITALS_FSYNC_MS unset = never fsync, 0 = every group, N = every N ms
+# (without write-behind, any VITALS_FSYNC_MS value fsyncs every append). Reads wait at most
+# VITALS_READ_FLUSH_SECONDS for queued rows, then fail with 503
+WRITE_BEHIND = os.environ.get("VITALS_WRITE_BEHIND", "0") == "1"
+WRITE_BATCH_SIZE = int(os.environ.get("VITALS_WRITE_BATCH", "1000"))
+FSYNC_MS = int(os.environ["VITALS_FSYNC_MS"]) if os.environ.get("VITALS_FSYNC_MS") else None
+READ_FLUSH_SECONDS = float(os.environ.get("VITALS_READ_FLUSH_SECONDS", "5"))
+
+# Rendered trend PNGs, keyed on (patient_id, data version); 0 MB disables the cache
+PNG_CACHE_MB = float(os.environ.get("VITALS_PNG_CACHE_MB", "64"))
+PNG_CACHE_ENTRIES = int(os.environ.get("VITALS_PNG_CACHE_ENTRIES", "256"))
+PNG_CACHE_POLICY = os.environ.get("VITALS_PNG_CACHE_POLICY", "lru")
+
+# Timestamp-sorted histories kept in memory for windowed/paginated reads (patients)
+HISTORY_CACHE_PATIENTS = int(os.environ.get("VITALS_HISTORY_CACHE", "1024"))
+
+# /trends/{patient_id}/summary: windowed stats cover this many hours up to the latest reading
+SUMMARY_WINDOW_HOURS = float(os.environ.get("VITALS_SUMMARY_WINDOW_HOURS", "24"))
+
+# GET /alerts/stream: readings pushed to listeners by default when NEWS2 >= VITALS_ALERT_MIN_SCORE
+# or any vital reaches one of VITALS_ALERT_LEVELS; each listener buffers at most VITALS_ALERT_BUFFER
+ALERT_MIN_SCORE = int(os.environ.get("VITALS_ALERT_MIN_SCORE", "5"))
+ALERT_LEVELS = tuple(level.strip() for level in os.environ.get("VITALS_ALERT_LEVELS", "Severe Alert").split(",") if level.strip())
+ALERT_BUFFER = int(os.environ.get("VITALS_ALERT_BUFFER", "100"))
+
+# Trend PNGs plot at most this many readings (LTTB downsampling, NEWS2 peaks always kept)
+PLOT_MAX_POINTS = int(os.environ.get("VITALS_PLOT_MAX_POINTS", "1000"))
+
+# Streamed (NDJSON) histories are sent in chunks of about this many bytes
+NDJSON_CHUNK_BYTES = 64 * 1024
+
+# GET /export and `python -m v2_api.export`: readings converted and written this many at a time
+EXPORT_CHUNK_ROWS = int(os.environ.get("VITALS_EXPORT_CHUNK_ROWS", "65536"))
+
+# GET /metrics: per-stage timers, request counters, file bytes, cache hit rates ("0" turns recording off).
+# VITALS_PROFILE_RATE of requests (0 = none, 1 = all) are cProfiled into VITALS_PROFILE_DIR as .prof files
+METRICS_ENABLED = os.environ.get("VITALS_METRICS", "1") == "1"
+PROFILE_RATE = float(os.environ.get("VITALS_PROFILE_RATE", "0"))
+PROFILE_DIR = Path(os.environ.get("VITALS_PROFILE_DIR", ROOT_DIR / "profiles"))
 
 # -------------------------
 # GLOBALS
@@ -40,6 +98,8 @@ REQUIRED_KEYS = [
     "Level of consciousness (fully awake and responsive?)"
 ]
 
+INT_VITAL_MAX = 32767  # largest whole-number vital every backend can store (the binary store packs them as int16)
+
 vitals_template = {
     "Blood pressure": {"systolic": None, "diastolic": None},
     "Heart rate": None,
@@ -71,6 +131,21 @@ alert_messages = {
 
 alert_scores = {"Normal": 0, "Mild Alert": 1, "Moderate Alert": 2, "Severe Alert": 3}
 
+# `thresholds` compiled at import into lookup tables: O(1) check_alert and batch scoring
+compiled_thresholds = CompiledThresholds(thresholds, alert_scores)
+
+_stores = {}
+png_cache = PNGCache(int(PNG_CACHE_MB * 1024 * 1024), PNG_CACHE_ENTRIES, PNG_CACHE_POLICY)
+_writers = {}  # storage backend -> its WriteBehindQueue
+history_cache = HistoryCache(HISTORY_CACHE_PATIENTS)
+summaries = SummaryStore(SUMMARY_WINDOW_HOURS)
+alert_broker = AlertBroker(ALERT_MIN_SCORE, ALERT_LEVELS, ALERT_BUFFER)
+ward_board = WardBoard()
+metrics.configure(enabled=METRICS_ENABLED, profile_rate=PROFILE_RATE, profile_dir=PROFILE_DIR)
+
+# Nested vitals key -> flat CSV column ("Blood pressure" is split into bp_systolic/bp_diastolic)
+VITAL_TO_COLUMN = {vital: column for column, vital in COLUMN_THRESHOLDS.items() if not column.startswith("bp_")}
+
 # -------------------------
 # UTILITY FUNCTIONS
 # -------------------------
@@ -82,67 +157,101 @@ def validate_dob(dob_input: str) -> str:
     except ValueError:
         raise ValueError("Invalid format. Use dd/mm/yy (e.g., 26/11/00).")
     
+def get_storage():
+    """Return the configured storage backend (one instance per backend and path)."""
+    if STORAGE_BACKEND == "csv":
+        key = ("csv", str(VITALS_FILE), str(MAPPING_FILE))
+    elif STORAGE_BACKEND == "sqlite":
+        key = ("sqlite", str(DB_FILE))
+    elif STORAGE_BACKEND == "segmented":
+        key = ("segmented", str(SEGMENT_DIR), str(MAPPING_FILE), SEGMENT_MB, SEGMENT_HOURS)
+    elif STORAGE_BACKEND == "binary":
+        key = ("binary", str(BINARY_FILE), str(MAPPING_FILE))
+    else:
+        raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND!r} (use 'csv', 'sqlite', 'segmented' or 'binary')")
+    store = _stores.get(key)
+    if store is None:
+        if STORAGE_BACKEND == "csv":
+            store = CSVStorage(VITALS_FILE, MAPPING_FILE, CSVNAMES)
+        elif STORAGE_BACKEND == "sqlite":
+            store = SQLiteStorage(DB_FILE, CSVNAMES)
+        elif STORAGE_BACKEND == "binary":
+            from v2_api.binary_store import BinaryStorage
+
+            store = BinaryStorage(BINARY_FILE, MAPPING_FILE, CSVNAMES)
+        else:
+            from v2_api.segments import SegmentedStorage
+
+            store = SegmentedStorage(SEGMENT_DIR, MAPPING_FILE, CSVNAMES, int(SEGMENT_MB * 1024 * 1024),
+                                     None if SEGMENT_HOURS is None else SEGMENT_HOURS * 3600)
+        _stores[key] = store
+    return store
+
+def init_storage():
+    """Create the configured backend's files/tables and build the running summaries and the
+    ward board (app startup; nothing is created at import)."""
+    store = get_storage()
+    store.init()
+    summaries.rebuild(store)
+    ward_board.refresh(store)
+    return store
+
+def http_error(status_code: int, detail: str):
+    """A fastapi.HTTPException, importing FastAPI only when an error is actually raised."""
+    from fastapi import HTTPException
+    return HTTPException(status_code=status_code, detail=detail)
+
+def get_writer() -> WriteBehindQueue:
+    """Return the write-behind queue for the configured storage backend."""
+    store = get_storage()
+    writer = _writers.get(store)
+    if writer is None:
+        writer = _writers[store] = WriteBehindQueue(store, WRITE_BATCH_SIZE, FSYNC_MS)
+    return writer
+
+def stop_writers():
+    """Drain every write-behind queue to storage and stop the writers (app shutdown)."""
+    while _writers:
+        _, writer = _writers.popitem()
+        writer.close()
+
+atexit.register(stop_writers)
+
+def start_compactor():
+    """Start background compaction if the configured backend is segmented (app startup)."""
+    store = get_storage()
+    if store.name == "segmented":
+        store.start_compactor(COMPACT_SECONDS)
+
+def stop_compactors():
+    """Stop every segmented store's compaction thread (app shutdown)."""
+    for store in _stores.values():
+        if store.name == "segmented":
+            store.stop_compactor()
+
 def get_or_create_patient_id(patient_name: str, dob: str) -> str:
     """Return existing patient ID or create new one."""
     dob = validate_dob(dob)
-    patient_name = patient_name.strip().lower()
-    
-    # Ensure mapping file exists
-    if not MAPPING_FILE.exists():
-        with open(MAPPING_FILE, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['patient_id', 'patient_name', 'dob'])
-            writer.writeheader()
-
-    # Check if headers are missing
-    with open(MAPPING_FILE, 'r', newline='') as f:
-        first_line = f.readline()
-    expected_header = "patient_id,patient_name,dob"
-    if first_line.strip() != expected_header:
-        # Read the rest of the data
-        with open(MAPPING_FILE, 'r', newline='') as f:
-            lines = f.readlines()
-        # Prepend header and overwrite file
-        with open(MAPPING_FILE, 'w', newline='') as f:
-            f.write(expected_header + "\n")
-            f.writelines(lines)
-
-    # Load current mapping
-    patient_map = {}
-    with open(MAPPING_FILE, 'r', newline='') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            patient_map[row['patient_id']] = (row['patient_name'], row['dob'])
-
-    # Look for existing patient
-    for pid, (name, existing_dob) in patient_map.items():
-        if name == patient_name and existing_dob == dob:
-            return pid
-
-    # Assign new ID
-    new_id = str(max([int(pid) for pid in patient_map.keys()], default=0) + 1)
-
-    # Append patient
-    with open(MAPPING_FILE, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=['patient_id', 'patient_name', 'dob'])
-        writer.writerow({'patient_id': new_id, 'patient_name': patient_name, 'dob': dob})
-
-    return new_id
+    patient_id, _ = get_storage().get_or_create_patient(patient_name, dob)
+    return patient_id
 
 def check_alert(vital_name, value):
     """Determine alert level for a single vital."""
     if vital_name=="Level of consciousness (fully awake and responsive?)":
         return "Normal" if value=="Yes" else "Severe Alert"
-    vital_thresholds = thresholds[vital_name]
-    for alert_level, level_range in vital_thresholds.items():
-        if isinstance(level_range,list):
-            for min_val,max_val in level_range:
-                if (min_val is None or value>=min_val) and (max_val is None or value<=max_val):
-                    return alert_level
-        else:
-            min_val,max_val = level_range
-            if (min_val is None or value>=min_val) and (max_val is None or value<=max_val):
-                return alert_level
-    return "Normal"
+    return compiled_thresholds.level(vital_name, value)
+
+def score_news2_batch(columns: dict) -> tuple:
+    """Vectorised check_alert/compute_news2_score over NumPy columns.
+
+    `columns` maps flat CSV names (bp_systolic, ..., oxygen_sats, loc) to
+    arrays. Returns ({column: level names array}, NEWS2 totals array).
+    """
+    import numpy as np
+
+    codes, totals = compiled_thresholds.score_batch(columns)
+    names = np.asarray(compiled_thresholds.levels, dtype=object)
+    return {column: names[level_codes] for column, level_codes in codes.items()}, totals
 
 def get_alert_message_level(level):
     """Return alert message for a level."""
@@ -161,51 +270,130 @@ def flatten_vitals(patient_vitals):
     flat_vitals["loc"] = patient_vitals.get("Level of consciousness (fully awake and responsive?)")
     return flat_vitals
 
-def compute_news2_score(vitals: dict) -> int:
-    """Compute NEWS2 total score."""
-    total_score=0
-    for vital,value in vitals.items():
-        if isinstance(value,dict):
-            for bp_type,bp_val in value.items():
-                level=check_alert(bp_type,bp_val)
-                if bp_type=="systolic":
-                    total_score+=alert_scores[level]
-        else:
-            level=check_alert(vital,value)
-            total_score+=alert_scores[level]
-    return total_score
+def save_rows(rows: list):
+    """Append readings to storage, or queue them for the writer when write-behind is on."""
+    for patient_id in {str(row["patient_id"]) for row in rows}:
+        png_cache.invalidate(patient_id)
+    if WRITE_BEHIND:
+        get_writer().put_many(rows)
+    else:
+        store = get_storage()
+        store.append_many(rows)
+        if FSYNC_MS is not None:  # no writer to group syncs: sync every append
+            store.sync()
 
 def save_to_csv(flat_vitals: dict):
-    file_exists = VITALS_FILE.exists()
-    if not file_exists:
-        with open(VITALS_FILE,'w',newline='') as f:
-            writer = csv.DictWriter(f,fieldnames=CSVNAMES)
-            writer.writeheader()
-    with open(VITALS_FILE,'a',newline='') as f:
-        writer = csv.DictWriter(f,fieldnames=CSVNAMES)
-        writer.writerow(flat_vitals)
+    """Append one reading to the configured storage backend."""
+    save_rows([flat_vitals])
+
+def get_synced_storage():
+    """get_storage(), after waiting for any write-behind rows so reads see our own writes."""
+    store = get_storage()
+    writer = _writers.get(store)
+    if writer is not None:
+        try:
+            writer.flush(READ_FLUSH_SECONDS)
+        except RuntimeError as e:  # the writer is stuck retrying (e.g. disk full) or has stopped
+            raise http_error(503, f"{e}: {writer.error!r}") from e
+    return store
 
 def load_from_csv(patient_id):
-    # Ensure file exists and has headers
-    if not VITALS_FILE.exists():
-        return []
-
-    with open(VITALS_FILE, 'r+', newline='') as f:
-        first_line = f.readline()
-        expected_header = ",".join(CSVNAMES)
-        if first_line.strip() != expected_header:
-            # Read rest of lines
-            f.seek(0)
-            lines = f.readlines()
-            # Write header + lines back
-            f.seek(0)
-            f.write(expected_header + "\n")
-            f.writelines(lines)
-            f.truncate()
-
-    with open(VITALS_FILE,'r',newline='') as f:
-        reader = csv.DictReader(f)
-        return [row for row in reader if row['patient_id']==patient_id]
+    """Return a patient's readings from the configured storage backend."""
+    return get_synced_storage().load(patient_id)
+
+def load_series(patient_id) -> VitalsSeries:
+    """Return a patient's readings as typed columns sorted by timestamp.
+
+    Served from history_cache: only rows added since the last call are read.
+    """
+    with metrics.stage("load_history"):
+        return history_cache.get(get_synced_storage(), patient_id)
+
+def _naive_local(value: datetime):
+    """Stored timestamps are naive local time; convert aware query bounds to match."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+def _history_window(series: VitalsSeries, since, until, limit, cursor, max_points=None) -> tuple:
+    if max_points is not None and (limit is not None or cursor is not None):
+        raise http_error(400, "max_points can't be combined with limit or cursor.")
+    try:
+        return window_bounds(series, _naive_local(since), _naive_local(until), limit, cursor)
+    except ValueError:
+        raise http_error(400, f"Invalid cursor: {cursor!r}")
+
+def query_history(patient_id: str, since: datetime = None, until: datetime = None,
+                  limit: int = None, cursor: str = None, max_points: int = None) -> tuple:
+    """A patient's readings with since <= timestamp <= until, `limit` at a time.
+
+    Returns (rows, next_cursor); pass next_cursor back to get the following page.
+    `max_points` downsamples the window instead of paging it.
+    """
+    series = load_series(patient_id)
+    start, end, next_cursor = _history_window(series, since, until, limit, cursor, max_points)
+    if max_points is not None:
+        return downsample(series.take(range(start, end)), max_points).to_rows(), None
+    return [series.row(i) for i in range(start, end)], next_cursor
+
+def iter_history(patient_id: str, since: datetime = None, until: datetime = None,
+                 limit: int = None, cursor: str = None, max_points: int = None) -> tuple:
+    """query_history() without building the list: (row generator, next_cursor).
+
+    The whole history (no window, page or max_points) is read from storage
+    one row at a time in timestamp order, like the JSON list, so memory stays
+    flat and the first rows go out before the rest are read (a patient with
+    backfilled readings on the segmented backend is sorted in memory first).
+    A window is cut from the patient's cached typed columns.
+    """
+    if since is None and until is None and limit is None and cursor is None and max_points is None:
+        return get_synced_storage().iter_rows(patient_id), None
+    series = load_series(patient_id)
+    start, end, next_cursor = _history_window(series, since, until, limit, cursor, max_points)
+    if max_points is not None:
+        series = downsample(series.take(range(start, end)), max_points)
+        start, end = 0, len(series)
+    return (series.row(i) for i in range(start, end)), next_cursor
+
+def ndjson_chunks(rows):
+    """Encode rows as NDJSON, one line per row, yielded in ~NDJSON_CHUNK_BYTES pieces."""
+    buf, size = [], 0
+    for row in rows:
+        line = json.dumps(row, ensure_ascii=False).encode() + b"\n"
+        buf.append(line)
+        size += len(line)
+        if size >= NDJSON_CHUNK_BYTES:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b"".join(buf)
+
+def stream_history(patient_id: str, since: datetime = None, until: datetime = None,
+                   limit: int = None, cursor: str = None, max_points: int = None):
+    """StreamingResponse of a patient's readings as NDJSON (application/x-ndjson)."""
+    from fastapi.responses import StreamingResponse
+
+    rows, next_cursor = iter_history(patient_id, since, until, limit, cursor, max_points)
+    headers = {} if next_cursor is None else {"X-Next-Cursor": next_cursor}
+    return StreamingResponse(ndjson_chunks(rows), media_type="application/x-ndjson", headers=headers)
+
+def export_dataset(fmt: str = None):
+    """StreamingResponse of every reading joined to patient names, as Parquet, Arrow IPC or NPZ.
+
+    Written EXPORT_CHUNK_ROWS readings at a time (see v2_api/export.py), so memory
+    stays flat however large the dataset is.
+    """
+    from fastapi.responses import StreamingResponse
+    from v2_api.export import EXPORT_FORMATS, default_format, export_chunks
+
+    fmt = fmt or default_format()
+    try:
+        body = export_chunks(get_synced_storage(), fmt, EXPORT_CHUNK_ROWS)
+    except ValueError as e:
+        raise http_error(400, str(e))
+    media_type, suffix = EXPORT_FORMATS[fmt]
+    headers = {"Content-Disposition": f'attachment; filename="vitals_export.{suffix}"'}
+    return StreamingResponse(body, media_type=media_type, headers=headers)
     
 # -------------------------
 # MAIN FUNCTIONS
@@ -227,98 +415,256 @@ def compute_news2_score(vitals: dict) -> int:
     return total_score
 
 
-def add_vitals(patient_name: str, dob: str, vitals: dict) -> dict:
-    """Add vitals, compute NEWS2, save CSV, return patient_id, alerts, and messages"""
-    # Validate
+def alert_entry(value, level: str) -> dict:
+    """One vital's entry in the alerts response."""
+    return {
+        "value": value,
+        "level": level,
+        "score": alert_scores.get(level, None),  # use None if level not scored
+        "message": get_alert_message_level(level)
+    }
+
+def build_alerts(vitals: dict) -> dict:
+    """Alert level, score and message for each vital, including actual values."""
+    alerts = {}
+    for vital, value in vitals.items():
+        if isinstance(value, dict):  # Blood pressure
+            alerts[vital] = {
+                bp_type: alert_entry(bp_val, check_alert(f"bp_{bp_type}", bp_val))  # maps to thresholds
+                for bp_type, bp_val in value.items()
+            }
+        else:
+            alerts[vital] = alert_entry(value, check_alert(vital, value))
+    return alerts
+
+def news2_from_alerts(alerts: dict) -> int:
+    """NEWS2 total from build_alerts() output; same result as compute_news2_score."""
+    total_score = 0
+    for vital, alert in alerts.items():
+        if "level" not in alert:  # Blood pressure: only systolic contributes
+            total_score += alert["systolic"]["score"]
+        else:
+            total_score += alert_scores[alert["level"]]
+    return total_score
+
+def publish_alert(result: dict, timestamp: str):
+    """Offer a scored reading to /alerts/stream listeners (no-op when nobody is listening)."""
+    if not alert_broker.has_subscribers():
+        return
+    levels = {}
+    for vital, alert in result["alerts"].items():
+        if "level" not in alert:  # Blood pressure
+            for bp_type, bp_alert in alert.items():
+                levels[f"{vital} {bp_type}"] = bp_alert["level"]
+        else:
+            levels[vital] = alert["level"]
+    alert_broker.publish({
+        "patient_id": result["patient_id"],
+        "timestamp": timestamp,
+        "total_news2_score": result["total_news2_score"],
+        "levels": {vital: level for vital, level in levels.items() if level != "Normal"},
+    })
+
+def validate_vitals(vitals: dict):
+    """Raise a 400 HTTPException if required vitals are missing or out of range."""
     for key in REQUIRED_KEYS:
         if key not in vitals:
-            raise HTTPException(status_code=400, detail=f"Missing vital: {key}")
+            raise http_error(400, f"Missing vital: {key}")
     if not isinstance(vitals["Blood pressure"], dict) or "systolic" not in vitals["Blood pressure"] or "diastolic" not in vitals["Blood pressure"]:
-        raise HTTPException(status_code=400, detail="Blood pressure must include systolic and diastolic.")
+        raise http_error(400, "Blood pressure must include systolic and diastolic.")
+    whole = {"Blood pressure systolic": vitals["Blood pressure"]["systolic"],
+             "Blood pressure diastolic": vitals["Blood pressure"]["diastolic"],
+             **{key: vitals[key] for key in ("Heart rate", "Respiratory rate", "Oxygen saturations")}}
+    for key, value in whole.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value) or not 0 <= value <= INT_VITAL_MAX:
+            raise http_error(400, f"{key} must be a whole number from 0 to {INT_VITAL_MAX}.")
+
+def add_vitals(patient_name: str, dob: str, vitals: dict) -> dict:
+    """Add vitals, compute NEWS2, save CSV, return patient_id, alerts, and messages"""
+    # Validate
+    validate_vitals(vitals)
     
     # Patient ID
-    patient_id = get_or_create_patient_id(patient_name, dob)
+    with metrics.stage("get_or_create_patient_id"):
+        patient_id = get_or_create_patient_id(patient_name, dob)
 
-    # NEWS2
-    total_score = compute_news2_score(vitals)
+    # Alerts (one check_alert per vital), NEWS2 total from the same levels
+    with metrics.stage("compute_news2_score"):
+        alerts = build_alerts(vitals)
+        total_score = news2_from_alerts(alerts)
 
     # Flatten vitals for CSV
-    flat_vitals = flatten_vitals(vitals)
+    with metrics.stage("flatten_vitals"):
+        flat_vitals = flatten_vitals(vitals)
     flat_vitals.update({
         "patient_id": patient_id,
         "timestamp": datetime.now().isoformat(),
         "news2_score": total_score
     })
-    save_to_csv(flat_vitals)
-
-    # Build alerts with messages including actual values
-    alerts = {}
-    for vital, value in vitals.items():
-        if isinstance(value, dict):  # Blood pressure
-            bp_alert = {}
-            for bp_type, bp_val in value.items():
-                key = f"bp_{bp_type}"  # maps to thresholds
-                level = check_alert(key, bp_val)
-                bp_alert[bp_type] = {
-                    "value": bp_val,
-                    "level": level,
-                    "score": alert_scores.get(level, None),  # use None if level not scored
-                    "message": get_alert_message_level(level)
+    with metrics.stage("save_to_csv"):
+        save_to_csv(flat_vitals)
+
+    result = {"patient_id": patient_id, "total_news2_score": total_score, "alerts": alerts}
+    publish_alert(result, flat_vitals["timestamp"])
+    return result
+
+def add_vitals_batch(items: list) -> list:
+    """Add many readings: one patient-ID pass, one scoring pass, one append.
+
+    Each item is {"patient_name", "dob", "vitals", optional "timestamp"}.
+    Returns one entry per item, in order: the same dict add_vitals returns,
+    or {"status_code": 400, "detail": ...} for an item that was rejected.
+    """
+    from fastapi import HTTPException
+
+    results = [None] * len(items)
+    accepted = []  # (position, normalised dob, timestamp)
+    for i, item in enumerate(items):
+        try:
+            validate_vitals(item["vitals"])
+            unknown = [key for key in item["vitals"] if key != "Blood pressure" and key not in VITAL_TO_COLUMN]
+            if unknown:
+                raise http_error(400, f"Unknown vital: {unknown[0]}")
+            dob = validate_dob(item["dob"])
+            timestamp = item.get("timestamp") or datetime.now()
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp)
+            if timestamp.tzinfo is not None:  # stored timestamps are naive local time
+                timestamp = timestamp.astimezone().replace(tzinfo=None)
+        except HTTPException as e:
+            results[i] = {"status_code": e.status_code, "detail": e.detail}
+            continue
+        except (KeyError, TypeError, ValueError) as e:
+            results[i] = {"status_code": 400, "detail": str(e)}
+            continue
+        accepted.append((i, dob, timestamp.isoformat()))
+    if not accepted:
+        return results
+
+    # Patient IDs in one mapping pass
+    identities = [(items[i]["patient_name"], dob) for i, dob, _ in accepted]
+    with metrics.stage("get_or_create_patient_id"):
+        patient_ids = [patient_id for patient_id, _ in get_storage().get_or_create_patients(identities)]
+
+    # Score the whole batch at once
+    with metrics.stage("flatten_vitals"):
+        flat_rows = [flatten_vitals(items[i]["vitals"]) for i, _, _ in accepted]
+    with metrics.stage("score_news2_batch"):
+        levels, totals = score_news2_batch({
+            column: [row[column] for row in flat_rows] for column in COLUMN_THRESHOLDS
+        })
+
+    rows = []
+    for k, ((i, _, timestamp), patient_id, flat) in enumerate(zip(accepted, patient_ids, flat_rows)):
+        alerts = {}
+        for vital, value in items[i]["vitals"].items():
+            if isinstance(value, dict):  # Blood pressure
+                alerts[vital] = {
+                    bp_type: alert_entry(bp_val, levels[f"bp_{bp_type}"][k]) for bp_type, bp_val in value.items()
                 }
-            alerts[vital] = bp_alert
-        else:
-            level = check_alert(vital, value)
-            alerts[vital] = {
-                "value": value,
-                "level": level,
-                "score": alert_scores.get(level, None),
-                "message": get_alert_message_level(level)
-            }
-
-    return {"patient_id": patient_id, "total_news2_score": total_score, "alerts": alerts}
+            else:
+                alerts[vital] = alert_entry(value, levels[VITAL_TO_COLUMN[vital]][k])
+        total_score = int(totals[k])
+        flat.update({"patient_id": patient_id, "timestamp": timestamp, "news2_score": total_score})
+        rows.append(flat)
+        results[i] = {"patient_id": patient_id, "total_news2_score": total_score, "alerts": alerts}
+
+    # All rows in a single append
+    with metrics.stage("save_to_csv"):
+        save_rows(rows)
+    for (i, _, timestamp) in accepted:
+        publish_alert(results[i], timestamp)
+    return results
 
 def get_patient_vitals(patient_id:str):
-    """Return all vitals for a patient."""
-    return load_from_csv(patient_id)
-
-def get_trends(patient_id: str) -> StreamingResponse:
-    """Generate PNG plot of vitals trends."""
-    patient_vitals_history = load_from_csv(patient_id)
-    if len(patient_vitals_history)<2:
-        raise HTTPException(status_code=400, detail="Not enough data to plot trends.")
-
-    timestamps = [datetime.fromisoformat(r["timestamp"]) for r in patient_vitals_history]
-    numerical_vitals = ["bp_systolic","heart_rate","respiratory_rate","temperature","oxygen_sats"]
-
-    plt.figure(figsize=(12,6))
-    ax1 = plt.gca()
-    for vital in numerical_vitals:
-        values = [float(r[vital]) for r in patient_vitals_history]
-        ax1.plot(timestamps, values, marker='o', label=vital.replace("_"," ").title())
-    ax1.set_xlabel("Timestamp")
-    ax1.set_ylabel("Vital Values")
-    ax1.tick_params(axis='x', rotation=45)
-
-    ax2 = ax1.twinx()
-    news2_values = [float(r["news2_score"]) for r in patient_vitals_history]
-    ax2.plot(timestamps, news2_values, color='red', marker='x', linestyle='--', label="NEWS2 Score")
-    ax2.set_ylabel("NEWS2 Score", color='red')
-
-    # Legend
-    lines_1, labels_1 = ax1.get_legend_handles_labels()
-    lines_2, labels_2 = ax2.get_legend_handles_labels()
-    ax1.legend(lines_1+lines_2, labels_1+labels_2, loc='upper left')
-
-    plt.title(f"Vital Trends for Patient {patient_id}")
-    plt.tight_layout()
-    ax1.xaxis.set_major_formatter(mdates.DateFormatter("%d-%b-%y %H:%M"))
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    buf.seek(0)
-    plt.close()
-    return StreamingResponse(buf, media_type="image/png")
-
-def get_trends_json(patient_id: str):
-    """Return vitals as JSON."""
-    return load_from_csv(patient_id)
\ No newline at end of file
+    """Return all vitals for a patient, oldest first."""
+    series = load_series(patient_id)
+    with metrics.stage("to_rows"):
+        return series.to_rows()
+
+def get_trends(patient_id: str, max_points: int = None):
+    """Generate PNG plot of vitals trends (served from the PNG cache when the data is unchanged).
+
+    Long histories are downsampled to `max_points` readings (default PLOT_MAX_POINTS).
+    """
+    from fastapi.responses import Response
+    from v2_api.rendering import render_trends_png
+
+    store = get_synced_storage()
+    data_version = store.data_version(patient_id)
+    if data_version[0] < 2:
+        raise http_error(400, "Not enough data to plot trends.")
+    max_points = PLOT_MAX_POINTS if max_points is None else max_points
+    variant = (id(store), max_points)  # different files can hold the same patient ID
+    png = png_cache.get(patient_id, data_version, variant)
+    cache_status = "HIT"
+    if png is None:
+        cache_status = "MISS"
+        with metrics.stage("load_history"):
+            series = history_cache.get(store, patient_id)
+        with metrics.stage("downsample"):
+            series = downsample(series, max_points)
+        with metrics.stage("render_png"):
+            png = render_trends_png(series)  # thread-safe, no pyplot
+        png_cache.put(patient_id, data_version, png, variant)
+    return Response(content=png, media_type="image/png", headers={"X-Cache": cache_status})
+
+def get_trends_json(patient_id: str, max_points: int = None):
+    """Return vitals as JSON, oldest first; at most `max_points` readings (LTTB) if given."""
+    series = load_series(patient_id)
+    with metrics.stage("downsample"):
+        series = downsample(series, max_points)
+    with metrics.stage("to_rows"):
+        return series.to_rows()
+
+def get_trends_summary(patient_id: str) -> dict:
+    """Latest NEWS2 plus all-time and windowed stats per vital, from the running summaries."""
+    summary = summaries.get(get_synced_storage(), patient_id)
+    if summary is None:
+        raise http_error(404, "No vitals recorded for this patient.")
+    return summary
+
+def _cell_value(value: str):
+    """A stored vital as the int or float that was written."""
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+def get_ward_overview(n: int = 20) -> dict:
+    """The n patients with the highest latest NEWS2, with that reading's vitals and alert levels."""
+    ward_board.refresh(get_synced_storage())  # fold in rows stored since the last call
+    patients = []
+    for row in ward_board.top(n):
+        alerts = {
+            column: check_alert(vital, row[column] if column == "loc" else _cell_value(row[column]))
+            for column, vital in COLUMN_THRESHOLDS.items() if row[column] not in ("", None)
+        }
+        patients.append({
+            "patient_id": row["patient_id"],
+            "timestamp": row["timestamp"],
+            "news2_score": int(row["news2_score"]),
+            "vitals": {name: row[name] for name in CSVNAMES[3:]},
+            "alerts": alerts,
+        })
+    return {"patients": patients, "total_patients": len(ward_board)}
+
+# -------------------------
+# METRICS
+# -------------------------
+@metrics.collector
+def cache_samples() -> list:
+    """Hit/miss counters of the PNG and history caches, read at scrape time."""
+    samples = []
+    for name, cache in (("png", png_cache), ("history", history_cache)):
+        hits, misses = cache.hits, cache.misses
+        samples += [
+            ("vitals_cache_hits_total", {"cache": name}, hits),
+            ("vitals_cache_misses_total", {"cache": name}, misses),
+            ("vitals_cache_hit_ratio", {"cache": name}, hits / (hits + misses) if hits + misses else 0.0),
+        ]
+    return samples
+
+def get_metrics_text() -> str:
+    """Every metric in the Prometheus text format, for GET /metrics."""
+    return metrics.render()
@@ -0,0 +1,87 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import heapq
+import threading
+from operator import itemgetter
+
+from v2_api.series import to_micros
+
+# -------------------------
+# LATEST READING PER PATIENT
+# -------------------------
+class WardBoard:
+    """Every patient's latest reading, ranked by NEWS2 for the ward overview.
+
+    `latest` maps patient_id -> (timestamp micros, NEWS2, row values). The
+    ranking buckets patients by score (NEWS2 is a small integer), so an
+    append moves one patient between two buckets in O(1). top(n) walks the
+    buckets from the highest score down and only orders the bucket where
+    the n-th patient falls (heapq.nlargest on reading time).
+
+    refresh() follows the storage tail (read_since), so rows added by the
+    CLI or other worker processes are included. Each new row costs O(1).
+    """
+
+    def __init__(self):
+        self._latest = {}
+        self._buckets = {}  # NEWS2 -> {patient_id: timestamp micros}
+        self._fieldnames = None
+        self._position = None  # storage position of the last row applied
+        self._store_id = None
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        self._latest.clear()
+        self._buckets.clear()
+        self._position = None
+
+    def _apply(self, row: dict):
+        patient_id = row["patient_id"]
+        micros, score = to_micros(row["timestamp"]), int(row["news2_score"])
+        previous = self._latest.get(patient_id)
+        if previous is not None:
+            if previous[0] > micros:  # a backfilled reading: not the latest
+                return
+            bucket = self._buckets[previous[1]]
+            del bucket[patient_id]
+            if not bucket:
+                del self._buckets[previous[1]]
+        if self._fieldnames is None:
+            self._fieldnames = tuple(row)
+        self._latest[patient_id] = (micros, score, tuple(row.values()))
+        self._buckets.setdefault(score, {})[patient_id] = micros
+
+    def refresh(self, store) -> int:
+        """Apply rows stored since the last refresh; returns how many."""
+        with self._lock:
+            if self._store_id != id(store):
+                self._reset()
+                self._store_id = id(store)
+            rows, position = store.read_since(self._position)
+            if self._position is not None and (position is None or position < self._position):
+                self._reset()  # storage was rewritten: read_since starts over from the first row
+            count = 0
+            for row in rows:
+                self._apply(row)
+                count += 1
+            self._position = position
+            return count
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def top(self, n: int) -> list:
+        """Up to n latest readings as row dicts, highest NEWS2 first, most recent first within a score."""
+        with self._lock:
+            picked = []
+            for score in sorted(self._buckets, reverse=True):
+                remaining = n - len(picked)
+                if remaining <= 0:
+                    break
+                bucket = self._buckets[score]
+                if len(bucket) <= remaining:
+                    picked += sorted(bucket.items(), key=itemgetter(1), reverse=True)
+                else:
+                    picked += heapq.nlargest(remaining, bucket.items(), key=itemgetter(1))
+            return [dict(zip(self._fieldnames, self._latest[patient_id][2])) for patient_id, _ in picked]
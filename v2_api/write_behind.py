@@ -0,0 +1,173 @@
+# -------------------------
+# IMPORTS
+# -------------------------
+import sqlite3
+import threading
+import time
+
+# Errors worth retrying the whole group for; anything else is blamed on the rows
+TRANSIENT_ERRORS = (OSError, sqlite3.OperationalError)
+
+# -------------------------
+# WRITE-BEHIND QUEUE
+# -------------------------
+def _logger():
+    # logging is imported on the first failure, not with the core module
+    import logging
+    return logging.getLogger(__name__)
+
+class WriteBehindQueue:
+    """Hand scored rows to one background writer that appends them in groups.
+
+    Request threads call put()/put_many() and return straight away. The
+    writer takes everything queued so far (up to `max_batch` rows) and
+    appends it with a single store.append_many(), so a burst of requests
+    turns into a few large writes instead of one open/write per reading.
+
+    Durability policy:
+      fsync_interval_ms=None -> each group is written (flushed to the OS), never fsynced
+      fsync_interval_ms=0    -> store.sync() after every group
+      fsync_interval_ms=N    -> store.sync() at most every N ms while there is unsynced data
+
+    Failures: an I/O error (OSError, a locked SQLite database) is taken to
+    be transient and the whole group is retried every `retry_interval`
+    seconds. Any other error means some row in the group cannot be stored
+    (e.g. a value the backend cannot represent): the group is split in
+    halves until the failing row is alone, and that row is logged, kept in
+    `dead_letters` and dropped, so it never holds up the rows behind it.
+
+    flush() blocks until everything queued before the call is written (or
+    dropped), so readers can see their own writes; close() drains the
+    queue and stops the writer.
+    """
+
+    def __init__(self, store, max_batch: int = 1000, fsync_interval_ms=None, retry_interval: float = 0.5):
+        self.store = store
+        self.max_batch = max_batch
+        self.fsync_interval = None if fsync_interval_ms is None else fsync_interval_ms / 1000
+        self.retry_interval = retry_interval
+        self.error = None       # last write error, cleared by the next successful write
+        self.batches = 0        # groups written, for stats/benchmarks
+        self.dead_letters = []  # (row, error) for rows dropped because they could not be stored
+        self._cond = threading.Condition()
+        self._pending = []
+        self._queued = 0        # rows ever queued
+        self._written = 0       # rows ever written
+        self._closing = False
+        self._thread = None
+
+    # ---- producer side ----
+    def put(self, row: dict):
+        self.put_many([row])
+
+    def put_many(self, rows):
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("write-behind queue is closed")
+            self._pending.extend(rows)
+            self._queued += len(rows)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="vitals-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return self._queued - self._written
+
+    def flush(self, timeout=None):
+        """Wait until every row queued before this call has been written."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._queued
+            while self._written < target:
+                if self._thread is None or not self._thread.is_alive():
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if self._written < target:
+                raise RuntimeError(f"{target - self._written} queued readings not written") from self.error
+
+    def close(self, timeout=None):
+        """Write everything still queued, sync if a durability policy is set, stop the writer."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # ---- writer side ----
+    def _run(self):
+        unsynced_since = None  # monotonic time of the oldest write not yet synced
+        failures = 0
+        split = []             # halves of a group that failed on its data, tried before anything newer
+        while True:
+            with self._cond:
+                if split:
+                    batch = split.pop()
+                else:
+                    while not self._pending and not self._closing:
+                        if unsynced_since is None:
+                            self._cond.wait()
+                            continue
+                        remaining = unsynced_since + self.fsync_interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    batch = self._pending[:self.max_batch]
+                    del self._pending[:len(batch)]
+                    if not batch and self._closing and unsynced_since is None:
+                        return
+
+            if batch:
+                try:
+                    self.store.append_many(batch)
+                except TRANSIENT_ERRORS as e:
+                    _logger().exception("write-behind append of %d readings failed", len(batch))
+                    with self._cond:
+                        self.error = e
+                        self._cond.notify_all()
+                    failures += 1
+                    if self._closing and failures >= 3:
+                        with self._cond:
+                            self._pending[:0] = batch + [row for part in reversed(split) for row in part]
+                        return  # give up: flush()/close() callers see the error
+                    split.append(batch)  # keep order; retried below
+                    time.sleep(self.retry_interval)
+                    continue
+                except Exception as e:
+                    with self._cond:
+                        self.error = e
+                    if len(batch) > 1:
+                        middle = len(batch) // 2
+                        split += [batch[middle:], batch[:middle]]  # popped from the end: first half first
+                        continue
+                    _logger().error("write-behind dropped a reading that could not be stored (%r): %r", e, batch[0])
+                    with self._cond:
+                        self.dead_letters.append((batch[0], e))
+                        self._written += 1
+                        self._cond.notify_all()
+                    continue
+                failures = 0
+                if unsynced_since is None:
+                    unsynced_since = time.monotonic()
+
+            if self.fsync_interval is not None and unsynced_since is not None:
+                if self._closing or time.monotonic() - unsynced_since >= self.fsync_interval:
+                    try:
+                        self.store.sync()
+                    except Exception:
+                        _logger().exception("write-behind sync failed")
+                    unsynced_since = None
+            elif self.fsync_interval is None:
+                unsynced_since = None
+
+            if batch:
+                with self._cond:
+                    self._written += len(batch)
+                    self.batches += 1
+                    self.error = None
+                    self._cond.notify_all()
@@ -1,21 +1,19 @@
 import csv #to read/write CSV files.
 import os #to check if the file exists (so we know whether to write headers).
+import shutil #to ask how tall the terminal is, so each vital's ASCII plot fits on one screen
 from pathlib import Path #Path is a convenient way to work with file paths. It lets you check if a file exists, create directories, or manipulate paths in a clean, platform-independent way.
 from datetime import datetime #to timestamp each entry automatically.
-import matplotlib.pyplot as plt #import external library matplotlib and name it plt
-import matplotlib.dates as mdates #formats the x-axis dates nicely in the matplotlib
+from v2_api.patient_index import get_patient_index #shared in-memory (name, dob) -> patient ID index, also used by the API
+from v2_api.vitals_index import get_vitals_index #per-patient byte-offset index over vitals.csv, also used by the API
+from v2_api.series import VitalsSeries #compact column-oriented readings (typed arrays instead of one dict of strings per reading)
+from v2_api.downsample import downsample #picks a few hundred representative readings out of a long history for plotting, also used by the API
 
 #patient ID mapping file setup, we are keeping a record of patients
 mapping_file = 'patient_mapping.csv' #file name 
-if not Path(mapping_file).exists(): #creates a Path object for patient_mapping.csv if it doesn't exist, so only runs once to create the file and aloso write the first line
-    with open(mapping_file, 'w', newline='') as f: #opens file for writing 'w'
-                                                   #newline='' prevents extra blank lines in CSVs on some platforms
-                                                   #with ... as f: is a context manager, which automatically closes the file after the block runs so no need for f.close().
-        writer = csv.DictWriter(f, fieldnames=['patient_id','patient_name','dob']) #csv.DictWriter writes dictionaries to CSV, maps each dictionary key to a column in the CSV.
-                                                                                   #fieldnames defines the column headers and the order of columns
-                                                                                   #tells python that a dictionary will be written into the CSV with these keys
-        writer.writeheader() #writes the first row of the CSV (patient_id,patient_name,dob), only runs if the file doesn't exist yet 
-                             #after this, the file is ready to store patient mapping rows
+
+#function to set up the patient mapping file, called once when the app starts (not on import, so importing this module has no side effects)
+def init_storage():
+    get_patient_index(mapping_file).refresh() #creates patient_mapping.csv with its header row (patient_id,patient_name,dob) if it doesn't exist yet, otherwise just loads it
 
 #function for making sure dob is valid
 def get_valid_dob():
@@ -33,33 +31,15 @@ def get_or_create_patient_id():
     patient_name = input("Please enter full name: ").strip().lower() #get patient info, name and dob
     dob = get_valid_dob()
 
-    #read existing patients by turning CSV rows into dictionary for fast access 
-    patient_map = {} #create dictionary to store the data in CSV
-    with open(mapping_file, 'r', newline='') as f: #opens CSV file in read 'r' mode
-        reader = csv.DictReader(f) #csv.DictReader(f) → Reads CSV rows as a python dictionary (row['patient_name'], etc.). key = fieldnames, values = cell values for that row
-        for row in reader: #loops through each row and builds a dictionary mapping ID 
-            patient_map[row['patient_id']] = (row['patient_name'], row['dob']) #in patient_map, key is the patient ID, value is a tuple including name and dob. Example: '1': ('simon yip', '01/01/1995')
-
-    #check if patient exists by looping through the dictionary we created
-    for patient_id, (name, existing_dob) in patient_map.items(): #loop through patient_map dictionary items
-        if name == patient_name and existing_dob == dob: #if both name and dob match inputs, patient already exists (names can be the same but wont have same dob)
-            print(f"Existing patient found: ID {patient_id}") #prints message saying the patient already exists in the symptom
-            return patient_id #return existing patient ID
-
-    #assign new ID if patient doesn't exist
-    if patient_map: #if any patients already exist. Empty collections evaluate as False, non-empty collections as True. Same as: if len(patient_map) > 0:
-        new_id = str(max(int(patient_id) for patient_id in patient_map.keys()) + 1) #turn all patient ID into integars, find the max integar which will be the most recent ID, then add 1 to it and turn it back into a string, this will be the new patient ID
-    else: #if there are no patients yet
-        new_id = '1' #first patient ID is 1
-
-    #append new patient to the CSV
-    with open(mapping_file, 'a', newline='') as f: #open file in append mode 'a', doesn't erase existing file like 'w' would, 'a' adds at the end. When you open the CSV in append mode, you need a writer object to format the dictionary correctly into a CSV row.
-        writer = csv.DictWriter(f, fieldnames=['patient_id','patient_name','dob']) #use DictWriter to write Python dictionaries into CSV rows. fieldnames maps dictionary keys to csv columns, and values mapped into cells
-        writer.writerow({'patient_id': new_id, 'patient_name': patient_name, 'dob': dob}) #.writerow writes a dictionary as one new row
-                                                                                          #the new ID, patient name and dob will be entered as a new row
-
-    print(f"New patient added: ID {new_id}") #prints confirmation to user
-    return new_id #returns newly assigned ID, which can use to tag their vital signs 
+    #look the patient up in the shared in-memory index of patient_mapping.csv instead of re-reading the whole file
+    #the index maps (name, dob) -> ID, remembers the next free ID, and reloads itself if the file changed on disk
+    patient_id, created = get_patient_index(mapping_file).get_or_create(patient_name, dob) #returns the existing ID, or appends a new row to the CSV and returns the new ID
+
+    if created:
+        print(f"New patient added: ID {patient_id}") #prints confirmation to user
+    else:
+        print(f"Existing patient found: ID {patient_id}") #prints message saying the patient already exists in the system
+    return patient_id #returns the ID, which can use to tag their vital signs 
 
 # CSV schema: defines the columns in the CSV file
 CSVNAMES = [  
@@ -241,47 +221,32 @@ def save_to_csv(patient_vitals, total_score, filename="vitals.csv"):
     #add total NEWS2 score 
     flat_vitals["news2_score"] = total_score
 
-    file_exists = Path(filename).exists() #checks if CSV file exists 
-
-    # If file exists, check the first line
-    if file_exists:
-        with open(filename, 'r', newline='') as f:
-            first_line = f.readline().strip() #reads just the first line of the file.
-        correct_header = ','.join(CSVNAMES) #turns that CSVNAMES list into a single string separated by commas
-        if first_line != correct_header: #if the first line isn't correct
-            # Prepend correct header without losing existing data
-            with open(filename, 'r', newline='') as f:
-                rows = f.readlines() #Opens the file again in read mode and reads all lines into a list rows.
-            rows.insert(0, correct_header + '\n') #	Inserts the correct header as the very first line in the list of rows.
-                                                  # + '\n' ensures the header ends with a newline, so the CSV formatting stays correct.
-            with open(filename, 'w', newline='') as f: #Opens the file in write mode, which overwrites the current file.
-                f.writelines(rows) #Writes all lines from rows back to the file, now with the correct header at the top.
-
-
-    with open(filename, 'a', newline='') as f: #append the vitals csv file, adds rows without overwriting existing data
-        writer = csv.DictWriter(f, fieldnames=CSVNAMES) #map dictionary keys defined in CSVNAMES to CSV column headers in fieldnames.
-
-        if not file_exists:   # only write header if file is new
-            writer.writeheader() #if it does not exist (first ever run), we must write the header before the first row of data.  
-        
-        writer.writerow(flat_vitals) #write a single row with the flat_vitals dictionary
+    #append through the per-patient offset index: it creates the file / repairs a missing header,
+    #writes the row at the end of the file and records the row's byte offset under its patient ID (in vitals.csv.idx)
+    get_vitals_index(filename, CSVNAMES).append(flat_vitals)
 
 
 
 #function to return saved vitals from vitals.csv as a list of dictionaries
 def load_from_csv(patient_id, filename="vitals.csv"):
-    with open(filename, 'r', newline='') as f: #open vitals.csv in read mode
-        reader = csv.DictReader(f) #Reads each line of the CSV and converts it into a dictionary.
-        return [row for row in reader if row['patient_id'] == patient_id] #loops over all rows in the dictionry, filters so you only keep rows where the patient_id stored in the CSV matches the one you passed in
-                                                                          #You get a list of dictionaries, one for every matching row.
-                                                                          #If a patient has multiple vitals saved over time, you’ll get all their readings back.
+    if not Path(filename).exists(): #no readings saved yet
+        return []
+    #the offset index knows where each of this patient's rows starts in the file, so only those rows are read
+    #instead of scanning every reading for every patient. Same output as filtering a csv.DictReader: a list of dictionaries, one per reading
+    return get_vitals_index(filename, CSVNAMES).load(patient_id)
+
+
+#function to return saved vitals as one VitalsSeries: parallel typed columns (timestamps, NEWS2 score, each vital)
+#every value is parsed from text once here, so plotting and printing don't call float() on every reading again
+def load_series(patient_id, filename="vitals.csv"):
+    return VitalsSeries.from_rows(patient_id, load_from_csv(patient_id, filename))
 
 
 #function prints recorded vitals neatly based on patient ID
 def print_patient_vitals(patient_id): 
-    patient_vitals = load_from_csv(patient_id) #calls csv reader which filters rows by patient_id, so returns a list of dictionaries that match the patient id
+    patient_vitals = load_series(patient_id) #loads this patient's readings as typed columns
 
-    if not patient_vitals: #checks whether length of list is >0
+    if not len(patient_vitals): #checks whether there are any readings
         print(f"No data found for patient {patient_id}") #if list empty, stop here and tell the user no data exists
         return
 
@@ -291,8 +256,8 @@ def print_patient_vitals(patient_id):
                                                #min(..) picks the smaller number between 5 and the total entries.
     print(f"Patient has {len(patient_vitals)} recorded vital sign entries. Showing the last {num_to_show}:") #summary message shows how many entries, and then how many entries will be printed
     
-    for row in patient_vitals[-num_to_show:]: #loops through each dictionary in the list (one vitals set = one row)
-                                              # [-num_to_show:] does not reverse the order, just slices the last num_to_show elements, keeping their original order.
+    for i in range(len(patient_vitals) - num_to_show, len(patient_vitals)): #loops through the last num_to_show readings, keeping their original order
+        row = patient_vitals.row(i) #reading i as a dictionary of strings, exactly as stored in the CSV
         print( 
             f"{row['timestamp']} | "
             f"BP: {row['bp_systolic']:>3}/{row['bp_diastolic']:>3} mmHg | "
@@ -312,36 +277,39 @@ def find_patient_id():
         patient_name = input("Enter full name: ").strip().lower()
         dob = get_valid_dob()
 
-        matches = [] #list of matching patient ID
-        with open(mapping_file, 'r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['patient_name'].strip().lower() == patient_name and row['dob'].strip() == dob:
-                    matches.append(row['patient_id']) #add the corresponding patient id if the input name and dob matches 
+        patient_id = get_patient_index(mapping_file).lookup(patient_name, dob) #hash lookup in the shared patient index, None if there is no match
 
-        if not matches:
+        if patient_id is None:
             print("No matching patient found. Please try again") #if there is no matching patient id in the csv file, this is printed
             continue
-        elif len(matches) == 1: #if there is a patient id in the matches list
-            print(f"Patient found. ID: {matches[0]}. Retrieving vitals...") #print the patient id for them to enter 
-            return matches[0] #returns the string 
+        print(f"Patient found. ID: {patient_id}. Retrieving vitals...") #print the patient id for them to enter 
+        return patient_id #returns the string 
 
 
 #function for plotting the vital trends using ASCII
-def plot_ascii(patient_id): #plotting based on input of patient_id
-    patient_vitals_history = load_from_csv(patient_id) #defined list of dictionaries output from the load_from_csv function
+def plot_ascii(patient_id, max_points=None): #plotting based on input of patient_id
+    patient_vitals_history = load_series(patient_id) #typed columns for this patient, parsed once
     
     if len(patient_vitals_history) < 2:
         print("Not enough data to plot trends (need at least 2 readings).") #only plot vitals if there is 2 or more entries to show a trend
         return 
+
+    #a long history would print thousands of bars per vital, so keep at most max_points readings
+    if max_points is None:
+        max_points = max(3, (shutil.get_terminal_size().lines - 2) // 3) #height-driven: each reading prints 3 lines (bar, blank, divider) under a 2-line title, 24 lines if it can't tell
+    shown = downsample(patient_vitals_history, max_points) #LTTB keeps the readings that shape the trend, and always the NEWS2 peaks
+    if len(shown) < len(patient_vitals_history):
+        print(f"Showing {len(shown)} of {len(patient_vitals_history)} readings (downsampled, NEWS2 peaks kept).")
+    patient_vitals_history = shown
     
     #list includes keys that only have numerical values.
     numerical_vitals = ["news2_score", "bp_systolic", "bp_diastolic", "heart_rate", "respiratory_rate", "temperature", "oxygen_sats"]
 
-    #outer loop picks which vital to process, and the list comprehension goes through all readings (all dictionaries) to collect that vital’s values.
+    timestamps = [t.isoformat() for t in patient_vitals_history.datetimes()] #creates a list of timestamps from all patient readings
+
+    #outer loop picks which vital to process, each vital is already a column of numbers in the series
     for vitals in numerical_vitals: #loops over each vital sign in the list of vitals we have made
-        values = [float(readings[vitals]) for readings in patient_vitals_history] #list comprehension loops through every dictionary in the list patient_vitals_history and collects the values for that specific vital into a new list:
-                                                                                  #make sure all strings are converted to floats/int
+        values = patient_vitals_history.column(vitals) #all readings of this vital, already numbers (no float() per reading)
         min_val = min(values)
         max_val = max(values)
         #The range is how spread out your values are. It’s used to normalise each value between 0 and 1 (or 0% to 100%).
@@ -350,8 +318,6 @@ def plot_ascii(patient_id): #plotting based on input of patient_id
                                                                     #avoids the crash and just produces bars of the same length for all readings
         plot_width = 50
 
-        timestamps = [readings["timestamp"] for readings in patient_vitals_history] #creates a list of timestamps from all patient readings
-
         print(f"\n{vitals} trends:") #prints name of the vital
         for t, v in zip(timestamps, values): #zip(timestamps, values) pairs up elements from both lists positionally.
                                             #for loop so each timestamp is matched to its corresponding vital reading
@@ -369,15 +335,20 @@ def plot_ascii(patient_id): #plotting based on input of patient_id
 
 
 #function to plot matplotlib 
-def plot_matplotlib(patient_id):
-    patient_vitals_history = load_from_csv(patient_id) #defined list of dictionaries output from the load_from_csv function
+def plot_matplotlib(patient_id, max_points=1000):
+    import matplotlib.pyplot as plt #import external library matplotlib and name it plt, imported here so the rest of the app starts without loading matplotlib
+    import matplotlib.dates as mdates #formats the x-axis dates nicely in the matplotlib
+
+    patient_vitals_history = load_series(patient_id) #typed columns for this patient, parsed once
     
     if len(patient_vitals_history) < 2:
         print("Not enough data to plot trends (need at least 2 readings).")
         return
+
+    #more points than the chart has pixels only slows drawing down and turns the lines into a smear
+    patient_vitals_history = downsample(patient_vitals_history, max_points) #at most max_points readings, NEWS2 peaks always kept
     
-    timestamps = [datetime.fromisoformat(readings["timestamp"]) for readings in patient_vitals_history] #creates a list of timestamps from all patient readings
-                                                                                                        #datetime.fromisoformat converts each timestamps to datetime objects so it reads better
+    timestamps = patient_vitals_history.datetimes() #creates a list of datetime objects from all patient readings so the x-axis reads better
     numerical_vitals = ["bp_systolic", "heart_rate", 
                       "respiratory_rate", "temperature", "oxygen_sats"] #list of numeral vitals we want to plot 
     
@@ -389,8 +360,7 @@ def plot_matplotlib(patient_id):
                      # When you call it right after plt.figure(), it returns the primary plotting area (the “main axis”) of that figure.
     #Plot each numeric vital as a line over time.
     for vitals in numerical_vitals: #for each vital in the list
-        values = [float(readings[vitals]) for readings in patient_vitals_history] #This is a list comprehension that extracts the values of this vital from all historical readings.
-                                                                                  #float() ensures the values are numbers (CSV reads everything as strings)
+        values = patient_vitals_history.column(vitals) #all historical readings of this vital, already parsed to numbers at load
         ax1.plot(timestamps, values, marker='o', label=vitals.replace("_", " ").title()) #timestamps = plot on x-axis
                                                                                          #values = plot on y-axis
                                                                                          #marker = 'o' adds a dot at each data point
@@ -403,7 +373,7 @@ def plot_matplotlib(patient_id):
     # Secondary axis for NEWS2 score
     ax2 = ax1.twinx()  #.twinx creates a secondary y-axis that shares the same x-axis as ax1 (hence twin x).
                        #necessary if you want vitals on one scale and NEWS2 scores on another scale
-    news2_values = [float(row["news2_score"]) for row in patient_vitals_history] #list comprehension containing all total news2 scores
+    news2_values = patient_vitals_history.news2_score #column containing all total news2 scores
     ax2.plot(timestamps, news2_values, color='red', marker='x', linestyle='--', label="NEWS2 Score") #plot on the secondary y-axis (ax2)
                                                                                                      #line will be red
                                                                                                      #marker data point will be x
@@ -431,6 +401,7 @@ def plot_matplotlib(patient_id):
 
 #while loop for continuous input, text-based interface
 def main():
+    init_storage() #make sure the patient mapping file exists before the menu starts
     while True:
         print("\nPatient vitals Monitoring App")
         print("=============================")